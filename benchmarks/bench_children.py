@@ -0,0 +1,132 @@
+"""
+Compares listing every child path of a form in childrenPaths with a single
+"/<form path>/*" pattern, as the number of child paths grows.
+
+For each number of child paths and each mode, measures:
+- index_memory_kib: Python memory held by the loaded forms snapshot
+- lookup: resolving the FormEntry of child paths
+- load_form: rendering child paths, through the render cache
+
+Usage: python -m benchmarks.bench_children [--children 100 1000 5000]
+    [--files 5] [--lookups 2000] [--output results.json]
+"""
+
+import argparse
+import gc
+import json
+import random
+import sys
+import tempfile
+import tracemalloc
+from pathlib import Path
+
+from benchmarks.form_tree import create_app, write_form_tree
+from benchmarks.timing import time_calls
+from canonicalwebteam.form_generator import FormGenerator, RenderCache
+
+
+def measure(directory: Path, children: int, child_patterns: bool, args):
+    templates_folder = Path(directory) / "templates"
+    form_paths = write_form_tree(
+        templates_folder,
+        files=args.files,
+        paths=1,
+        fieldsets=2,
+        children=children,
+        options=5,
+        child_patterns=child_patterns,
+    )
+    app = create_app(directory)
+    form_generator = FormGenerator(
+        app,
+        "_form.html",
+        cache_validation=None,
+        render_cache=RenderCache(max_entries=args.lookups),
+    )
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        form_generator.load_forms()
+        gc.collect()
+        after, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    sample = random.Random(0).choices(
+        [path for path in form_paths if "/child-" in path], k=args.lookups
+    )
+    calls = [((path,), {}) for path in sample]
+    lookup = time_calls(form_generator._get_form_entry, calls)
+    with app.app_context():
+        # Fill the render cache first, to time the lookups around it
+        for path in set(sample):
+            form_generator.load_form(path)
+        load_form = time_calls(form_generator.load_form, calls)
+
+    return {
+        "index_paths": len(form_generator.form_index),
+        "index_memory_kib": (after - before) / 1024,
+        "lookup": lookup,
+        "load_form": load_form,
+    }
+
+
+def run(args) -> dict:
+    results = {}
+    for children in args.children:
+        results[children] = {}
+        for mode in ("explicit", "pattern"):
+            with tempfile.TemporaryDirectory() as directory:
+                results[children][mode] = measure(
+                    directory, children, mode == "pattern", args
+                )
+
+    return {
+        "parameters": {
+            "children": args.children,
+            "files": args.files,
+            "lookups": args.lookups,
+        },
+        "results": results,
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument(
+        "--children",
+        type=int,
+        nargs="+",
+        default=[100, 1000, 5000],
+        help="child paths of each form",
+    )
+    parser.add_argument(
+        "--files", type=int, default=5, help="form-data.json files"
+    )
+    parser.add_argument(
+        "--lookups", type=int, default=2000, help="child paths looked up"
+    )
+    parser.add_argument(
+        "--output", type=Path, help="write the JSON results to a file"
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    results = run(args)
+
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(results, output, indent=2)
+    json.dump(results, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
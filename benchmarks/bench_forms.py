@@ -0,0 +1,163 @@
+"""
+Benchmarks load_forms and load_form against a synthetic templates tree.
+
+Measures load_forms wall time and peak memory, and load_form latency for:
+- cold calls: the first render of every form path
+- warm calls: the default variant of forms that were already rendered
+- override calls: a different title and product on every call
+
+Usage: python -m benchmarks.bench_forms [--files 100] [--paths 5]
+    [--fieldsets 5] [--children 2] [--render-cache] [--intern] [--lazy]
+    [--output results.json]
+
+With --lazy, load_forms doesn't search the tree, and cold calls include
+loading the form-data.json file of each form path on first use.
+"""
+
+import argparse
+import json
+import random
+import sys
+import tempfile
+from pathlib import Path
+
+from benchmarks.form_tree import create_app, write_form_tree
+from benchmarks.timing import measure_once, time_calls
+from canonicalwebteam.form_generator import FormGenerator, RenderCache
+
+
+def run(args) -> dict:
+    with tempfile.TemporaryDirectory() as directory:
+        form_paths = write_form_tree(
+            Path(directory) / "templates",
+            files=args.files,
+            paths=args.paths,
+            fieldsets=args.fieldsets,
+            children=args.children,
+            fields=args.fields,
+            options=args.options,
+        )
+        app = create_app(directory)
+        form_loader = FormGenerator(
+            app,
+            "_form.html",
+            cache_validation=args.cache_validation,
+            render_cache=RenderCache() if args.render_cache else None,
+            intern_fieldsets=args.intern,
+        )
+
+        load_forms = measure_once(
+            lambda: form_loader.load_forms(lazy=args.lazy)
+        )
+
+        random.seed(args.seed)
+        sample = random.sample(form_paths, min(args.calls, len(form_paths)))
+        overrides = [
+            (
+                (form_path,),
+                {"title": f"Title {i}", "product": f"Product {i}"},
+            )
+            for i, form_path in enumerate(
+                random.choices(form_paths, k=args.calls)
+            )
+        ]
+
+        with app.test_request_context("/"):
+            cold = time_calls(
+                form_loader.load_form, [((path,), {}) for path in sample]
+            )
+            warm = time_calls(
+                form_loader.load_form,
+                [((path,), {}) for path in sample] * args.repeat,
+            )
+            override = time_calls(form_loader.load_form, overrides)
+
+    return {
+        "parameters": {
+            "files": args.files,
+            "paths": args.paths,
+            "fieldsets": args.fieldsets,
+            "children": args.children,
+            "fields": args.fields,
+            "options": args.options,
+            "cache_validation": args.cache_validation,
+            "render_cache": args.render_cache,
+            "intern_fieldsets": args.intern,
+            "lazy": args.lazy,
+            "form_paths": len(form_paths),
+        },
+        "load_forms": load_forms,
+        "interning": (
+            form_loader.interner.stats() if form_loader.interner else None
+        ),
+        "loaded_files": len(form_loader._forms.file_paths),
+        "load_form": {"cold": cold, "warm": warm, "override": override},
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument(
+        "--files", type=int, default=100, help="form-data.json files"
+    )
+    parser.add_argument(
+        "--paths", type=int, default=5, help="form paths in each file"
+    )
+    parser.add_argument(
+        "--fieldsets", type=int, default=5, help="fieldsets in each form"
+    )
+    parser.add_argument(
+        "--children", type=int, default=2, help="childrenPaths of each form"
+    )
+    parser.add_argument(
+        "--fields", type=int, default=3, help="fields in each fieldset"
+    )
+    parser.add_argument(
+        "--options", type=int, default=20, help="options in each field"
+    )
+    parser.add_argument(
+        "--calls", type=int, default=500, help="load_form calls per case"
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=3, help="passes of warm calls"
+    )
+    parser.add_argument(
+        "--cache-validation",
+        choices=["stat", "hash", "none"],
+        default="stat",
+    )
+    parser.add_argument(
+        "--render-cache", action="store_true", help="use a RenderCache"
+    )
+    parser.add_argument(
+        "--intern", action="store_true", help="intern fieldsets"
+    )
+    parser.add_argument(
+        "--lazy", action="store_true", help="load forms on first use"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--output", type=Path, help="write the JSON results to a file"
+    )
+    args = parser.parse_args(argv)
+    if args.cache_validation == "none":
+        args.cache_validation = None
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    results = run(args)
+
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(results, output, indent=2)
+    json.dump(results, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+Compares the JSON backends parsing form-data.json files.
+
+Writes a synthetic templates tree with large option lists, then measures for
+each backend:
+- parse: reading and parsing every form-data.json file
+- load_forms: wall time and peak memory of full load_forms calls
+
+The "json_text" baseline parses text-mode file handles with json.load, as
+form-data.json files were read before JSON backends were added.
+
+Usage: python -m benchmarks.bench_json [--files 50] [--options 200]
+    [--repeat 5] [--output results.json]
+"""
+
+import argparse
+import json
+import sys
+import tempfile
+from pathlib import Path
+
+from benchmarks.form_tree import create_app, write_form_tree
+from benchmarks.timing import measure_once, time_calls
+from canonicalwebteam.form_generator import FormGenerator
+from canonicalwebteam.form_generator.json_backend import (
+    get_json_backend,
+    ORJSON_BACKEND,
+)
+
+
+def read_text(file_path: Path):
+    with open(file_path, encoding="utf-8") as form_json:
+        return json.load(form_json)
+
+
+def reader(backend_name: str):
+    """
+    Returns a function reading and parsing a file with a backend.
+    """
+    if backend_name == "json_text":
+        return read_text
+
+    loads = get_json_backend(backend_name).loads
+
+    def read(file_path: Path):
+        with open(file_path, "rb") as form_json:
+            return loads(form_json.read())
+
+    return read
+
+
+def run(args) -> dict:
+    backends = ["json_text", "json"]
+    if ORJSON_BACKEND is not None:
+        backends.append("orjson")
+
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        templates_folder = Path(directory) / "templates"
+        write_form_tree(
+            templates_folder,
+            files=args.files,
+            paths=args.paths,
+            fieldsets=args.fieldsets,
+            fields=args.fields,
+            options=args.options,
+        )
+        file_paths = sorted(templates_folder.rglob("form-data.json"))
+        total_bytes = sum(path.stat().st_size for path in file_paths)
+
+        for backend_name in backends:
+            read = reader(backend_name)
+            parse = time_calls(
+                read, [((path,), {}) for path in file_paths] * args.repeat
+            )
+
+            if backend_name == "json_text":
+                load_forms = memory = None
+            else:
+                app = create_app(directory)
+
+                def load_forms_once():
+                    FormGenerator(
+                        app, "_form.html", json_backend=backend_name
+                    ).load_forms()
+
+                # tracemalloc slows allocations down, so time separately
+                load_forms = time_calls(load_forms_once, [((), {})] * 3)
+                memory = measure_once(load_forms_once)["peak_memory_kib"]
+
+            results[backend_name] = {
+                "parse": parse,
+                "parse_mb_per_s": (
+                    total_bytes
+                    / (parse["mean_ms"] / 1000 * len(file_paths))
+                    / 1e6
+                ),
+                "load_forms": load_forms,
+                "load_forms_peak_memory_kib": memory,
+            }
+
+    return {
+        "parameters": {
+            "files": args.files,
+            "paths": args.paths,
+            "fieldsets": args.fieldsets,
+            "fields": args.fields,
+            "options": args.options,
+            "repeat": args.repeat,
+            "mean_file_kib": total_bytes / len(file_paths) / 1024,
+        },
+        "backends": results,
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument(
+        "--files", type=int, default=50, help="form-data.json files"
+    )
+    parser.add_argument(
+        "--paths", type=int, default=5, help="form paths in each file"
+    )
+    parser.add_argument(
+        "--fieldsets", type=int, default=5, help="fieldsets in each form"
+    )
+    parser.add_argument(
+        "--fields", type=int, default=3, help="fields in each fieldset"
+    )
+    parser.add_argument(
+        "--options", type=int, default=200, help="options in each field"
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=5, help="passes over the files"
+    )
+    parser.add_argument(
+        "--output", type=Path, help="write the JSON results to a file"
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    results = run(args)
+
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(results, output, indent=2)
+    json.dump(results, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""
+Measures the memory and latency trade-off of keeping forms in a
+TieredFormStore, against keeping every form parsed.
+
+Forms are requested with skewed traffic: a few forms get most requests, as
+on a site where most forms are rarely visited. For parsed forms, with and
+without interning, then a store with each --hot-entries limit, measures:
+- retained_kib: Python memory held after load_forms
+- lookup: resolving the FormEntry of requested paths, with fieldsets and
+  formData
+- after_kib: Python memory held after the requests
+- store: the form store stats
+
+Usage: python -m benchmarks.bench_store [--files 200] [--paths 5]
+    [--options 50] [--hot-entries 16 128] [--promote-after 1]
+    [--calls 5000] [--output results.json]
+"""
+
+import argparse
+import gc
+import json
+import random
+import sys
+import tempfile
+import tracemalloc
+from pathlib import Path
+
+from benchmarks.form_tree import create_app, write_form_tree
+from benchmarks.timing import time_calls
+from canonicalwebteam.form_generator import FormGenerator, TieredFormStore
+
+
+def traced_memory() -> int:
+    gc.collect()
+    return tracemalloc.get_traced_memory()[0]
+
+
+def measure(
+    directory: Path,
+    form_paths: list,
+    max_hot_entries,
+    args,
+    intern_fieldsets=False,
+):
+    form_store = (
+        TieredFormStore(
+            max_hot_entries=max_hot_entries,
+            promote_after=args.promote_after,
+        )
+        if max_hot_entries is not None
+        else None
+    )
+    app = create_app(directory)
+
+    # Paths are requested with Zipf-like weights
+    weights = [1 / rank for rank in range(1, len(form_paths) + 1)]
+    sample = random.Random(0).choices(form_paths, weights, k=args.calls)
+
+    tracemalloc.start()
+    try:
+        before = traced_memory()
+        form_generator = FormGenerator(
+            app,
+            "_form.html",
+            cache_validation=None,
+            intern_fieldsets=intern_fieldsets,
+            form_store=form_store,
+        )
+        form_generator.load_forms()
+        retained = traced_memory() - before
+
+        for path in sample:
+            form_generator._get_form_entry(path)
+        after = traced_memory() - before
+    finally:
+        tracemalloc.stop()
+
+    lookup = time_calls(
+        form_generator._get_form_entry, [((path,), {}) for path in sample]
+    )
+    return {
+        "retained_kib": retained / 1024,
+        "after_kib": after / 1024,
+        "lookup": lookup,
+        "store": form_store.stats() if form_store is not None else None,
+    }
+
+
+def run(args) -> dict:
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        form_paths = write_form_tree(
+            Path(directory) / "templates",
+            files=args.files,
+            paths=args.paths,
+            options=args.options,
+        )
+        random.Random(1).shuffle(form_paths)
+
+        results["parsed"] = measure(directory, form_paths, None, args)
+        results["parsed_interned"] = measure(
+            directory, form_paths, None, args, intern_fieldsets=True
+        )
+        for max_hot_entries in args.hot_entries:
+            results[f"store_{max_hot_entries}"] = measure(
+                directory, form_paths, max_hot_entries, args
+            )
+
+    return {
+        "parameters": {
+            "files": args.files,
+            "paths": args.paths,
+            "options": args.options,
+            "hot_entries": args.hot_entries,
+            "promote_after": args.promote_after,
+            "calls": args.calls,
+        },
+        "results": results,
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument(
+        "--files", type=int, default=200, help="form-data.json files"
+    )
+    parser.add_argument(
+        "--paths", type=int, default=5, help="form paths in each file"
+    )
+    parser.add_argument(
+        "--options", type=int, default=50, help="options in each field"
+    )
+    parser.add_argument(
+        "--hot-entries",
+        type=int,
+        nargs="+",
+        default=[16, 128],
+        help="max_hot_entries of each store measured",
+    )
+    parser.add_argument(
+        "--promote-after",
+        type=int,
+        default=1,
+        help="cold reads before a form is promoted",
+    )
+    parser.add_argument(
+        "--calls", type=int, default=5000, help="form paths requested"
+    )
+    parser.add_argument(
+        "--output", type=Path, help="write the JSON results to a file"
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    results = run(args)
+
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(results, output, indent=2)
+    json.dump(results, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
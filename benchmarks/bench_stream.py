@@ -0,0 +1,145 @@
+"""
+Compares rendering a page embedding a large form with load_form, which
+builds the whole form before the page is returned, with streaming the page
+with stream_template and stream_form.
+
+The response body is consumed chunk by chunk and discarded, as a WSGI
+server would send it, measuring for each mode:
+- first_chunk_ms: time until the first chunk of the page is available
+- total_ms: time until the whole page was generated
+- peak_memory_kib: peak Python memory while rendering the page
+
+Usage: python -m benchmarks.bench_stream [--fieldsets 40] [--fields 5]
+    [--options 300] [--repeat 5] [--output results.json]
+"""
+
+import argparse
+import json
+import sys
+import tempfile
+import tracemalloc
+from pathlib import Path
+from time import perf_counter
+
+from flask import render_template, stream_template
+
+from benchmarks.form_tree import create_app, write_form_tree
+from canonicalwebteam.form_generator import FormGenerator
+
+PAGES = {
+    "load_form": "<head></head>{{ load_form(form_path) | safe }}</html>",
+    "stream_form": (
+        "<head></head>{% for chunk in stream_form(form_path) %}"
+        "{{ chunk | safe }}{% endfor %}</html>"
+    ),
+}
+
+
+def consume(app, mode: str, form_path: str) -> dict:
+    """
+    Renders the page of a mode in a request, discarding its chunks.
+    """
+    with app.test_request_context("/"):
+        start = perf_counter()
+        if mode == "stream_form":
+            chunks = stream_template(f"{mode}.html", form_path=form_path)
+        else:
+            chunks = iter(
+                (render_template(f"{mode}.html", form_path=form_path),)
+            )
+
+        first_chunk = None
+        for chunk in chunks:
+            if first_chunk is None:
+                first_chunk = perf_counter() - start
+        total = perf_counter() - start
+
+    return {"first_chunk_ms": first_chunk * 1000, "total_ms": total * 1000}
+
+
+def run(args) -> dict:
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        templates_folder = Path(directory) / "templates"
+        form_paths = write_form_tree(
+            templates_folder,
+            files=1,
+            paths=1,
+            fieldsets=args.fieldsets,
+            fields=args.fields,
+            options=args.options,
+        )
+        for mode, source in PAGES.items():
+            (templates_folder / f"{mode}.html").write_text(source)
+
+        app = create_app(directory)
+        form_generator = FormGenerator(app, "_form.html")
+        form_generator.load_forms()
+
+        for mode in PAGES:
+            # Load the templates first
+            consume(app, mode, form_paths[0])
+            samples = [
+                consume(app, mode, form_paths[0]) for _ in range(args.repeat)
+            ]
+
+            tracemalloc.start()
+            try:
+                consume(app, mode, form_paths[0])
+                _, peak = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+
+            results[mode] = {
+                key: min(sample[key] for sample in samples)
+                for key in ("first_chunk_ms", "total_ms")
+            }
+            results[mode]["peak_memory_kib"] = peak / 1024
+
+    return {
+        "parameters": {
+            "fieldsets": args.fieldsets,
+            "fields": args.fields,
+            "options": args.options,
+            "repeat": args.repeat,
+        },
+        "modes": results,
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument(
+        "--fieldsets", type=int, default=40, help="fieldsets in the form"
+    )
+    parser.add_argument(
+        "--fields", type=int, default=5, help="fields in each fieldset"
+    )
+    parser.add_argument(
+        "--options", type=int, default=300, help="options in each field"
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=5, help="renders of each page"
+    )
+    parser.add_argument(
+        "--output", type=Path, help="write the JSON results to a file"
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    results = run(args)
+
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(results, output, indent=2)
+    json.dump(results, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
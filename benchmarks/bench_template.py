@@ -0,0 +1,149 @@
+"""
+Compares rendering forms with render_template, which looks the form
+template up and runs every context processor on each call, with the
+compiled template and an allow-list of context processors
+(context_processors).
+
+The app registers --processors context processors, as a site would. Forms
+are rendered without a render cache, in a request context, measuring:
+- load_form: rendering a single form
+- load_forms_batch: rendering --batch forms in one call
+
+Small forms (--fieldsets, --options) keep the rendering itself cheap, so
+the per-call overhead stands out.
+
+Usage: python -m benchmarks.bench_template [--files 20] [--fieldsets 1]
+    [--options 2] [--processors 5] [--calls 2000] [--batch 5]
+    [--output results.json]
+"""
+
+import argparse
+import json
+import random
+import sys
+import tempfile
+from pathlib import Path
+
+from benchmarks.form_tree import create_app, write_form_tree
+from benchmarks.timing import time_calls
+from canonicalwebteam.form_generator import FormGenerator
+
+
+def add_context_processors(app, count: int):
+    """
+    Registers context processors returning a few values each.
+    """
+    for i in range(count):
+
+        def processor(i=i):
+            return {f"value_{i}_{k}": f"{i}-{k}" for k in range(5)}
+
+        processor.__name__ = f"processor_{i}"
+        app.context_processor(processor)
+
+
+def run(args) -> dict:
+    modes = {
+        "render_template": None,
+        "compiled": (),
+        "compiled_allow_one": ("processor_0",),
+    }
+
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        form_paths = write_form_tree(
+            Path(directory) / "templates",
+            files=args.files,
+            paths=5,
+            fieldsets=args.fieldsets,
+            options=args.options,
+        )
+        sample = random.Random(0).choices(form_paths, k=args.calls)
+        batches = [
+            sample[start : start + args.batch]
+            for start in range(0, len(sample), args.batch)
+        ]
+
+        for mode, context_processors in modes.items():
+            app = create_app(directory)
+            add_context_processors(app, args.processors)
+            form_generator = FormGenerator(
+                app,
+                "_form.html",
+                cache_validation=None,
+                context_processors=context_processors,
+            )
+            form_generator.load_forms()
+
+            with app.test_request_context("/"):
+                # Load the template and compile it before timing
+                form_generator.load_form(form_paths[0])
+                results[mode] = {
+                    "load_form": time_calls(
+                        form_generator.load_form,
+                        [((path,), {}) for path in sample],
+                    ),
+                    "load_forms_batch": time_calls(
+                        form_generator.load_forms_batch,
+                        [((batch,), {}) for batch in batches],
+                    ),
+                }
+
+    return {
+        "parameters": {
+            "files": args.files,
+            "fieldsets": args.fieldsets,
+            "options": args.options,
+            "processors": args.processors,
+            "calls": args.calls,
+            "batch": args.batch,
+        },
+        "modes": results,
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument(
+        "--files", type=int, default=20, help="form-data.json files"
+    )
+    parser.add_argument(
+        "--fieldsets", type=int, default=1, help="fieldsets in each form"
+    )
+    parser.add_argument(
+        "--options", type=int, default=2, help="options in each field"
+    )
+    parser.add_argument(
+        "--processors",
+        type=int,
+        default=5,
+        help="context processors registered on the app",
+    )
+    parser.add_argument(
+        "--calls", type=int, default=2000, help="forms rendered"
+    )
+    parser.add_argument(
+        "--batch", type=int, default=5, help="forms in each batch"
+    )
+    parser.add_argument(
+        "--output", type=Path, help="write the JSON results to a file"
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    results = run(args)
+
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(results, output, indent=2)
+    json.dump(results, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
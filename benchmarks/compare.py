@@ -0,0 +1,51 @@
+"""
+Compares two benchmark result files, printing each metric of the baseline
+and candidate runs and their ratio.
+
+Usage: python -m benchmarks.compare baseline.json candidate.json
+"""
+
+import argparse
+import json
+
+
+def flatten(results: dict, prefix: str = "") -> dict:
+    """
+    Flattens nested results into {"a.b.c": value} numeric metrics.
+    """
+    metrics = {}
+    for key, value in results.items():
+        if key == "parameters":
+            continue
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            metrics.update(flatten(value, f"{name}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            metrics[name] = value
+    return metrics
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    args = parser.parse_args(argv)
+
+    with open(args.baseline) as baseline_file:
+        baseline = flatten(json.load(baseline_file))
+    with open(args.candidate) as candidate_file:
+        candidate = flatten(json.load(candidate_file))
+
+    width = max(len(name) for name in baseline)
+    for name, value in baseline.items():
+        if name not in candidate:
+            continue
+        ratio = candidate[name] / value if value else float("nan")
+        print(
+            f"{name:<{width}}  {value:>12.3f}  {candidate[name]:>12.3f}"
+            f"  {ratio:>6.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Synthetic templates trees and Flask apps for the benchmarks.
+"""
+
+import json
+from pathlib import Path
+
+from flask import Flask
+
+FORM_TEMPLATE = """\
+<form id="{{ formPath }}" data-form-id="{{ formId or formData.formId }}"
+  {%- if isModal %} class="is-modal" data-modal-id="{{ modalId }}"{% endif %}>
+  <h2>{{ formData.title }}</h2>
+  <p>{{ formData.introText }}</p>
+  {%- for fieldset in fieldsets %}
+  <fieldset id="{{ fieldset.id }}">
+    <legend>{{ fieldset.title }}</legend>
+    {%- for field in fieldset.fields %}
+    <label for="{{ field.id }}">{{ field.label }}</label>
+    <select id="{{ field.id }}" name="{{ field.id }}">
+      {%- for option in field.options %}
+      <option value="{{ option.value }}">{{ option.label }}</option>
+      {%- endfor %}
+    </select>
+    {%- endfor %}
+  </fieldset>
+  {%- endfor %}
+  <input type="hidden" name="returnURL" value="{{ formData.returnUrl }}">
+  <input type="hidden" name="product" value="{{ formData.product }}">
+</form>
+"""
+
+
+def build_form(
+    section: str, path: str, fieldsets: int, fields: int, options: int
+) -> dict:
+    """
+    Builds the JSON of a single form.
+    """
+    return {
+        "templatePath": f"{section}/{path}/index.html",
+        "isModal": False,
+        "modalId": f"{section}-{path}-modal",
+        "formData": {
+            "title": f"Talk to us about {section}",
+            "introText": "Fill in your details and we'll get in touch.",
+            "formId": 1000,
+            "returnUrl": f"/{section}/{path}#contact-form-success",
+            "product": section,
+        },
+        "fieldsets": [
+            {
+                "id": f"fieldset-{k}",
+                "title": f"Fieldset {k}",
+                "fields": [
+                    {
+                        "id": f"field-{k}-{f}",
+                        "label": f"Field {f}",
+                        "type": "select",
+                        "options": [
+                            {"value": f"option-{o}", "label": f"Option {o}"}
+                            for o in range(options)
+                        ],
+                    }
+                    for f in range(fields)
+                ],
+            }
+            for k in range(fieldsets)
+        ],
+    }
+
+
+def write_form_tree(
+    templates_folder: Path,
+    files: int = 100,
+    paths: int = 5,
+    fieldsets: int = 5,
+    children: int = 0,
+    fields: int = 3,
+    options: int = 20,
+    child_patterns: bool = False,
+) -> list:
+    """
+    Writes a templates tree of form-data.json files and the form template.
+
+    :param files: Number of form-data.json files
+    :param paths: Number of form paths in each file
+    :param fieldsets: Number of fieldsets in each form
+    :param children: Number of childrenPaths of each form
+    :param fields: Number of fields in each fieldset
+    :param options: Number of options in each field
+    :param child_patterns: Register the child paths of each form with a
+        single "/<form path>/*" pattern instead of listing them
+    :return: Every form path, including child paths
+    """
+    templates_folder = Path(templates_folder)
+    templates_folder.mkdir(parents=True, exist_ok=True)
+    (templates_folder / "_form.html").write_text(FORM_TEMPLATE)
+
+    form_paths = []
+    for i in range(files):
+        section = f"section-{i}"
+        forms = {}
+        for j in range(paths):
+            path = f"path-{j}"
+            form = build_form(section, path, fieldsets, fields, options)
+            children_paths = [
+                f"/{section}/{path}/child-{c}" for c in range(children)
+            ]
+            form["childrenPaths"] = (
+                [f"/{section}/{path}/*"]
+                if child_patterns and children
+                else children_paths
+            )
+            forms[f"/{section}/{path}"] = form
+            form_paths.append(f"/{section}/{path}")
+            form_paths.extend(children_paths)
+
+        section_folder = templates_folder / section
+        section_folder.mkdir(exist_ok=True)
+        with open(section_folder / "form-data.json", "w") as form_json:
+            json.dump({"form": forms}, form_json)
+
+    return form_paths
+
+
+def create_app(directory: Path) -> Flask:
+    """
+    Creates a Flask app whose templates folder is 'directory/templates',
+    where FormGenerator looks for form-data.json files.
+    """
+    directory = Path(directory)
+    return Flask(
+        __name__,
+        root_path=str(directory / "app"),
+        template_folder=str(directory / "templates"),
+    )
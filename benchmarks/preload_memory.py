@@ -0,0 +1,133 @@
+"""
+Measures per-worker memory with and without FormGenerator.preload().
+
+Forks worker processes the way gunicorn does with preload_app, has each one
+render every form, then reports their RSS and PSS (Linux only).
+
+Usage: python -m benchmarks.preload_memory [--workers 4] [--files 200]
+    [--intern]
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+
+from benchmarks.form_tree import create_app, write_form_tree
+from canonicalwebteam.form_generator import FormGenerator, RenderCache
+
+
+def read_memory() -> dict:
+    """
+    Returns the RSS and PSS of the current process in KiB.
+    """
+    memory = {}
+    with open("/proc/self/smaps_rollup") as smaps:
+        for line in smaps:
+            key, _, value = line.partition(":")
+            if key in ("Rss", "Pss"):
+                memory[key.lower()] = int(value.split()[0])
+    return memory
+
+
+def run_worker(form_loader, form_paths, preload, requests):
+    """
+    Serves 'requests' renders of every form and returns its memory usage.
+    """
+    if not preload:
+        form_loader.load_forms()
+        form_loader.warm()
+
+    with form_loader.app.app_context():
+        for _ in range(requests):
+            for form_path in form_paths:
+                form_loader.load_form(form_path)
+
+    return read_memory()
+
+
+def measure(
+    directory, form_paths, preload, workers, requests, intern_fieldsets=True
+) -> list:
+    """
+    Forks workers and collects their memory usage.
+    """
+    app = create_app(directory)
+    form_loader = FormGenerator(
+        app,
+        "_form.html",
+        cache_validation=None,
+        render_cache=RenderCache(max_entries=len(form_paths)),
+        intern_fieldsets=intern_fieldsets,
+    )
+    if preload:
+        form_loader.preload(warm=True)
+
+    children = []
+    for _ in range(workers):
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(read_fd)
+            memory = run_worker(form_loader, form_paths, preload, requests)
+            os.write(write_fd, json.dumps(memory).encode())
+            os._exit(0)
+        os.close(write_fd)
+        children.append((pid, read_fd))
+
+    results = []
+    for pid, read_fd in children:
+        with os.fdopen(read_fd) as pipe:
+            results.append(json.loads(pipe.read()))
+        os.waitpid(pid, 0)
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--files", type=int, default=200)
+    parser.add_argument("--paths", type=int, default=5)
+    parser.add_argument("--fieldsets", type=int, default=5)
+    parser.add_argument("--children", type=int, default=2)
+    parser.add_argument("--requests", type=int, default=3)
+    parser.add_argument(
+        "--intern", action="store_true", help="intern fieldsets"
+    )
+    args = parser.parse_args()
+
+    if not os.path.exists("/proc/self/smaps_rollup"):
+        sys.exit("This benchmark requires Linux /proc/self/smaps_rollup")
+
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        form_paths = write_form_tree(
+            os.path.join(directory, "templates"),
+            files=args.files,
+            paths=args.paths,
+            fieldsets=args.fieldsets,
+            children=args.children,
+        )
+        for preload in (False, True):
+            workers = measure(
+                directory,
+                form_paths,
+                preload,
+                args.workers,
+                args.requests,
+                intern_fieldsets=args.intern,
+            )
+            results["preload" if preload else "no_preload"] = {
+                "workers": workers,
+                "mean_rss_kib": sum(w["rss"] for w in workers) / len(workers),
+                "mean_pss_kib": sum(w["pss"] for w in workers) / len(workers),
+            }
+
+    json.dump(results, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Timing helpers shared by the benchmarks.
+"""
+
+import tracemalloc
+from time import perf_counter
+
+
+def summarize(samples: list) -> dict:
+    """
+    Summarizes durations in seconds as milliseconds percentiles.
+    """
+    samples = sorted(samples)
+    count = len(samples)
+
+    def percentile(p):
+        return samples[min(count - 1, int(count * p / 100))] * 1000
+
+    return {
+        "count": count,
+        "mean_ms": sum(samples) / count * 1000,
+        "p50_ms": percentile(50),
+        "p99_ms": percentile(99),
+        "max_ms": samples[-1] * 1000,
+    }
+
+
+def time_calls(function, calls: list) -> dict:
+    """
+    Times function(*args, **kwargs) for every (args, kwargs) in calls.
+    """
+    samples = []
+    for args, kwargs in calls:
+        start = perf_counter()
+        function(*args, **kwargs)
+        samples.append(perf_counter() - start)
+    return summarize(samples)
+
+
+def measure_once(function) -> dict:
+    """
+    Runs function once, measuring its wall time and peak Python memory.
+    """
+    tracemalloc.start()
+    start = perf_counter()
+    try:
+        function()
+        duration = perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {"wall_ms": duration * 1000, "peak_memory_kib": peak / 1024}
@@ -1,3 +1,15 @@
 # flake8: noqa
 
 from canonicalwebteam.form_generator.app import FormGenerator
+from canonicalwebteam.form_generator.cache import (
+    CacheBackend,
+    DiskRenderCache,
+    RedisRenderCache,
+    RenderCache,
+)
+from canonicalwebteam.form_generator.index import FormEntry
+from canonicalwebteam.form_generator.json_backend import JSONBackend
+from canonicalwebteam.form_generator.watcher import FormWatcher
+from canonicalwebteam.form_generator.signals import form_timed
+from canonicalwebteam.form_generator.stats import FormStats
+from canonicalwebteam.form_generator.store import TieredFormStore
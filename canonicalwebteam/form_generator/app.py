@@ -1,89 +1,1375 @@
-from json import load as json_load, JSONDecodeError
-from flask import abort, render_template
+from asyncio import to_thread
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
+from fnmatch import fnmatch
+from functools import partial
+from gc import collect as gc_collect, freeze as gc_freeze
+from hashlib import sha256
+from json import dump as json_dump, load as json_load, JSONDecodeError
+from flask import (
+    abort,
+    g,
+    has_request_context,
+    render_template,
+    request,
+    stream_template,
+    url_for,
+)
+from jinja2 import meta, TemplateNotFound, TemplateSyntaxError
+from markupsafe import Markup
+from os import fstat, walk
 from pathlib import Path
+from threading import Lock, RLock
+from time import perf_counter
+from types import MappingProxyType
+from typing import Iterator
 from werkzeug.exceptions import HTTPException
 
+from canonicalwebteam.form_generator.blueprint import (
+    build_definition,
+    create_blueprint,
+)
+from canonicalwebteam.form_generator.cli import create_cli
+from canonicalwebteam.form_generator.index import (
+    EMPTY_FORM_DATA,
+    FormEntry,
+    FormMetadata,
+    FormSnapshot,
+)
+from canonicalwebteam.form_generator.intern import FormInterner
+from canonicalwebteam.form_generator.json_backend import (
+    dumps_canonical,
+    get_json_backend,
+    STDLIB_BACKEND,
+)
+from canonicalwebteam.form_generator.manifest import (
+    build_manifest_source,
+    read_manifest,
+    write_manifest,
+)
+from canonicalwebteam.form_generator.path_trie import is_pattern, split_path
+from canonicalwebteam.form_generator.signals import form_timed
+
+# formData keys that can be overridden by load_form parameters
+FORM_DATA_OVERRIDES = (
+    "title",
+    "introText",
+    "returnUrl",
+    "lpUrl",
+    "lpId",
+    "product",
+)
+
+# Minimum size of the chunks yielded by stream_form, in characters
+STREAM_CHUNK_SIZE = 8192
+
+# Returned by FormGenerator._timed when nothing is listening
+_NOT_TIMED = nullcontext()
+
+
+class _Timer:
+    """
+    Context manager reporting the duration of a phase to FormGenerator
+    hooks and the form_timed signal.
+    """
+
+    __slots__ = ("form_generator", "phase", "info", "start")
+
+    def __init__(self, form_generator, phase: str, info: dict):
+        self.form_generator = form_generator
+        self.phase = phase
+        self.info = info
+
+    def __enter__(self):
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.form_generator._emit(
+            self.phase, perf_counter() - self.start, **self.info
+        )
+
 
 class FormGenerator:
-    def __init__(self, app, form_template_path):
+    # Directories that can be excluded from the form-data.json search
+    DEFAULT_EXCLUDE = (".*", "node_modules", "vendor", "__pycache__")
+    # Number of form paths without their own form remembered by lazy
+    # loading
+    MAX_MISSING_PATHS = 1024
+
+    def __init__(
+        self,
+        app,
+        form_template_path,
+        cache_validation="stat",
+        render_cache=None,
+        fieldsets_template_path=None,
+        json_backend=None,
+        intern_fieldsets=False,
+        conditional_requests=False,
+        definitions_url_prefix=None,
+        context_processors=None,
+        form_store=None,
+        cache_version=None,
+    ):
         """
         Initialize with a Flask app instance.
 
         :param app: Flask app instance
         :param form_template_path: Path to the form template
+        :param cache_validation: How cached form-data.json files are checked
+            for changes: "stat" (mtime, size and inode), "hash" (content
+            hash) or None to never re-check them once parsed
+        :param render_cache: Cache of rendered forms: a RenderCache, or a
+            DiskRenderCache or RedisRenderCache shared by workers (optional)
+        :param fieldsets_template_path: Path to a template rendering only
+            the 'fieldsets' of a form. It's rendered once per form and
+            passed to the form template as 'fieldsets_html' (optional)
+        :param json_backend: JSON backend parsing form-data.json files:
+            "json", "orjson" or a JSONBackend. Defaults to the json module
+            (optional)
+        :param intern_fieldsets: Share identical fieldsets, fields and
+            options across the forms built by load_forms as a single
+            immutable object: arrays become tuples and objects read-only
+            dicts, in the parsed files too. Stats are returned by
+            interner.stats()
+        :param conditional_requests: Fold the content hashes of the forms
+            rendered during a request into its ETag, and answer matching
+            If-None-Match requests with a 304
+        :param definitions_url_prefix: URL prefix of a blueprint serving
+            the fieldsets and formData of each form as JSON, e.g. "/_forms"
+            (optional)
+        :param context_processors: Context processors run when rendering
+            forms, as functions or function names. If set, the form and
+            fieldsets templates are compiled once and rendered directly,
+            instead of with render_template and every context processor
+            (optional)
+        :param form_store: TieredFormStore holding the fieldsets and
+            formData of forms, so only recently used forms are kept parsed
+            in memory. Fieldsets aren't interned when it's set (optional)
+        :param cache_version: Version folded into the template hash of
+            render cache keys and ETags, e.g. a release ID, for template
+            changes the hash doesn't see, like dynamic includes (optional)
         """
+        if cache_validation not in ("stat", "hash", None):
+            raise ValueError(
+                f"Invalid cache_validation value: {cache_validation}"
+            )
+
         self.app = app
         self.form_template_path = form_template_path
+        self.fieldsets_template_path = fieldsets_template_path
         self.templates_folder = Path(app.root_path).parent / "templates"
-        self.form_metadata = {}
+        self._forms = FormSnapshot({}, {}, {})
+        self._write_lock = RLock()
+        self.cache_validation = cache_validation
+        self.json_backend = get_json_backend(json_backend)
+        self._form_json_cache = {}
+        self.render_cache = render_cache
+        self._prerendered = {}
+        # (include, exclude) of lazy loading, or None
+        self._lazy = None
+        # Form paths lazy loading found no form for, least recent first
+        self._missing_paths = OrderedDict()
+        self._missing_lock = Lock()
+        self._fieldsets_cache = {}
+        self._hooks = ()
+        self.form_store = form_store
+        if form_store is not None:
+            form_store.use_json_backend(self.json_backend)
+        # Interned values are kept by the interner, which would defeat the
+        # form store
+        self.interner = (
+            FormInterner(self.json_backend.dumps)
+            if intern_fieldsets and form_store is None
+            else None
+        )
+        self.context_processors = (
+            frozenset(context_processors)
+            if context_processors is not None
+            else None
+        )
+        # Compiled templates, keyed by template path
+        self._templates = {}
+
+        # Register Jinja functions so they can be accessed in templates
+        is_async = self.app.jinja_env.is_async
+        self.app.jinja_env.globals["load_form"] = (
+            self.load_form_async if is_async else self.load_form
+        )
+        self.app.jinja_env.globals["load_forms_batch"] = (
+            self.load_forms_batch_async if is_async else self.load_forms_batch
+        )
+        if not is_async:
+            # Async templates are rendered in full by generate()
+            self.app.jinja_env.globals["stream_form"] = self.stream_form
+
+        # Register the 'flask forms' commands
+        self.app.cli.add_command(create_cli(self))
+
+        self.conditional_requests = conditional_requests
+        self.cache_version = cache_version
+        self._template_hash = None
+        if conditional_requests:
+            self.app.after_request(self._add_form_etag)
+
+        # Compressed JSON definitions, keyed by form content hash
+        self._definitions = {}
+        self._entries_by_hash = (None, {})
+        if definitions_url_prefix is not None:
+            self.app.register_blueprint(
+                create_blueprint(self), url_prefix=definitions_url_prefix
+            )
+            self.app.jinja_env.globals["form_definition_url"] = (
+                self.form_definition_url
+            )
+
+    @property
+    def form_metadata(self) -> FormMetadata:
+        """
+        Metadata of every form path, from the current forms snapshot. It's
+        a read-only view of the form index.
+        """
+        forms = self._forms
+        return FormMetadata(forms.index, forms.metadata)
+
+    @form_metadata.setter
+    def form_metadata(self, form_metadata: dict):
+        """
+        Replaces the loaded forms with form paths whose entries are compiled
+        from their form-data.json file on first use.
+        """
+        with self._write_lock:
+            self._forms = FormSnapshot(
+                dict(form_metadata), {}, {}
+            ).compile_patterns()
+
+    @property
+    def form_index(self) -> dict:
+        """
+        FormEntry of every form path, from the current forms snapshot.
+        """
+        return self._forms.index
+
+    def add_hook(self, hook):
+        """
+        Adds a function called with the duration of each phase of loading
+        and rendering forms, as hook(phase, duration, **info).
+
+        Phases are "load_form" and "load_forms_batch" (whole calls),
+        "lookup", "load_json", "merge", "render_fieldsets" and "render"
+        within them, "discover" for paths loaded lazily, "cache_hit" and
+        "cache_miss" with a duration of 0, and "load_file" and "parse" for
+        form-data.json files. info has the
+        form_path, the batch count, or the file_path and parsed size.
+
+        :param hook: Callable, e.g. a FormStats instance
+        """
+        self._hooks = self._hooks + (hook,)
+
+    def remove_hook(self, hook):
+        """
+        Removes a function added with add_hook.
+        """
+        self._hooks = tuple(h for h in self._hooks if h is not hook)
+
+    def _is_timed(self) -> bool:
+        return bool(self._hooks) or bool(form_timed.receivers)
+
+    def _timed(self, phase: str, **info):
+        """
+        Returns a context manager reporting the duration of a phase, which
+        does nothing if there are no hooks or signal receivers.
+        """
+        if not self._hooks and not form_timed.receivers:
+            return _NOT_TIMED
+        return _Timer(self, phase, info)
+
+    def _emit(self, phase: str, duration: float, **info):
+        for hook in self._hooks:
+            hook(phase, duration, **info)
+        if form_timed.receivers:
+            form_timed.send(self, phase=phase, duration=duration, **info)
+
+    @contextmanager
+    def _update_forms(self):
+        """
+        Yields a copy of the forms snapshot to modify, then atomically
+        publishes it. Readers keep using the previous snapshot until then,
+        and nothing is published if an exception is raised.
+        """
+        with self._write_lock:
+            forms = self._forms.copy()
+            yield forms
+            self._forms = forms.compile_patterns()
+            self._retain_stored_forms()
+
+    def load_forms(
+        self,
+        include: list = None,
+        exclude: list = None,
+        workers: int = None,
+        executor: str = "thread",
+        manifest: Path = None,
+        lazy: bool = False,
+    ):
+        """
+        Finds all 'form-data.json' files within the 'templates' dir and
+        stores limited metadata.
+
+        :param include: Glob patterns the form-data.json path, relative to
+            the templates dir, must match (optional)
+        :param exclude: Glob patterns for directory names or relative paths
+            to skip, e.g. FormGenerator.DEFAULT_EXCLUDE (optional)
+        :param workers: Number of workers reading files concurrently
+            (optional)
+        :param executor: "thread" or "process" pool used when workers is set
+        :param manifest: Path to a form manifest to load forms from instead
+            of searching the 'templates' dir. If it doesn't exist yet, it's
+            written after the search (optional)
+        :param lazy: Don't search the 'templates' dir. The forms of a path
+            are loaded on first use, from the form-data.json files of the
+            directories matching its URL segments. include and exclude
+            still apply
+        """
+        if executor not in ("thread", "process"):
+            raise ValueError(f"Invalid executor value: {executor}")
+        if lazy and manifest is not None:
+            raise ValueError("lazy can't be used with a manifest")
+
+        self._fieldsets_cache.clear()
+        self._definitions.clear()
+        if self.interner is not None:
+            self.interner.clear()
+        self._clear_missing_paths()
+
+        self._lazy = (include or (), exclude or ()) if lazy else None
+        if lazy:
+            return
+
+        if manifest is not None:
+            manifest = Path(manifest)
+            sources = read_manifest(manifest, self.json_backend.loads)
+            if sources is not None:
+                self._load_manifest(manifest, sources)
+                return
+
+        file_paths = self._find_form_files(include, exclude)
+        forms_context = self._update_forms()
+        # Manifest sources of the files read, keyed by relative path
+        sources = {} if manifest is not None else None
+
+        if not workers:
+            pool_context = nullcontext()
+        elif executor == "process":
+            pool_context = ProcessPoolExecutor(max_workers=workers)
+        else:
+            pool_context = ThreadPoolExecutor(max_workers=workers)
+
+        with forms_context as forms, pool_context as pool:
+            readers = [
+                self._submit_read(pool, path, sources) for path in file_paths
+            ]
+
+            # Files are processed in path order, whatever order they are
+            # read in, so the resulting metadata is deterministic
+            for file_path, read in zip(file_paths, readers):
+                with self._timed("load_file", file_path=file_path):
+                    self._load_form_file(file_path, read, forms)
+
+            dropped_paths = self._drop_unseen_files(
+                {str(file_path) for file_path in file_paths}, forms
+            )
+
+        self._discard_prerendered(dropped_paths)
+        if manifest is not None:
+            write_manifest(manifest, sources)
+
+    def preload(self, warm: bool = False, **load_forms_kwargs):
+        """
+        Builds the form index in the master process before workers are
+        forked, e.g. with gunicorn's preload_app, so all workers share it.
+
+        The loaded objects are moved to the permanent GC generation, so the
+        garbage collector in workers doesn't write to (and copy) the shared
+        memory pages. Reference counts are still updated when forms are
+        rendered, so the pages of the forms a worker renders are copied
+        into it.
+
+        :param warm: Pre-render the default variant of every form into the
+            render cache
+        :param load_forms_kwargs: Arguments passed to load_forms
+        """
+        self.load_forms(**load_forms_kwargs)
+        if self.context_processors is not None:
+            self.compile_templates()
+        if warm:
+            self.warm()
+
+        gc_collect()
+        gc_freeze()
+
+    def save_manifest(self, manifest_path: Path):
+        """
+        Writes a manifest of every loaded form-data.json file, with its
+        mtime, size, content hash and parsed contents.
+
+        :param manifest_path: Path of the manifest file
+        """
+        sources = {}
+        for key in sorted(self._forms.file_paths):
+            file_path = Path(key)
+            with open(file_path, "rb") as form_json:
+                raw = form_json.read()
+            sources[self._manifest_key(file_path)] = build_manifest_source(
+                file_path, raw, self.json_backend.loads(raw)
+            )
+
+        write_manifest(Path(manifest_path), sources)
+
+    def _manifest_key(self, file_path: Path) -> str:
+        """
+        Returns the manifest key of a form-data.json file: its path relative
+        to the 'templates' dir.
+        """
+        try:
+            relative_path = file_path.relative_to(self.templates_folder)
+        except ValueError:
+            relative_path = file_path
+        return relative_path.as_posix()
+
+    def _load_manifest(self, manifest_path: Path, sources: dict):
+        """
+        Loads forms from manifest sources. Only files whose content hash
+        changed since the manifest was written are parsed again, and the
+        manifest is rewritten if any file changed or was removed.
+        """
+        with self._update_forms() as forms:
+            stale, sources = self._load_manifest_sources(sources, forms)
+            dropped_paths = self._drop_unseen_files(
+                {str(self.templates_folder / key) for key in sources}, forms
+            )
+
+        self._discard_prerendered(dropped_paths)
+
+        if stale:
+            try:
+                write_manifest(manifest_path, sources)
+            except OSError as e:
+                self.app.logger.warning(
+                    f"Unable to update form manifest {manifest_path}: {e}"
+                )
+
+    def _load_manifest_sources(self, sources: dict, forms: FormSnapshot):
+        """
+        Loads the forms of manifest sources into a forms snapshot.
+
+        :return: (stale, sources) where stale is whether any file changed or
+            was removed, and sources are the updated manifest sources, built
+            from the files read
+        """
+        stale = False
+        updated_sources = {}
+
+        for relative_path in sorted(sources):
+            source = sources[relative_path]
+            file_path = self.templates_folder / relative_path
+            stat_signature = _stat_signature(file_path)
+            if stat_signature is None:
+                # The file has been removed
+                stale = True
+                continue
+
+            raw = None
+            content_hash = source["sha256"]
+            if stat_signature[1:] != (source["size"], source["mtime_ns"]):
+                stale = True
+                with open(file_path, "rb") as form_json:
+                    raw = form_json.read()
+                content_hash = sha256(raw).hexdigest()
+                if content_hash == source["sha256"]:
+                    # Only its mtime changed
+                    raw = None
+                    source = dict(
+                        source,
+                        size=stat_signature[1],
+                        mtime_ns=stat_signature[2],
+                    )
+
+            def read():
+                if raw is None:
+                    data = source["data"]
+                    updated_sources[relative_path] = source
+                else:
+                    data = self.json_backend.loads(raw)
+                    updated_sources[relative_path] = build_manifest_source(
+                        file_path, raw, data
+                    )
+                self._cache_form_file(
+                    file_path,
+                    (
+                        content_hash
+                        if self.cache_validation == "hash"
+                        else stat_signature
+                    ),
+                    data,
+                )
+                return data
+
+            with self._timed("load_file", file_path=file_path):
+                self._load_form_file(file_path, read, forms)
+
+        return stale, updated_sources
+
+    def _submit_read(self, pool, file_path: Path, sources: dict = None):
+        """
+        Starts reading a form-data.json file in the pool (if any), returning
+        a function that returns its parsed contents.
+
+        :param sources: Manifest sources to add the file to, from the bytes
+            read, so it isn't read again to write the manifest (optional)
+        """
+        if sources is not None:
+            args = (file_path, self.cache_validation, self.json_backend.loads)
+            if pool is None:
+                result = partial(_read_manifest_source, *args)
+            else:
+                result = pool.submit(_read_manifest_source, *args).result
+
+            def read():
+                signature, data, source = result()
+                self._cache_form_file(file_path, signature, data)
+                sources[self._manifest_key(file_path)] = source
+                return data
+
+            return read
+
+        if pool is None:
+            return lambda: self._read_form_file(file_path)
+
+        if isinstance(pool, ThreadPoolExecutor):
+            return pool.submit(self._read_form_file, file_path).result
+
+        cached = self._form_json_cache.get(str(file_path))
+        if cached is not None and cached[1] is None:
+            # The parsed contents weren't kept, so parse it again
+            cached = None
+        future = pool.submit(
+            _parse_form_file,
+            file_path,
+            self.cache_validation,
+            cached[0] if cached is not None else None,
+            self.json_backend.loads,
+        )
+
+        def read():
+            signature, data = future.result()
+            if data is None:
+                return cached[1]
+            self._cache_form_file(file_path, signature, data)
+            return data
+
+        return read
+
+    def _find_form_files(self, include: list, exclude: list) -> list:
+        """
+        Returns the sorted paths of the 'form-data.json' files within the
+        'templates' dir, pruning excluded directories from the search.
+        """
+        if not include and not exclude:
+            return sorted(self.templates_folder.rglob("form-data.json"))
+
+        include = include or ()
+        exclude = exclude or ()
+        file_paths = []
+
+        for root, dirs, files in walk(self.templates_folder):
+            root_path = Path(root)
+            relative_root = root_path.relative_to(self.templates_folder)
+
+            dirs[:] = [
+                name
+                for name in dirs
+                if not self._matches(
+                    exclude, name, (relative_root / name).as_posix()
+                )
+            ]
+
+            if "form-data.json" not in files:
+                continue
+
+            relative_path = (relative_root / "form-data.json").as_posix()
+            if include and not self._matches(include, relative_path):
+                continue
+            if self._matches(exclude, relative_path):
+                continue
+
+            file_paths.append(root_path / "form-data.json")
+
+        return sorted(file_paths)
+
+    def _candidate_files(self, form_path: str) -> list:
+        """
+        Returns the form-data.json files that can define a form path: the
+        ones in the directories matching its URL segments, deepest first,
+        down to the 'templates' dir, as templatePath folders are laid out.
+        """
+        include, exclude = self._lazy
+        directory = self.templates_folder
+        relative_directory = Path()
+        directories = [(directory, relative_directory)]
+        for segment in split_path(form_path):
+            if segment in ("", ".", "..") or "\\" in segment:
+                break
+            if self._matches(exclude, segment):
+                break
+            directory = directory / segment
+            relative_directory = relative_directory / segment
+            if not directory.is_dir():
+                break
+            directories.append((directory, relative_directory))
+
+        file_paths = []
+        for directory, relative_directory in reversed(directories):
+            relative_path = (relative_directory / "form-data.json").as_posix()
+            if include and not self._matches(include, relative_path):
+                continue
+            if self._matches(exclude, relative_path):
+                continue
+            file_paths.append(directory / "form-data.json")
+        return file_paths
+
+    def _discover(self, form_path: str) -> bool:
+        """
+        Loads the form-data.json files that can define a form path and
+        weren't loaded yet, until one of them does. Paths no file defines,
+        though a childrenPaths pattern may match them, are remembered, up
+        to MAX_MISSING_PATHS.
+
+        :return: Whether the path has its own form
+        """
+        with self._missing_lock:
+            if form_path in self._missing_paths:
+                self._missing_paths.move_to_end(form_path)
+                return False
+
+        with self._timed("discover", form_path=form_path):
+            for file_path in self._candidate_files(form_path):
+                key = str(file_path)
+                if key in self._forms.file_paths or not file_path.is_file():
+                    continue
+
+                with self._update_forms() as forms:
+                    # Another thread may have loaded it meanwhile
+                    if key not in forms.file_paths:
+                        with self._timed("load_file", file_path=file_path):
+                            self._load_form_file(
+                                file_path,
+                                lambda: self._read_form_file(file_path),
+                                forms,
+                            )
+
+                forms = self._forms
+                if form_path in forms.metadata or form_path in forms.index:
+                    return True
+
+        with self._missing_lock:
+            self._missing_paths[form_path] = True
+            while len(self._missing_paths) > self.MAX_MISSING_PATHS:
+                self._missing_paths.popitem(last=False)
+        return False
+
+    def _clear_missing_paths(self):
+        with self._missing_lock:
+            self._missing_paths.clear()
+
+    @staticmethod
+    def _matches(patterns: list, *names: str) -> bool:
+        """
+        Checks if any of the names match any of the glob patterns.
+        """
+        return any(
+            fnmatch(name, pattern) for pattern in patterns for name in names
+        )
+
+    def _load_form_file(self, file_path: Path, read, forms: FormSnapshot):
+        """
+        Stores the metadata and form index entries of a form-data.json file
+        in a forms snapshot.
+
+        :param read: Function returning the parsed contents of the file
+        """
+        try:
+            data = read()
+            if "form" not in data:
+                abort(
+                    400,
+                    description=(
+                        "The JSON should have a 'form' key containing"
+                        f" the form data: {file_path}"
+                    ),
+                )
+            else:
+                self._index_forms(file_path, data["form"], forms)
+        except HTTPException:
+            raise
+        except (
+            JSONDecodeError,
+            FileNotFoundError,
+        ) as e:
+            abort(
+                500,
+                description=(
+                    f"Error processing form data from {file_path}: {str(e)}"
+                ),
+            )
+        except Exception as e:
+            abort(
+                500,
+                description=(
+                    f"Error processing form data from {file_path}: {str(e)}"
+                ),
+            )
+
+    def _store_metadata(
+        self, file_path: Path, forms_data: dict, forms: FormSnapshot = None
+    ):
+        """
+        Stores metadata ('file_path' and 'template') about forms under their
+        respective paths. The metadata is read from the form index, so this
+        compiles the forms.
+
+        :param forms: Forms snapshot to update, or None to publish a new one
+        """
+        self._index_forms(file_path, forms_data, forms)
+
+    def _index_forms(
+        self, file_path: Path, forms_data: dict, forms: FormSnapshot = None
+    ):
+        """
+        Compiles the forms of a form-data.json file into the form index,
+        replacing the entries previously compiled from it.
+
+        :param forms: Forms snapshot to update, or None to publish a new one
+        """
+        if forms is None:
+            with self._update_forms() as forms:
+                return self._index_forms(file_path, forms_data, forms)
+
+        paths = []
+        entries = {}
+        for path, form in forms_data.items():
+            paths.append(path)
+            if self.interner is not None and form.get("fieldsets"):
+                # Replace them in the parsed file too, so the duplicates
+                # can be freed
+                form["fieldsets"] = self.interner.intern(form["fieldsets"])
+
+            entry = self._compile_entry(
+                path,
+                file_path,
+                self._remove_file_extension(form["templatePath"]),
+                form,
+                forms_data,
+                content_hash=self._hash_form(form),
+            )
+            entry = entries[path] = self._stash_entry(entry)
+
+            for child_path in form.get("childrenPaths", []):
+                processed_path = self._process_child_path(child_path)
+                paths.append(processed_path)
+                entries[processed_path] = entry._replace(
+                    path=processed_path, parent_path=path
+                )
+
+        key = str(file_path)
+        self._drop_paths(
+            file_path,
+            [
+                path
+                for path in forms.file_paths.get(key, ())
+                if path not in entries
+            ],
+            forms,
+        )
+
+        if forms.metadata:
+            # Compiled entries replace the metadata set directly
+            for path in entries:
+                forms.metadata.pop(path, None)
+        forms.index.update(entries)
+        forms.file_paths[key] = tuple(paths)
+
+    @staticmethod
+    def _drop_paths(file_path: Path, paths: list, forms: FormSnapshot):
+        """
+        Removes paths from a forms snapshot, unless another form-data.json
+        file has since registered them.
+        """
+        key = str(file_path)
+        for path in paths:
+            form_info = forms.metadata.get(path)
+            if form_info is not None and str(form_info["file_path"]) == key:
+                del forms.metadata[path]
+
+            entry = forms.index.get(path)
+            if entry is not None and str(entry.file_path) == key:
+                del forms.index[path]
+
+    def _drop_unseen_files(self, seen: set, forms: FormSnapshot) -> tuple:
+        """
+        Removes the paths of the form-data.json files a full load didn't
+        find, e.g. files deleted since the previous load, from a forms
+        snapshot.
+
+        :param seen: Keys of the form-data.json files loaded
+        :return: The removed paths
+        """
+        dropped_paths = ()
+        for key in sorted(set(forms.file_paths) - seen):
+            paths = forms.file_paths.pop(key)
+            self._form_json_cache.pop(key, None)
+            self._drop_paths(Path(key), paths, forms)
+            dropped_paths += paths
+        return dropped_paths
+
+    def reload_file(self, file_path: Path):
+        """
+        Re-reads a single form-data.json file and atomically publishes its
+        forms, removing the paths and childrenPaths it no longer defines.
+
+        :param file_path: Path to the form-data.json file
+        """
+        file_path = Path(file_path)
+        self._form_json_cache.pop(str(file_path), None)
+        # The file may define paths that were missing
+        self._clear_missing_paths()
+
+        with self._update_forms() as forms:
+            previous_paths = forms.file_paths.get(str(file_path), ())
+            self._load_form_file(
+                file_path, lambda: self._read_form_file(file_path), forms
+            )
+            self._rebuild_interner(forms)
+
+        self._discard_prerendered(
+            previous_paths + forms.file_paths.get(str(file_path), ())
+        )
+
+    def _rebuild_interner(self, forms: FormSnapshot):
+        """
+        Drops the interned subtrees no form of a snapshot uses anymore.
+        """
+        if self.interner is None:
+            return
+
+        fieldsets = {
+            id(entry.fieldsets): entry.fieldsets
+            for entry in forms.index.values()
+            if entry.fieldsets
+        }
+        self.interner.rebuild(fieldsets.values())
+
+    def remove_file(self, file_path: Path):
+        """
+        Atomically removes every path defined by a form-data.json file.
+
+        :param file_path: Path to the form-data.json file
+        """
+        file_path = Path(file_path)
+        key = str(file_path)
+        self._form_json_cache.pop(key, None)
+
+        with self._update_forms() as forms:
+            previous_paths = forms.file_paths.pop(key, ())
+            self._drop_paths(file_path, previous_paths, forms)
+            self._rebuild_interner(forms)
+
+        self._discard_prerendered(previous_paths)
+
+    @staticmethod
+    def _compile_entry(
+        path: str,
+        file_path: Path,
+        template: str,
+        form: dict,
+        source: dict,
+        parent_path: str = None,
+        content_hash: str = None,
+    ) -> FormEntry:
+        """
+        Builds the FormEntry for a path from its form JSON.
+        """
+        form_data = form.get("formData")
+        return FormEntry(
+            path=path,
+            file_path=file_path,
+            template=template,
+            fieldsets=form.get("fieldsets"),
+            form_data=(
+                MappingProxyType(form_data) if form_data else EMPTY_FORM_DATA
+            ),
+            is_modal=form.get("isModal"),
+            modal_id=form.get("modalId"),
+            parent_path=parent_path,
+            source=source,
+            content_hash=content_hash,
+        )
+
+    def _hash_form(self, form: dict) -> str:
+        """
+        Returns the content hash of a form JSON, computed over its
+        canonical JSON so it doesn't depend on the JSON backend.
+        """
+        try:
+            return sha256(dumps_canonical(form)).hexdigest()
+        except (TypeError, ValueError):
+            return None
+
+    def _get_form_entry(
+        self, form_path: str, loaded_files: dict = None
+    ) -> FormEntry:
+        """
+        Returns the compiled form for a path. Unless cache_validation is
+        None, the entry is recompiled if its form-data.json has changed.
+
+        :param loaded_files: Forms of the form-data.json files already
+            checked by the caller, keyed by file path. Files checked by this
+            call are added to it (optional)
+        """
+        entry = self._find_form_entry(form_path, loaded_files)
+        if self.form_store is None:
+            return entry
+        return self._load_stored_form(entry)
+
+    def _find_form_entry(
+        self, form_path: str, loaded_files: dict = None
+    ) -> FormEntry:
+        """
+        Returns the index entry of a path, which has no fieldsets or
+        formData if they are in the form store.
+        """
+        # Read a single snapshot, so parent and child entries are consistent
+        forms = self._forms
+        entry = forms.index.get(form_path)
+        if entry is not None and self.cache_validation is None:
+            return entry
+
+        form_info = (
+            entry.metadata
+            if entry is not None
+            else forms.metadata.get(form_path)
+        )
+        if form_info is None:
+            if self._lazy is not None:
+                # Files that can define the path exactly are loaded before
+                # patterns are tried
+                if self._discover(form_path):
+                    return self._find_form_entry(form_path, loaded_files)
+                forms = self._forms
+            pattern = forms.match(form_path)
+            if pattern is not None:
+                # Exact paths take precedence, so patterns are only tried
+                # for paths without their own form
+                return self._find_form_entry(pattern, loaded_files)
+            abort(
+                404,
+                description=f"Form metadata not found for path: {form_path}",
+            )
+
+        file_key = str(form_info["file_path"])
+        loaded_form_json = (
+            loaded_files.get(file_key) if loaded_files is not None else None
+        )
+        if loaded_form_json is None:
+            with self._timed("load_json", form_path=form_path):
+                # With a form store, parsed files aren't kept, so entries
+                # without a source are current if their file is unchanged
+                loaded_form_json = self._load_form_json(
+                    form_info["file_path"],
+                    if_changed=self.form_store is not None,
+                )
+            if loaded_files is not None and loaded_form_json is not None:
+                loaded_files[file_key] = loaded_form_json
+        if entry is not None and entry.source is loaded_form_json:
+            return entry
+        if loaded_form_json is None:
+            loaded_form_json = self._load_form_json(form_info["file_path"])
+
+        if entry is not None and file_key in forms.file_paths:
+            # The file has changed since it was indexed. form_info is from
+            # the previous version, so look the path up again in the new
+            # snapshot, as the file may not define it anymore
+            with self._update_forms() as forms:
+                self._load_form_file(
+                    form_info["file_path"],
+                    lambda: {"form": loaded_form_json},
+                    forms,
+                )
+            entry = forms.index.get(form_path)
+            if entry is not None:
+                return entry
+            return self._find_form_entry(form_path, loaded_files)
+
+        # Use parent_path for child forms, otherwise use form_path
+        lookup_path = form_info.get("parent_path", form_path)
+        form_json = loaded_form_json.get(lookup_path)
+        if not form_json:
+            abort(
+                404, description=f"Form data not found for path: {lookup_path}"
+            )
+
+        entry = self._compile_entry(
+            form_path,
+            form_info["file_path"],
+            form_info["template"],
+            form_json,
+            loaded_form_json,
+            parent_path=form_info.get("parent_path"),
+            content_hash=self._hash_form(form_json),
+        )
+        with self._update_forms() as forms:
+            # Stored while publishing, so the form isn't dropped meanwhile
+            entry = self._stash_entry(entry)
+            # Unless the path was removed meanwhile
+            if forms.metadata.pop(form_path, None) is not None or (
+                form_path in forms.index
+            ):
+                forms.index[form_path] = entry
+        return entry
+
+    def _stash_entry(self, entry: FormEntry) -> FormEntry:
+        """
+        Moves the fieldsets and formData of an entry to the form store, if
+        any, returning the entry without them.
+        """
+        if self.form_store is None or entry.content_hash is None:
+            return entry
+
+        self.form_store.put(
+            entry.content_hash,
+            {"fieldsets": entry.fieldsets, "formData": dict(entry.form_data)},
+        )
+        return entry._replace(
+            fieldsets=None, form_data=EMPTY_FORM_DATA, source=None
+        )
+
+    def _load_stored_form(self, entry: FormEntry) -> FormEntry:
+        """
+        Returns an index entry with its fieldsets and formData from the
+        form store.
+        """
+        if entry.source is not None or entry.content_hash is None:
+            return entry
+
+        form = self.form_store.get(entry.content_hash)
+        if form is None:
+            # The entry is from a previous snapshot, whose forms were
+            # dropped from the store once a new one was published
+            return self._recompile_entry(entry)
+        form_data = form.get("formData")
+        return entry._replace(
+            fieldsets=form.get("fieldsets"),
+            form_data=(
+                MappingProxyType(form_data) if form_data else EMPTY_FORM_DATA
+            ),
+        )
+
+    def _recompile_entry(self, entry: FormEntry) -> FormEntry:
+        """
+        Compiles the entry of a path again from its form-data.json file.
+        """
+        forms_json = self._load_form_json(entry.file_path)
+        lookup_path = entry.parent_path or entry.path
+        form_json = forms_json.get(lookup_path)
+        if not form_json:
+            abort(
+                404, description=f"Form data not found for path: {lookup_path}"
+            )
+
+        return self._compile_entry(
+            entry.path,
+            entry.file_path,
+            entry.template,
+            form_json,
+            forms_json,
+            parent_path=entry.parent_path,
+            content_hash=self._hash_form(form_json),
+        )
+
+    def _retain_stored_forms(self):
+        """
+        Drops the stored forms no index entry uses anymore.
+        """
+        if self.form_store is not None:
+            self.form_store.retain(
+                entry.content_hash for entry in self._forms.index.values()
+            )
+
+    def load_form(
+        self,
+        form_path: Path,
+        formId: int = None,
+        isModal: bool = None,
+        title: str = None,
+        introText: str = None,
+        returnUrl: str = None,
+        lpUrl: str = None,
+        lpId: int = None,
+        product: str = None,
+    ) -> str:
+        """
+        Jinja function that returns an HTML string form.
+
+        :param form_path: The path to the parent form
+        :param formId: Marketo ID for the form (optional)
+        :param isModal: boolean to determine if form is a modal (optional)
+        :param title: Title of form (optional)
+        :param introText: Form description (optional)
+        :param returnUrl: Return URL on form submission (optional)
+        :param lpUrl: Landing page URL (optional)
+        :param lpId: Landing page ID (optional)
+        :param product: Product name (optional)
+        :return: HTML form
+        :usage: {{ load_form('/aws', title='Talk to our experts',
+            returnUrl='/contact#contact-form-success') }}
+        """
+        overrides = (title, introText, returnUrl, lpUrl, lpId, product)
+        with self._timed("load_form", form_path=form_path):
+            html = self._load_form(form_path, formId, isModal, overrides)
+
+        if self.conditional_requests:
+            self._record_forms((form_path,))
+        return html
+
+    def _load_form(
+        self, form_path: str, formId: int, isModal: bool, overrides: tuple
+    ) -> str:
+        html = self._get_prerendered_form(
+            form_path, formId, isModal, overrides
+        )
+        if html is not None:
+            return html
+
+        with self._timed("lookup", form_path=form_path):
+            entry = self._get_form_entry(form_path)
+
+        with self._rendering(form_path):
+            html, cache_key, context = self._prepare(
+                entry, form_path, formId, isModal, overrides
+            )
+            if html is not None:
+                return html
+            return self._render_form(
+                form_path, entry, cache_key, context, self._render
+            )
+
+    def _prepare(
+        self,
+        entry: FormEntry,
+        form_path: str,
+        formId: int,
+        isModal: bool,
+        overrides: tuple,
+        cached: tuple = None,
+    ) -> tuple:
+        """
+        Looks up a form in the render cache, or builds its template context.
+
+        :param cached: (cache_key, html) of the form, if the caller already
+            looked it up in the render cache (optional)
+        :return: (html, cache_key, context) where html is the cached form,
+            or None if it has to be rendered with context
+        """
+        cache_key, html = cached or self._get_cached_form(
+            entry, form_path, formId, isModal, overrides
+        )
+        if html is not None:
+            return html, cache_key, None
+
+        with self._timed("merge", form_path=form_path):
+            context = self._template_context(
+                entry, form_path, formId, isModal, overrides
+            )
+        return None, cache_key, context
+
+    def _render_form(
+        self,
+        form_path: str,
+        entry: FormEntry,
+        cache_key: tuple,
+        context: dict,
+        render,
+    ) -> str:
+        """
+        Renders a prepared form, adding it to the render cache.
+
+        :param render: Function rendering a template path with a context
+        """
+        if self.fieldsets_template_path is not None:
+            context["fieldsets_html"] = self._fieldsets_html(
+                form_path, entry, render
+            )
+
+        with self._timed("render", form_path=form_path):
+            html = render(self.form_template_path, context)
+
+        if cache_key is not None:
+            self.render_cache.set(cache_key, html)
+        return html
+
+    async def _render_form_async(
+        self,
+        form_path: str,
+        entry: FormEntry,
+        cache_key: tuple,
+        context: dict,
+    ) -> str:
+        """
+        Async version of _render_form, rendering with _render_async.
+        """
+        if self.fieldsets_template_path is not None:
+            html, key = self._get_fieldsets_html(entry)
+            if html is None:
+                with self._timed("render_fieldsets", form_path=form_path):
+                    html = self._cache_fieldsets_html(
+                        entry,
+                        key,
+                        await self._render_async(
+                            self.fieldsets_template_path,
+                            {"fieldsets": entry.fieldsets},
+                        ),
+                    )
+            context["fieldsets_html"] = html
+
+        with self._timed("render", form_path=form_path):
+            html = await self._render_async(self.form_template_path, context)
+
+        if cache_key is not None:
+            await self.render_cache.set_async(cache_key, html)
+        return html
+
+    def _fieldsets_html(
+        self, form_path: str, entry: FormEntry, render
+    ) -> Markup:
+        """
+        Returns the rendered fieldsets of a form, rendering them with
+        render(template_path, context) if they aren't cached yet.
+        """
+        html, key = self._get_fieldsets_html(entry)
+        if html is None:
+            with self._timed("render_fieldsets", form_path=form_path):
+                html = self._cache_fieldsets_html(
+                    entry,
+                    key,
+                    render(
+                        self.fieldsets_template_path,
+                        {"fieldsets": entry.fieldsets},
+                    ),
+                )
+        return html
+
+    @contextmanager
+    def _rendering(self, form_path: str):
+        """
+        Turns errors raised while rendering a form into a 500.
+        """
+        try:
+            yield
+        except Exception as e:
+            abort(
+                500,
+                f"Error rendering template for {form_path}: {str(e)}",
+            )
+
+    def stream_form(
+        self,
+        form_path: Path,
+        formId: int = None,
+        isModal: bool = None,
+        title: str = None,
+        introText: str = None,
+        returnUrl: str = None,
+        lpUrl: str = None,
+        lpId: int = None,
+        product: str = None,
+    ) -> Iterator[str]:
+        """
+        Jinja function that returns an HTML form as an iterator of chunks,
+        generated as they are consumed, e.g. by a page rendered with
+        stream_template. Takes the same parameters as load_form.
+
+        The form is looked up when it's called, so unknown paths abort
+        before anything is streamed. Prerendered and cached forms are
+        returned as a single chunk, and a form streamed to the end is added
+        to the render cache.
+
+        :return: Iterator of HTML chunks
+        :usage: {% for chunk in stream_form('/aws') %}{{ chunk }}{% endfor %}
+        """
+        overrides = (title, introText, returnUrl, lpUrl, lpId, product)
+        with self._timed("load_form", form_path=form_path):
+            chunks = self._stream_form(form_path, formId, isModal, overrides)
+
+        if self.conditional_requests:
+            self._record_forms((form_path,))
+        return chunks
+
+    def _stream_form(
+        self, form_path: str, formId: int, isModal: bool, overrides: tuple
+    ) -> Iterator[str]:
+        html = self._get_prerendered_form(
+            form_path, formId, isModal, overrides
+        )
+        if html is not None:
+            return iter((html,))
+
+        with self._timed("lookup", form_path=form_path):
+            entry = self._get_form_entry(form_path)
+
+        with self._rendering(form_path):
+            html, cache_key, context = self._prepare(
+                entry, form_path, formId, isModal, overrides
+            )
+            if html is not None:
+                return iter((html,))
+
+            if self.fieldsets_template_path is not None:
+                context["fieldsets_html"] = self._fieldsets_html(
+                    form_path, entry, self._render
+                )
+            chunks = self._stream(self.form_template_path, context)
 
-        # Register Jinja function so it can be accessed in templates
-        self.app.jinja_env.globals["load_form"] = self.load_form
+        if cache_key is None:
+            return chunks
+        return self._cache_stream(cache_key, chunks)
 
-    def load_forms(self):
+    def _cache_stream(self, cache_key: tuple, chunks) -> Iterator[str]:
         """
-        Finds all 'form-data.json' files within the 'templates' dir and
-        stores limited metadata.
+        Yields the chunks of a form, then adds it to the render cache if it
+        was streamed to the end.
         """
-        for file_path in self.templates_folder.rglob("form-data.json"):
-            try:
-                with open(file_path) as forms_json:
-                    data = json_load(forms_json)
-                    if "form" not in data:
-                        abort(
-                            400,
-                            description=(
-                                "The JSON should have a 'form' key containing"
-                                f" the form data: {file_path}"
-                            ),
-                        )
-                    else:
-                        self._store_metadata(file_path, data["form"])
-            except HTTPException:
-                raise
-            except (
-                JSONDecodeError,
-                FileNotFoundError,
-            ) as e:
-                abort(
-                    500,
-                    description=(
-                        "Error processing form data from "
-                        f"{file_path}: {str(e)}"
-                    ),
-                )
-            except Exception as e:
-                abort(
-                    500,
-                    description=(
-                        "Error processing form data from "
-                        f"{file_path}: {str(e)}"
-                    ),
-                )
+        streamed = []
+        for chunk in chunks:
+            streamed.append(chunk)
+            yield chunk
+        self.render_cache.set(cache_key, "".join(streamed))
 
-    def _store_metadata(self, file_path: Path, forms_data: dict):
+    def _stream(self, template_path: str, context: dict) -> Iterator[str]:
         """
-        Stores metadata ('file_path' and 'template') about forms under their
-        respective paths.
+        Streams a template with stream_template, or directly from its
+        compiled version with the allowed context processors.
         """
-        for path, form in forms_data.items():
-            self.form_metadata[path] = {
-                "file_path": file_path,
-                "template": self._remove_file_extension(form["templatePath"]),
-            }
-
-            for child_path in form.get("childrenPaths", []):
-                processed_path = self._process_child_path(child_path)
-                self.form_metadata[processed_path] = {
-                    "file_path": file_path,
-                    "template": self._remove_file_extension(
-                        form["templatePath"]
-                    ),
-                    "is_child": True,
-                    "parent_path": path,
-                }
+        if self.context_processors is None:
+            chunks = stream_template(template_path, **context)
+        else:
+            chunks = self._get_template(template_path).generate(
+                self._base_context(), **context
+            )
+        return _buffer_chunks(chunks)
 
-    def load_form(
+    async def load_form_async(
         self,
         form_path: Path,
         formId: int = None,
@@ -96,80 +1382,714 @@ class FormGenerator:
         product: str = None,
     ) -> str:
         """
-        Jinja function that returns an HTML string form.
+        Async version of load_form, registered as the 'load_form' Jinja
+        function when the app's Jinja environment has enable_async set.
 
-        :param form_path: The path to the parent form
-        :param formId: Marketo ID for the form (optional)
-        :param isModal: boolean to determine if form is a modal (optional)
-        :param title: Title of form (optional)
-        :param introText: Form description (optional)
-        :param returnUrl: Return URL on form submission (optional)
-        :param lpUrl: Landing page URL (optional)
-        :param lpId: Landing page ID (optional)
-        :param product: Product name (optional)
-        :return: HTML form
-        :usage: {{ load_form('/aws', title='Talk to our experts',
-            returnUrl='/contact#contact-form-success') }}
+        Checking and reading form-data.json files is done in a thread, and
+        the form template is rendered with render_async, so the event loop
+        isn't blocked. Takes the same parameters as load_form.
         """
-        form_info = self.form_metadata.get(form_path)
-        if form_info is None:
-            abort(
-                404,
-                description=f"Form metadata not found for path: {form_path}",
+        overrides = (title, introText, returnUrl, lpUrl, lpId, product)
+        with self._timed("load_form", form_path=form_path):
+            html = await self._load_form_async(
+                form_path, formId, isModal, overrides
             )
 
-        is_child = form_info.get("is_child", False)
+        if self.conditional_requests:
+            self._record_forms((form_path,))
+        return html
 
-        # Use parent_path for child forms, otherwise use form_path
-        lookup_path = form_info.get("parent_path", form_path)
-        loaded_form_json = self._load_form_json(form_info["file_path"])
-        form_json = loaded_form_json.get(lookup_path)
-        if not form_json:
-            abort(
-                404, description=f"Form data not found for path: {lookup_path}"
+    async def _load_form_async(
+        self, form_path: str, formId: int, isModal: bool, overrides: tuple
+    ) -> str:
+        html = self._get_prerendered_form(
+            form_path, formId, isModal, overrides
+        )
+        if html is not None:
+            return html
+
+        with self._timed("lookup", form_path=form_path):
+            entry = self._forms.index.get(form_path)
+            if entry is None or self.cache_validation is not None:
+                entry = await to_thread(self._get_form_entry, form_path)
+            elif self.form_store is not None:
+                entry = self._load_stored_form(entry)
+
+        with self._rendering(form_path):
+            cached = await self._get_cached_form_async(
+                entry, form_path, formId, isModal, overrides
+            )
+            html, cache_key, context = self._prepare(
+                entry, form_path, formId, isModal, overrides, cached
+            )
+            if html is not None:
+                return html
+            return await self._render_form_async(
+                form_path, entry, cache_key, context
             )
 
-        try:
-            is_modal = form_json.get("isModal") if isModal is None else isModal
-
-            # Start with the base formData from JSON
-            form_data = form_json.get("formData", {}).copy()
-
-            # Override with provided parameters if they are not None
-            for key, value in [
-                ("title", title),
-                ("introText", introText),
-                ("returnUrl", returnUrl),
-                ("lpUrl", lpUrl),
-                ("lpId", lpId),
-                ("product", product),
-            ]:
-                if value is not None:
-                    form_data[key] = value
-
-            return render_template(
+    async def _render_async(self, template_path: str, context: dict) -> str:
+        """
+        Renders a template without blocking the event loop if the Jinja
+        environment is async.
+        """
+        template = self._get_template(template_path)
+        context = {**self._base_context(), **context}
+        if self.app.jinja_env.is_async:
+            return await template.render_async(context)
+        return template.render(context)
+
+    def _render(self, template_path: str, context: dict) -> str:
+        """
+        Renders a template with render_template, or directly with its
+        compiled version and the allowed context processors.
+        """
+        if self.context_processors is None:
+            return render_template(template_path, **context)
+        return self._get_template(template_path).render(
+            self._base_context(), **context
+        )
+
+    def _get_template(self, template_path: str):
+        """
+        Returns a template. If context_processors is set, it's compiled on
+        first use and only looked up again if the Jinja environment
+        auto-reloads templates, e.g. in debug mode, and it has changed.
+        """
+        jinja_env = self.app.jinja_env
+        if self.context_processors is None:
+            return jinja_env.get_or_select_template(template_path)
+
+        template = self._templates.get(template_path)
+        if template is None or (
+            jinja_env.auto_reload and not template.is_up_to_date
+        ):
+            template = self._templates[template_path] = jinja_env.get_template(
+                template_path
+            )
+        return template
+
+    def _base_context(self) -> dict:
+        """
+        Returns the context added by context processors: all of them with
+        render_template, or only the allowed ones.
+        """
+        context = {}
+        if self.context_processors is None:
+            self.app.update_template_context(context)
+            return context
+
+        if not self.context_processors:
+            return context
+
+        names = (None,)
+        if has_request_context():
+            names += tuple(reversed(request.blueprints))
+        for name in names:
+            for processor in self.app.template_context_processors.get(
+                name, ()
+            ):
+                if (
+                    processor in self.context_processors
+                    or getattr(processor, "__name__", None)
+                    in self.context_processors
+                ):
+                    context.update(processor())
+        return context
+
+    def compile_templates(self):
+        """
+        Compiles the form and fieldsets templates, e.g. before workers are
+        forked, instead of on first use. Requires context_processors.
+        """
+        if self.context_processors is None:
+            raise ValueError("compile_templates() requires context_processors")
+
+        for template_path in (
+            self.form_template_path,
+            self.fieldsets_template_path,
+        ):
+            if template_path is not None:
+                self._get_template(template_path)
+
+    def load_forms_batch(self, forms: list) -> list:
+        """
+        Jinja function that returns several HTML forms, e.g. the inline
+        forms and modals of a page, in one pass. Each form-data.json file is
+        checked at most once, and the form template is loaded and the
+        template context processors are run once for the whole batch.
+
+        :param forms: Form paths, or dicts of load_form parameters
+        :return: HTML forms, in the same order
+        :usage: {% set contact, modal = load_forms_batch(['/aws',
+            {'form_path': '/aws', 'isModal': True, 'title': 'Contact'}]) %}
+        """
+        specs = [self._batch_spec(spec) for spec in forms]
+        with self._timed("load_forms_batch", count=len(specs)):
+            jobs = self._prepare_batch(specs)
+            if all(isinstance(job, str) for job in jobs):
+                return jobs
+
+            template = self._get_template(self.form_template_path)
+            base_context = self._base_context()
+
+            def render(template_path, context):
+                if template_path == self.form_template_path:
+                    return template.render(base_context, **context)
+                return self._get_template(template_path).render(
+                    base_context, **context
+                )
+
+            fragments = []
+            for job in jobs:
+                if not isinstance(job, str):
+                    form_path, entry, cache_key, context = job
+                    with self._rendering(form_path):
+                        job = self._render_form(
+                            form_path, entry, cache_key, context, render
+                        )
+                fragments.append(job)
+
+            return fragments
+
+    async def load_forms_batch_async(self, forms: list) -> list:
+        """
+        Async version of load_forms_batch, registered as the
+        'load_forms_batch' Jinja function when the app's Jinja environment
+        has enable_async set. Takes the same parameters as load_forms_batch.
+        """
+        specs = [self._batch_spec(spec) for spec in forms]
+        with self._timed("load_forms_batch", count=len(specs)):
+            jobs = await to_thread(self._prepare_batch, specs)
+            fragments = []
+            for job in jobs:
+                if not isinstance(job, str):
+                    form_path, entry, cache_key, context = job
+                    with self._rendering(form_path):
+                        job = await self._render_form_async(
+                            form_path, entry, cache_key, context
+                        )
+                fragments.append(job)
+
+            return fragments
+
+    @staticmethod
+    def _batch_spec(spec) -> tuple:
+        """
+        Converts a load_forms_batch item to the load_form arguments.
+
+        :return: (form_path, formId, isModal, overrides)
+        """
+        if isinstance(spec, (str, Path)):
+            return spec, None, None, (None,) * len(FORM_DATA_OVERRIDES)
+
+        unknown = set(spec) - {
+            "form_path",
+            "formId",
+            "isModal",
+            *FORM_DATA_OVERRIDES,
+        }
+        if unknown:
+            raise TypeError(
+                f"Unknown load_form parameters: {', '.join(sorted(unknown))}"
+            )
+        if "form_path" not in spec:
+            raise TypeError("Missing load_form parameter: form_path")
+
+        return (
+            spec["form_path"],
+            spec.get("formId"),
+            spec.get("isModal"),
+            tuple(spec.get(key) for key in FORM_DATA_OVERRIDES),
+        )
+
+    def _prepare_batch(self, specs: list) -> list:
+        """
+        Looks up the forms of a batch, checking each form-data.json file
+        once, and builds the template context of the forms to render.
+
+        :return: For each spec, either the prerendered or cached HTML, or
+            (form_path, entry, cache_key, context) of a form to render
+        """
+        loaded_files = {}
+        entries = {}
+        jobs = []
+        for form_path, formId, isModal, overrides in specs:
+            html = self._get_prerendered_form(
+                form_path, formId, isModal, overrides
+            )
+            if html is not None:
+                jobs.append(html)
+                continue
+
+            entry = entries.get(form_path)
+            if entry is None:
+                with self._timed("lookup", form_path=form_path):
+                    entry = self._get_form_entry(form_path, loaded_files)
+                entries[form_path] = entry
+
+            html, cache_key, context = self._prepare(
+                entry, form_path, formId, isModal, overrides
+            )
+            jobs.append(
+                html
+                if html is not None
+                else (form_path, entry, cache_key, context)
+            )
+
+        if self.conditional_requests:
+            self._record_forms(spec[0] for spec in specs)
+        return jobs
+
+    def _record_forms(self, form_paths):
+        """
+        Records the content hashes of forms rendered during a request, for
+        its ETag.
+        """
+        if not has_request_context():
+            return
+
+        forms = self._forms
+        form_hashes = g.setdefault("_form_hashes", set())
+        for form_path in form_paths:
+            entry = forms.index.get(form_path) or forms.index.get(
+                forms.match(form_path)
+            )
+            if entry is not None and entry.content_hash is not None:
+                form_hashes.add(entry.content_hash)
+
+    def _add_form_etag(self, response):
+        """
+        after_request handler folding the content hashes of the forms
+        rendered during the request, and of the form templates, into the
+        response ETag. Responses without an ETag get one from their body.
+        """
+        form_hashes = g.pop("_form_hashes", None)
+        if (
+            not form_hashes
+            or request.method not in ("GET", "HEAD")
+            or response.status_code != 200
+        ):
+            return response
+
+        etag, weak = response.get_etag()
+        if etag is None:
+            if response.is_streamed:
+                return response
+            response.add_etag()
+            etag, weak = response.get_etag()
+
+        version = sha256(etag.encode())
+        version.update(self.template_hash().encode())
+        for form_hash in sorted(form_hashes):
+            version.update(form_hash.encode())
+        response.set_etag(version.hexdigest(), weak)
+
+        return response.make_conditional(request)
+
+    def template_hash(self) -> str:
+        """
+        Returns the content hash of the form and fieldsets templates, and of
+        the templates they include, import or extend, with cache_version.
+        It's checked again when the templates change if the Jinja
+        environment auto-reloads them, e.g. in debug mode.
+        """
+        jinja_env = self.app.jinja_env
+        cached = self._template_hash
+        if cached is not None and (
+            not jinja_env.auto_reload
+            or all(uptodate is None or uptodate() for uptodate in cached[1])
+        ):
+            return cached[0]
+
+        template_hash = sha256()
+        if self.cache_version is not None:
+            template_hash.update(str(self.cache_version).encode("utf-8"))
+            template_hash.update(b"\0")
+
+        uptodates = []
+        pending = [
+            template_path
+            for template_path in (
                 self.form_template_path,
-                fieldsets=form_json["fieldsets"],
-                formData=form_data,
-                isModal=is_modal,
-                modalId=form_json.get("modalId"),
-                path=form_path if is_child else None,
-                formId=formId,
-                formPath=form_path,
+                self.fieldsets_template_path,
             )
-        except Exception as e:
+            if template_path is not None
+        ]
+        seen = set()
+        while pending:
+            template_path = pending.pop(0)
+            if template_path in seen:
+                continue
+            seen.add(template_path)
+
+            try:
+                source, _, uptodate = jinja_env.loader.get_source(
+                    jinja_env, template_path
+                )
+            except TemplateNotFound:
+                source, uptodate = "", None
+            template_hash.update(template_path.encode("utf-8"))
+            template_hash.update(b"\0")
+            template_hash.update(source.encode("utf-8"))
+            template_hash.update(b"\0")
+            uptodates.append(uptodate)
+            pending.extend(self._referenced_templates(source))
+
+        self._template_hash = (template_hash.hexdigest(), uptodates)
+        return self._template_hash[0]
+
+    def _referenced_templates(self, source: str) -> list:
+        """
+        Returns the templates a template source includes, imports or
+        extends with constant names. Dynamic names can't be followed.
+        """
+        try:
+            ast = self.app.jinja_env.parse(source)
+        except TemplateSyntaxError:
+            return []
+        return [
+            template_path
+            for template_path in meta.find_referenced_templates(ast)
+            if template_path is not None
+        ]
+
+    def form_definition_url(self, form_path: str) -> str:
+        """
+        Jinja function that returns the content-addressed URL of the JSON
+        definition of a form. Requires definitions_url_prefix.
+
+        :param form_path: The path to the form, or one of its childrenPaths
+        :usage: <div data-form="{{ form_definition_url('/aws') }}"></div>
+        """
+        entry = self._get_form_entry(form_path)
+        return url_for("forms.definition", content_hash=entry.content_hash)
+
+    def _get_definition(self, content_hash: str):
+        """
+        Returns the FormDefinition of a content hash, serializing and
+        compressing it on first use.
+        """
+        definition = self._definitions.get(content_hash)
+        if definition is not None:
+            return definition
+
+        index = self._forms.index
+        indexed, entries = self._entries_by_hash
+        if indexed is not index:
+            entries = {}
+            for entry in index.values():
+                entries.setdefault(entry.content_hash, entry)
+            self._entries_by_hash = (index, entries)
+
+        entry = entries.get(content_hash)
+        if entry is None or content_hash is None:
             abort(
-                500,
-                f"Error rendering template for {form_path}: {str(e)}",
+                404, description=f"Form definition not found: {content_hash}"
+            )
+
+        if self.form_store is not None:
+            entry = self._load_stored_form(entry)
+        definition = build_definition(entry, self.json_backend.dumps)
+        self._definitions[content_hash] = definition
+        return definition
+
+    def _get_fieldsets_html(self, entry: FormEntry) -> tuple:
+        """
+        Looks up the rendered fieldsets of a form. Child paths share the
+        fieldsets of their parent form.
+
+        :return: (html, key) where html is None if it isn't cached yet, or
+            was rendered from a previous version of the form or templates
+        """
+        key = (str(entry.file_path), entry.parent_path or entry.path)
+        cached = self._fieldsets_cache.get(key)
+        if (
+            cached is not None
+            and (
+                cached[0] is entry.fieldsets
+                or (
+                    self.form_store is not None
+                    and cached[0] == entry.content_hash
+                )
+            )
+            and cached[1] == self.template_hash()
+        ):
+            return cached[2], key
+        return None, key
+
+    def _cache_fieldsets_html(
+        self, entry: FormEntry, key: tuple, html: str
+    ) -> Markup:
+        """
+        Caches the rendered fieldsets of a form.
+        """
+        html = Markup(html)
+        # Fieldsets read from the form store are new objects on each cold
+        # read, and shouldn't be kept
+        version = (
+            entry.content_hash
+            if self.form_store is not None and entry.content_hash is not None
+            else entry.fieldsets
+        )
+        self._fieldsets_cache[key] = (version, self.template_hash(), html)
+        return html
+
+    def _get_prerendered_form(
+        self, form_path: str, formId: int, isModal: bool, overrides: tuple
+    ) -> str:
+        """
+        Returns the prerendered default variant of a form, or None if it
+        wasn't prerendered or parameters are overridden.
+        """
+        if (
+            not self._prerendered
+            or formId is not None
+            or isModal is not None
+            or any(value is not None for value in overrides)
+        ):
+            return None
+
+        html = self._prerendered.get(form_path)
+        if html is not None and self._is_timed():
+            self._emit("cache_hit", 0.0, form_path=form_path)
+        return html
+
+    def prerender(self, output: Path) -> dict:
+        """
+        Renders the default variant of every form path, including child
+        paths, to HTML fragment files with a 'manifest.json' listing them.
+
+        :param output: Directory the fragments are written to
+        :return: The manifest forms, keyed by form path
+        """
+        output = Path(output)
+        output.mkdir(parents=True, exist_ok=True)
+        forms = {}
+
+        # Render every form, not the previously prerendered fragments
+        prerendered, self._prerendered = self._prerendered, {}
+        try:
+            for form_path in sorted(self._form_paths()):
+                with self.app.test_request_context(form_path):
+                    html = self.load_form(form_path)
+
+                file_name = (form_path.strip("/") or "index") + ".html"
+                fragment_path = output / file_name
+                fragment_path.parent.mkdir(parents=True, exist_ok=True)
+                fragment_path.write_text(html, encoding="utf-8")
+                forms[form_path] = {
+                    "file": file_name,
+                    "sha256": sha256(html.encode("utf-8")).hexdigest(),
+                }
+        finally:
+            self._prerendered = prerendered
+
+        with open(output / "manifest.json", "w", encoding="utf-8") as file:
+            json_dump(
+                {"template": self.form_template_path, "forms": forms},
+                file,
+                indent=2,
+                sort_keys=True,
+            )
+
+        return forms
+
+    def load_prerendered(self, directory: Path) -> int:
+        """
+        Loads the fragments written by prerender into memory. load_form then
+        returns them, without rendering, when no parameters are overridden.
+
+        :param directory: Directory the fragments were written to
+        :return: Number of loaded fragments
+        """
+        directory = Path(directory)
+        with open(directory / "manifest.json", encoding="utf-8") as file:
+            manifest = json_load(file)
+
+        if manifest["template"] != self.form_template_path:
+            raise ValueError(
+                f"Fragments in {directory} were rendered with "
+                f"{manifest['template']}, not {self.form_template_path}"
+            )
+
+        self._prerendered = {
+            form_path: (directory / form["file"]).read_text(encoding="utf-8")
+            for form_path, form in manifest["forms"].items()
+        }
+        return len(self._prerendered)
+
+    def _discard_prerendered(self, paths: tuple):
+        """
+        Stops serving the prerendered fragments of changed form paths.
+        """
+        if self._prerendered and paths:
+            self._prerendered = {
+                form_path: html
+                for form_path, html in self._prerendered.items()
+                if form_path not in paths
+            }
+
+    def _get_cached_form(
+        self,
+        entry: FormEntry,
+        form_path: str,
+        formId: int,
+        isModal: bool,
+        overrides: tuple,
+    ) -> tuple:
+        """
+        Looks up a rendered form in the render cache. Keys start with the
+        content hash of the form and the hash of the templates, so cached
+        forms are never used once they change.
+
+        :return: (cache_key, html) where cache_key is None if the form can't
+            be cached and html is None if it isn't cached yet
+        """
+        cache_key = self._form_cache_key(
+            entry, form_path, formId, isModal, overrides
+        )
+        if cache_key is None:
+            return None, None
+
+        html = self.render_cache.get(cache_key)
+        self._emit_cache_lookup(form_path, html)
+        return cache_key, html
+
+    async def _get_cached_form_async(
+        self,
+        entry: FormEntry,
+        form_path: str,
+        formId: int,
+        isModal: bool,
+        overrides: tuple,
+    ) -> tuple:
+        """
+        Async version of _get_cached_form, reading the render cache with
+        get_async so shared caches don't block the event loop.
+        """
+        cache_key = self._form_cache_key(
+            entry, form_path, formId, isModal, overrides
+        )
+        if cache_key is None:
+            return None, None
+
+        html = await self.render_cache.get_async(cache_key)
+        self._emit_cache_lookup(form_path, html)
+        return cache_key, html
+
+    def _form_cache_key(
+        self,
+        entry: FormEntry,
+        form_path: str,
+        formId: int,
+        isModal: bool,
+        overrides: tuple,
+    ) -> tuple:
+        """
+        Returns the render cache key of a form, or None if there's no render
+        cache or the form can't be cached.
+        """
+        if self.render_cache is None:
+            return None
+
+        return self._render_cache_key(
+            entry.content_hash,
+            self.template_hash(),
+            form_path,
+            formId,
+            isModal,
+            *overrides,
+        )
+
+    def _emit_cache_lookup(self, form_path: str, html: str):
+        if self._is_timed():
+            self._emit(
+                "cache_miss" if html is None else "cache_hit",
+                0.0,
+                form_path=form_path,
             )
 
-    def _load_form_json(self, file_path: Path) -> dict:
+    @staticmethod
+    def _template_context(
+        entry: FormEntry,
+        form_path: str,
+        formId: int,
+        isModal: bool,
+        overrides: tuple,
+    ) -> dict:
+        """
+        Builds the form template context, overriding the formData from JSON
+        with the load_form parameters that are not None.
+        """
+        is_modal = entry.is_modal if isModal is None else isModal
+
+        # Start with the base formData from JSON
+        form_data = dict(entry.form_data)
+        for key, value in zip(FORM_DATA_OVERRIDES, overrides):
+            if value is not None:
+                form_data[key] = value
+
+        return {
+            "fieldsets": entry.fieldsets,
+            "formData": form_data,
+            "isModal": is_modal,
+            "modalId": entry.modal_id,
+            "path": form_path if entry.is_child else None,
+            "formId": formId,
+            "formPath": form_path,
+        }
+
+    def warm(self, max_workers: int = None) -> int:
+        """
+        Renders the default variant of every registered form path into the
+        render cache.
+
+        :param max_workers: Number of rendering threads (optional)
+        :return: Number of rendered forms
+        """
+        if self.render_cache is None:
+            raise ValueError("warm() requires a render_cache")
+
+        def render(form_path):
+            with self.app.app_context():
+                self.load_form(form_path)
+
+        form_paths = self._form_paths()
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            list(executor.map(render, form_paths))
+
+        return len(form_paths)
+
+    def _form_paths(self) -> list:
+        """
+        Returns the registered form paths, without childrenPaths patterns.
+        """
+        return [path for path in self.form_metadata if not is_pattern(path)]
+
+    @staticmethod
+    def _render_cache_key(*args) -> tuple:
+        """
+        Builds a hashable render cache key from load_form arguments, or
+        returns None if an argument isn't hashable.
+        """
+        key = tuple(str(arg) if isinstance(arg, Path) else arg for arg in args)
+        try:
+            hash(key)
+        except TypeError:
+            return None
+        return key
+
+    def _load_form_json(self, file_path: Path, if_changed: bool = False):
         """
         Loads form data from a JSON file.
+
+        :param if_changed: Return None if the file is unchanged and its
+            parsed contents weren't kept
         """
         try:
-            with open(file_path, encoding="utf-8") as form_json:
-                return json_load(form_json).get("form", {})
+            data = self._read_form_file(file_path, if_changed)
+            return data.get("form", {}) if data is not None else None
         except FileNotFoundError:
             abort(404, description=f"JSON file not found: {file_path} \n")
         except JSONDecodeError:
@@ -179,6 +2099,68 @@ class FormGenerator:
                 500, description=f"Unexpected error loading JSON: {str(e)} \n"
             )
 
+    def _read_form_file(self, file_path: Path, if_changed: bool = False):
+        """
+        Returns the parsed contents of a form-data.json file, reusing the
+        cached document while the file is unchanged.
+
+        :param if_changed: Return None if the file is unchanged and its
+            parsed contents weren't kept, e.g. with a form store, instead
+            of parsing it again
+        """
+        if isinstance(file_path, str):
+            file_path = Path(file_path)
+        cached = self._form_json_cache.get(str(file_path))
+        if cached is not None and cached[1] is None and not if_changed:
+            cached = None
+
+        if cached is not None and self.cache_validation is None:
+            return cached[1]
+
+        start = perf_counter()
+        signature, data = _parse_form_file(
+            file_path,
+            self.cache_validation,
+            cached[0] if cached is not None else None,
+            self.json_backend.loads,
+        )
+        if data is None:
+            return cached[1]
+
+        if self._is_timed():
+            try:
+                size = file_path.stat().st_size
+            except OSError:
+                size = None
+            self._emit(
+                "parse",
+                perf_counter() - start,
+                file_path=file_path,
+                size=size,
+            )
+
+        self._cache_form_file(file_path, signature, data)
+        return data
+
+    def _cache_form_file(self, file_path: Path, signature, data: dict):
+        """
+        Stores a parsed form-data.json document in the cache.
+        """
+        if signature is None and self.cache_validation == "stat":
+            # The file can't be validated later, so don't cache it
+            return
+
+        if self.form_store is not None:
+            # Only its signature is kept, the forms are in the form store
+            data = None
+        self._form_json_cache[str(file_path)] = (signature, data)
+
+    def clear_form_cache(self):
+        """
+        Drops all cached form-data.json documents.
+        """
+        self._form_json_cache.clear()
+
     @staticmethod
     def _process_child_path(child_path: str) -> str:
         """
@@ -197,3 +2179,83 @@ class FormGenerator:
         Removes file extension from a file path.
         """
         return file_path.rsplit(".", 1)[0]
+
+
+def _buffer_chunks(chunks) -> Iterator[str]:
+    """
+    Joins the small chunks generated by a template into chunks of at least
+    STREAM_CHUNK_SIZE characters, except the last one.
+    """
+    buffer = []
+    size = 0
+    for chunk in chunks:
+        buffer.append(chunk)
+        size += len(chunk)
+        if size >= STREAM_CHUNK_SIZE:
+            yield "".join(buffer)
+            buffer.clear()
+            size = 0
+    if buffer:
+        yield "".join(buffer)
+
+
+def _stat_signature(file_path: Path):
+    """
+    Returns the (inode, size, mtime) of a file, or None if it can't be read.
+    """
+    try:
+        stat = file_path.stat()
+    except OSError:
+        return None
+    return (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+
+def _read_manifest_source(
+    file_path: Path, cache_validation: str, loads=STDLIB_BACKEND.loads
+) -> tuple:
+    """
+    Reads a form-data.json file as bytes, in a single read, and parses it
+    into its manifest source.
+
+    :param loads: The loads function of the JSON backend
+    :return: (signature, data, source) where signature identifies the
+        version of the file that was read
+    """
+    with open(file_path, "rb") as form_json:
+        stat = fstat(form_json.fileno())
+        raw = form_json.read()
+    data = loads(raw)
+    source = build_manifest_source(file_path, raw, data, stat)
+    if cache_validation == "hash":
+        signature = source["sha256"]
+    else:
+        signature = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+    return signature, data, source
+
+
+def _parse_form_file(
+    file_path: Path,
+    cache_validation: str,
+    known_signature=None,
+    loads=STDLIB_BACKEND.loads,
+) -> tuple:
+    """
+    Reads a form-data.json file as bytes, in a single read, and parses it.
+
+    :param loads: The loads function of the JSON backend
+    :return: (signature, data) where signature identifies the version of the
+        file that was read, and data is None if it matches known_signature
+    """
+    if cache_validation == "hash":
+        with open(file_path, "rb") as form_json:
+            raw = form_json.read()
+        signature = sha256(raw).hexdigest()
+        if signature == known_signature:
+            return signature, None
+        return signature, loads(raw)
+
+    signature = _stat_signature(file_path)
+    if signature is not None and signature == known_signature:
+        return signature, None
+    with open(file_path, "rb") as form_json:
+        return signature, loads(form_json.read())
@@ -0,0 +1,94 @@
+from gzip import compress as gzip_compress
+from typing import NamedTuple, Optional
+
+from flask import abort, Blueprint, redirect, request, Response, url_for
+
+from canonicalwebteam.form_generator.json_backend import dumps_compact
+
+try:
+    from brotli import compress as brotli_compress
+except ImportError:
+    brotli_compress = None
+
+# Content-addressed URLs never change, so they can be cached for a year
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+class FormDefinition(NamedTuple):
+    """
+    The JSON definition of a form, serialized once and kept compressed.
+    """
+
+    content_hash: str
+    body: bytes
+    gzip: bytes
+    brotli: Optional[bytes] = None
+
+
+def build_definition(entry, dumps=None) -> FormDefinition:
+    """
+    Serializes the fieldsets and formData of a compiled form.
+
+    :param entry: FormEntry of the form, or of one of its child paths
+    :param dumps: Function serializing a value to JSON bytes (optional)
+    """
+    body = (dumps or dumps_compact)(
+        {
+            "fieldsets": entry.fieldsets or [],
+            "formData": dict(entry.form_data),
+            "isModal": entry.is_modal,
+            "modalId": entry.modal_id,
+        }
+    )
+    return FormDefinition(
+        entry.content_hash,
+        body,
+        gzip_compress(body, compresslevel=9, mtime=0),
+        brotli_compress(body) if brotli_compress is not None else None,
+    )
+
+
+def create_blueprint(form_generator) -> Blueprint:
+    """
+    Creates the blueprint serving the JSON definitions of forms.
+
+    Definitions are served from content-addressed URLs with immutable cache
+    headers. Form paths, including childrenPaths, redirect to the URL of
+    their current definition.
+    """
+    forms_blueprint = Blueprint("forms", __name__)
+
+    @forms_blueprint.route("/<content_hash>.json")
+    def definition(content_hash: str):
+        form_definition = form_generator._get_definition(content_hash)
+
+        encodings = request.accept_encodings
+        if form_definition.brotli is not None and encodings["br"]:
+            body, encoding = form_definition.brotli, "br"
+        elif encodings["gzip"]:
+            body, encoding = form_definition.gzip, "gzip"
+        else:
+            body, encoding = form_definition.body, None
+
+        response = Response(body, mimetype="application/json")
+        if encoding is not None:
+            response.headers["Content-Encoding"] = encoding
+        response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+        response.vary.add("Accept-Encoding")
+        response.set_etag(
+            content_hash if encoding is None else f"{content_hash}-{encoding}"
+        )
+        return response.make_conditional(request)
+
+    @forms_blueprint.route("/path/<path:form_path>")
+    def form_path_definition(form_path: str):
+        entry = form_generator._get_form_entry("/" + form_path)
+        content_hash = entry.content_hash
+        if content_hash is None:
+            abort(404, description=f"No definition for path: /{form_path}")
+
+        response = redirect(url_for(".definition", content_hash=content_hash))
+        response.headers["Cache-Control"] = "no-cache"
+        return response
+
+    return forms_blueprint
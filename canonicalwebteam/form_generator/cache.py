@@ -0,0 +1,339 @@
+from abc import ABC, abstractmethod
+from asyncio import to_thread
+from collections import OrderedDict
+from hashlib import sha256
+from os import replace, scandir
+from pathlib import Path
+from shutil import rmtree
+from sys import getsizeof
+from tempfile import NamedTemporaryFile
+from threading import Lock
+
+try:
+    from redis import Redis
+except ImportError:
+    Redis = None
+
+
+class CacheBackend(ABC):
+    """
+    Interface of the render caches used by FormGenerator.
+
+    Keys are tuples starting with the content hash of the form, then the
+    hash of the form templates, including the templates they include or
+    import, and the load_form arguments, so changing a form-data.json or
+    template only invalidates the entries it affects.
+    """
+
+    @abstractmethod
+    def get(self, key):
+        """
+        Returns the cached fragment for a key, or None if it isn't cached.
+        """
+
+    @abstractmethod
+    def set(self, key, value: str):
+        """
+        Caches a fragment.
+        """
+
+    @abstractmethod
+    def clear(self):
+        """
+        Drops all cached fragments.
+        """
+
+    async def get_async(self, key):
+        """
+        Async version of get, used by load_form_async. Runs get in a thread
+        so reading a shared cache doesn't block the event loop.
+        """
+        return await to_thread(self.get, key)
+
+    async def set_async(self, key, value: str):
+        """
+        Async version of set, running it in a thread.
+        """
+        await to_thread(self.set, key, value)
+
+    def stats(self) -> dict:
+        """
+        Returns the cache counters.
+        """
+        return {}
+
+    @staticmethod
+    def _key_name(key: tuple) -> tuple:
+        """
+        Converts a render cache key to its (namespace, name) strings, which
+        are the same in every process.
+        """
+        namespace, *arguments = key
+        name = sha256(repr(tuple(arguments)).encode("utf-8")).hexdigest()
+        return str(namespace), name
+
+
+class RenderCache(CacheBackend):
+    def __init__(self, max_entries: int = 1024, max_bytes: int = None):
+        """
+        Bounded LRU cache of rendered form HTML.
+
+        :param max_entries: Maximum number of cached fragments
+        :param max_bytes: Maximum total size of cached fragments in bytes
+            (optional)
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.size = 0
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """
+        Returns the cached fragment for a key, or None if it isn't cached.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key, value: str):
+        """
+        Caches a fragment, evicting the least recently used ones if the
+        cache is over its limits.
+        """
+        size = getsizeof(value)
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size -= previous[1]
+
+            self._entries[key] = (value, size)
+            self.size += size
+
+            while len(self._entries) > self.max_entries or (
+                self.max_bytes is not None and self.size > self.max_bytes
+            ):
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.size -= evicted_size
+
+    async def get_async(self, key):
+        """
+        Returns a cached fragment without a thread, as nothing blocks.
+        """
+        return self.get(key)
+
+    async def set_async(self, key, value: str):
+        self.set(key, value)
+
+    def clear(self):
+        """
+        Drops all cached fragments. Hit and miss counters are kept.
+        """
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def stats(self) -> dict:
+        """
+        Returns the cache counters.
+        """
+        return {
+            "entries": len(self._entries),
+            "bytes": self.size,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+class DiskRenderCache(CacheBackend):
+    def __init__(self, directory: Path, max_entries: int = 4096):
+        """
+        Render cache shared by the workers of a host, storing each fragment
+        in a file. Put the directory on a tmpfs, e.g. /dev/shm, to keep it
+        in shared memory.
+
+        Fragments are stored in a subdirectory per form content hash, and
+        written atomically, so workers never read partial fragments.
+
+        :param directory: Directory the fragments are stored in
+        :param max_entries: Maximum number of cached fragments. The least
+            recently written ones, e.g. of previous versions of forms, are
+            removed when it's exceeded. None keeps every fragment
+        """
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._writes = 0
+
+    def _path(self, key) -> Path:
+        namespace, name = self._key_name(key)
+        return self.directory / namespace / f"{name}.html"
+
+    def get(self, key):
+        try:
+            value = self._path(key).read_text(encoding="utf-8")
+        except OSError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return value
+
+    def set(self, key, value: str):
+        path = self._path(key)
+        try:
+            path.parent.mkdir(exist_ok=True)
+            with NamedTemporaryFile(
+                "w",
+                encoding="utf-8",
+                dir=path.parent,
+                suffix=".tmp",
+                delete=False,
+            ) as file:
+                file.write(value)
+            replace(file.name, path)
+        except OSError:
+            # Rendering doesn't depend on the cache
+            return
+
+        self._writes += 1
+        if self.max_entries is not None and (
+            self._writes % max(1, self.max_entries // 10) == 0
+        ):
+            self._prune()
+
+    def _files(self) -> list:
+        files = []
+        for folder in scandir(self.directory):
+            if folder.is_dir():
+                files.extend(
+                    file
+                    for file in scandir(folder.path)
+                    if file.name.endswith(".html")
+                )
+        return files
+
+    def _prune(self):
+        """
+        Removes the least recently written fragments over max_entries, and
+        the namespaces left empty.
+        """
+        try:
+            files = self._files()
+            if len(files) <= self.max_entries:
+                return
+            files.sort(key=lambda file: file.stat().st_mtime_ns)
+            folders = set()
+            for file in files[: len(files) - self.max_entries]:
+                path = Path(file.path)
+                path.unlink(missing_ok=True)
+                folders.add(path.parent)
+            for folder in folders:
+                try:
+                    folder.rmdir()
+                except OSError:
+                    # It still has fragments
+                    pass
+        except OSError:
+            pass
+
+    def clear(self):
+        for folder in scandir(self.directory):
+            if folder.is_dir():
+                rmtree(folder.path, ignore_errors=True)
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._files()),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+class RedisRenderCache(CacheBackend):
+    def __init__(
+        self, client, prefix: str = "form-generator:", ttl: int = 86400
+    ):
+        """
+        Render cache shared by every worker using the same Redis server, or
+        a Redis-compatible server like Valkey.
+
+        Keys are "<prefix><form content hash>:<arguments hash>". Errors
+        talking to the server are counted and treated as cache misses.
+
+        :param client: redis.Redis client, or an object with the same get,
+            set, scan_iter and delete methods
+        :param prefix: Prefix of every key
+        :param ttl: Expiry of cached fragments in seconds, so fragments of
+            previous versions of forms are reclaimed. None never expires
+            them
+        """
+        self.client = client
+        self.prefix = prefix
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    @classmethod
+    def from_url(cls, url: str, **kwargs) -> "RedisRenderCache":
+        """
+        Creates a cache connected to a server URL, e.g.
+        "redis://localhost:6379/0". Requires the redis package.
+
+        :param kwargs: Arguments passed to RedisRenderCache
+        """
+        if Redis is None:
+            raise RuntimeError("redis is required to use RedisRenderCache")
+        return cls(Redis.from_url(url), **kwargs)
+
+    def _name(self, key) -> str:
+        namespace, name = self._key_name(key)
+        return f"{self.prefix}{namespace}:{name}"
+
+    def get(self, key):
+        try:
+            value = self.client.get(self._name(key))
+        except Exception:
+            self.errors += 1
+            value = None
+
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return value.decode("utf-8") if isinstance(value, bytes) else value
+
+    def set(self, key, value: str):
+        try:
+            self.client.set(
+                self._name(key), value.encode("utf-8"), ex=self.ttl
+            )
+        except Exception:
+            self.errors += 1
+
+    def clear(self):
+        names = list(self.client.scan_iter(match=f"{self.prefix}*"))
+        for start in range(0, len(names), 500):
+            self.client.delete(*names[start : start + 500])
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+        }
@@ -0,0 +1,34 @@
+from pathlib import Path
+
+import click
+from flask.cli import AppGroup
+
+
+def create_cli(form_generator) -> AppGroup:
+    """
+    Creates the 'flask forms' command group for a FormGenerator.
+    """
+    forms_cli = AppGroup(
+        "forms", help="Manage forms built from form-data.json"
+    )
+
+    @forms_cli.command("prerender")
+    @click.option(
+        "--output",
+        "-o",
+        type=click.Path(file_okay=False, path_type=Path),
+        required=True,
+        help="Directory the form fragments and manifest are written to",
+    )
+    def prerender(output: Path):
+        """
+        Renders the default variant of every form path to static HTML
+        fragments.
+        """
+        if not form_generator.form_metadata:
+            form_generator.load_forms()
+
+        forms = form_generator.prerender(output)
+        click.echo(f"Rendered {len(forms)} forms to {output}")
+
+    return forms_cli
@@ -0,0 +1,127 @@
+from collections.abc import Mapping as MappingABC
+from pathlib import Path
+from types import MappingProxyType
+from typing import Iterator, Mapping, NamedTuple, Optional
+
+from canonicalwebteam.form_generator.path_trie import (
+    EMPTY_TRIE,
+    is_pattern,
+    PathTrie,
+)
+
+
+class FormEntry(NamedTuple):
+    """
+    Compiled, immutable form definition for a single path.
+
+    Child paths share the fieldsets and formData of their parent form.
+    """
+
+    path: str
+    file_path: Path
+    template: str
+    fieldsets: Optional[list]
+    form_data: Mapping
+    is_modal: Optional[bool]
+    modal_id: Optional[str]
+    parent_path: Optional[str] = None
+    source: Optional[dict] = None
+    # Hash of the form JSON, shared by child paths
+    content_hash: Optional[str] = None
+
+    @property
+    def is_child(self) -> bool:
+        return self.parent_path is not None
+
+    @property
+    def metadata(self) -> dict:
+        """
+        The form_metadata record of the path.
+        """
+        metadata = {"file_path": self.file_path, "template": self.template}
+        if self.parent_path is not None:
+            metadata["is_child"] = True
+            metadata["parent_path"] = self.parent_path
+        return metadata
+
+
+class FormMetadata(MappingABC):
+    """
+    Read-only view of the metadata of every form path, derived from the
+    form index, so it isn't stored twice.
+    """
+
+    __slots__ = ("_index", "_metadata")
+
+    def __init__(self, index: dict, metadata: dict):
+        self._index = index
+        self._metadata = metadata
+
+    def __getitem__(self, path: str) -> dict:
+        entry = self._index.get(path)
+        if entry is not None:
+            return entry.metadata
+        return self._metadata[path]
+
+    def __contains__(self, path) -> bool:
+        return path in self._index or path in self._metadata
+
+    def __iter__(self) -> Iterator[str]:
+        yield from self._index
+        for path in self._metadata:
+            if path not in self._index:
+                yield path
+
+    def __len__(self) -> int:
+        return len(self._index) + sum(
+            path not in self._index for path in self._metadata
+        )
+
+
+class FormSnapshot(NamedTuple):
+    """
+    A consistent version of the loaded forms. Published snapshots are never
+    modified: changes are made to a copy, which then replaces the snapshot.
+    """
+
+    # Metadata of the paths without a FormEntry yet, e.g. set directly
+    # with form_metadata, keyed by path
+    metadata: dict
+    # FormEntry objects, keyed by path
+    index: dict
+    # Paths defined by each form-data.json file, keyed by file path
+    file_paths: dict
+    # Compiled glob patterns among the paths, e.g. "/data/*"
+    patterns: PathTrie = EMPTY_TRIE
+
+    def copy(self) -> "FormSnapshot":
+        return FormSnapshot(
+            dict(self.metadata),
+            dict(self.index),
+            dict(self.file_paths),
+            self.patterns,
+        )
+
+    def match(self, form_path: str) -> Optional[str]:
+        """
+        Returns the pattern a path without its own form matches, or None.
+        """
+        return self.patterns.match(form_path)
+
+    def compile_patterns(self) -> "FormSnapshot":
+        """
+        Returns the snapshot with its pattern trie rebuilt, if the patterns
+        among its paths have changed.
+        """
+        patterns = {
+            path
+            for paths in (self.metadata, self.index)
+            for path in paths
+            if is_pattern(path)
+        }
+        if patterns == self.patterns.patterns:
+            return self
+        return self._replace(patterns=PathTrie(patterns))
+
+
+EMPTY_FORM_DATA = MappingProxyType({})
@@ -0,0 +1,152 @@
+from hashlib import blake2b
+from sys import getsizeof, intern as intern_string
+from threading import Lock
+
+from canonicalwebteam.form_generator.json_backend import dumps_compact
+
+
+class FrozenDict(dict):
+    """
+    Read-only dict used for interned JSON objects.
+
+    Unlike MappingProxyType, it's still a dict, so templates can serialize
+    it, e.g. with the tojson filter.
+    """
+
+    __slots__ = ()
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError(f"{type(self).__name__} is read-only")
+
+    __setitem__ = __delitem__ = __ior__ = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+
+    def __reduce__(self):
+        return (type(self), (dict(self),))
+
+
+class FormInterner:
+    def __init__(self, dumps=None):
+        """
+        Shares identical JSON subtrees, e.g. the same fieldsets, fields or
+        option lists used by many forms, as a single immutable object.
+
+        Objects and arrays are keyed by a hash of their serialized content:
+        arrays become tuples, objects become FrozenDicts, and strings are
+        interned. A subtree that was seen before is shared as a whole,
+        without visiting its children.
+
+        :param dumps: Function serializing a value to JSON bytes, e.g. the
+            dumps of a JSONBackend (optional)
+        """
+        self.dumps = dumps or dumps_compact
+        # (node, number of objects and arrays in it, estimated size) of
+        # every interned node, keyed by content hash
+        self._nodes = {}
+        self._lock = Lock()
+        self.total = 0
+        self.bytes_saved = 0
+
+    def intern(self, value):
+        """
+        Returns an immutable copy of a parsed JSON value, sharing the
+        subtrees that were interned before.
+        """
+        with self._lock:
+            return self._intern(value)[0]
+
+    def _intern(self, value) -> tuple:
+        """
+        :return: (interned value, number of objects and arrays in it,
+            estimated size)
+        """
+        if isinstance(value, str):
+            interned = intern_string(value)
+            if interned is not value:
+                self.bytes_saved += getsizeof(value)
+            return interned, 0, getsizeof(interned)
+
+        if not isinstance(value, (dict, list, tuple)):
+            # Numbers, booleans and null
+            return value, 0, getsizeof(value)
+
+        try:
+            digest = blake2b(self.dumps(value), digest_size=16).digest()
+        except (TypeError, ValueError):
+            # Not JSON, so it can't be compared
+            return value, 0, getsizeof(value)
+
+        shared = self._nodes.get(digest)
+        if shared is not None:
+            node, count, size = shared
+            if node is not value:
+                self.total += count
+                self.bytes_saved += size
+            return shared
+
+        count = 1
+        size = getsizeof(value)
+        unchanged = True
+        items = []
+        if isinstance(value, dict):
+            for key, child in value.items():
+                interned_key = intern_string(key)
+                interned_child, child_count, child_size = self._intern(child)
+                items.append((interned_key, interned_child))
+                count += child_count
+                size += child_size
+                unchanged &= interned_key is key and interned_child is child
+            node_type = FrozenDict
+        else:
+            for child in value:
+                interned_child, child_count, child_size = self._intern(child)
+                items.append(interned_child)
+                count += child_count
+                size += child_size
+                unchanged &= interned_child is child
+            node_type = tuple
+
+        # An interned value is shared as it is, e.g. after clear()
+        if unchanged and type(value) is node_type:
+            node = value
+        else:
+            node = node_type(items)
+        shared = self._nodes[digest] = (node, count, size)
+        # Its children were counted when they were interned
+        self.total += 1
+        return shared
+
+    def stats(self) -> dict:
+        """
+        Returns the number of interned objects and arrays, the number of
+        unique ones, and an estimate of the bytes saved by sharing them.
+        """
+        with self._lock:
+            return {
+                "total": self.total,
+                "unique": len(self._nodes),
+                "bytes_saved": self.bytes_saved,
+            }
+
+    def rebuild(self, values):
+        """
+        Keeps only the nodes of values that are still in use, e.g. the
+        fieldsets of the loaded forms once a form-data.json file changed,
+        so replaced subtrees can be freed. Values that were interned are
+        kept as they are.
+        """
+        with self._lock:
+            self._nodes.clear()
+            self.total = 0
+            self.bytes_saved = 0
+            for value in values:
+                self._intern(value)
+
+    def clear(self):
+        with self._lock:
+            self._nodes.clear()
+            self.total = 0
+            self.bytes_saved = 0
+
+    def __len__(self) -> int:
+        return len(self._nodes)
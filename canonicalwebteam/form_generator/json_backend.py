@@ -0,0 +1,69 @@
+from json import dumps as json_dumps, loads as json_loads
+from typing import Callable, NamedTuple
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class JSONBackend(NamedTuple):
+    """
+    Parses form-data.json files, read as bytes in a single read.
+
+    loads must raise json.JSONDecodeError, or a subclass of it, for invalid
+    JSON, so it's reported the same way whichever backend is used. dumps
+    returns compact JSON bytes, and is used to compare parsed values.
+    """
+
+    name: str
+    loads: Callable
+    dumps: Callable = None
+
+
+def dumps_compact(value) -> bytes:
+    return json_dumps(value, separators=(",", ":")).encode()
+
+
+def dumps_canonical(value) -> bytes:
+    """
+    Returns the canonical JSON of a value, with sorted keys and no
+    whitespace, whichever backend parsed it. Content hashes are computed
+    over it, so they are the same in every worker.
+    """
+    return json_dumps(
+        value, sort_keys=True, separators=(",", ":"), ensure_ascii=False
+    ).encode()
+
+
+STDLIB_BACKEND = JSONBackend("json", json_loads, dumps_compact)
+
+# orjson.JSONDecodeError is a subclass of json.JSONDecodeError
+ORJSON_BACKEND = (
+    JSONBackend("orjson", orjson.loads, orjson.dumps)
+    if orjson is not None
+    else None
+)
+
+
+def get_json_backend(json_backend=None) -> JSONBackend:
+    """
+    Returns a JSON backend by name.
+
+    :param json_backend: "json", "orjson" (requires orjson), a JSONBackend
+        instance, or None for the json module. orjson is opt-in as it
+        rejects NaN and Infinity, and parses integers wider than 64 bits as
+        floats
+    """
+    if isinstance(json_backend, JSONBackend):
+        return json_backend
+
+    if json_backend is None or json_backend == "json":
+        return STDLIB_BACKEND
+
+    if json_backend == "orjson":
+        if ORJSON_BACKEND is None:
+            raise RuntimeError("orjson is required to use the orjson backend")
+        return ORJSON_BACKEND
+
+    raise ValueError(f"Invalid json_backend value: {json_backend}")
@@ -0,0 +1,60 @@
+from hashlib import sha256
+from json import dump as json_dump, loads as json_loads, JSONDecodeError
+from os import replace
+from pathlib import Path
+
+# Bump when the manifest layout changes, so old manifests are rebuilt
+MANIFEST_VERSION = 1
+
+
+def build_manifest_source(
+    file_path: Path, raw: bytes, data: dict, stat=None
+) -> dict:
+    """
+    Builds the manifest record of a parsed form-data.json file.
+
+    :param stat: The os.stat_result of the file, if it was already read
+        (optional)
+    """
+    if stat is None:
+        stat = file_path.stat()
+    return {
+        "mtime_ns": stat.st_mtime_ns,
+        "size": stat.st_size,
+        "sha256": sha256(raw).hexdigest(),
+        "data": data,
+    }
+
+
+def read_manifest(manifest_path: Path, loads=json_loads) -> dict:
+    """
+    Reads the sources of a form manifest, keyed by form-data.json path.
+
+    :param loads: The loads function of the JSON backend (optional)
+    :return: The manifest sources, or None if the manifest is missing or
+        was written by another manifest version
+    """
+    try:
+        with open(manifest_path, "rb") as manifest_file:
+            manifest = loads(manifest_file.read())
+    except (FileNotFoundError, JSONDecodeError):
+        return None
+
+    if manifest.get("version") != MANIFEST_VERSION:
+        return None
+
+    return manifest["sources"]
+
+
+def write_manifest(manifest_path: Path, sources: dict):
+    """
+    Atomically writes a form manifest.
+    """
+    temp_path = manifest_path.with_name(manifest_path.name + ".tmp")
+    with open(temp_path, "w", encoding="utf-8") as manifest_file:
+        json_dump(
+            {"version": MANIFEST_VERSION, "sources": sources},
+            manifest_file,
+            separators=(",", ":"),
+        )
+    replace(temp_path, manifest_path)
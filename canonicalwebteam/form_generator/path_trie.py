@@ -0,0 +1,126 @@
+import re
+from fnmatch import translate
+from typing import Iterable, Optional
+
+GLOB_CHARACTERS = frozenset("*?[")
+
+
+def is_pattern(path: str) -> bool:
+    """
+    Returns whether a form path is a glob pattern, e.g. "/data/*" or
+    "/cloud/**/contact", rather than an exact path.
+    """
+    return not GLOB_CHARACTERS.isdisjoint(path)
+
+
+def split_path(path: str) -> list:
+    path = path.strip("/")
+    return path.split("/") if path else []
+
+
+class _Node:
+    __slots__ = ("children", "globs", "star", "double_star", "pattern")
+
+    def __init__(self):
+        # Child nodes keyed by literal segment
+        self.children = {}
+        # (compiled segment pattern, child node), e.g. for "product-*"
+        self.globs = []
+        self.star = None
+        self.double_star = None
+        # Pattern ending at this node
+        self.pattern = None
+
+
+class PathTrie:
+    def __init__(self, patterns: Iterable[str] = ()):
+        """
+        Compiled form path patterns, matched segment by segment.
+
+        "*" matches a single segment, "**" matches any number of segments,
+        including none, and other glob characters match within a segment,
+        e.g. "/data/product-*". When several patterns match a path, the
+        most specific one wins: at the first segment where they differ,
+        a literal segment beats a segment glob, which beats "*", which
+        beats "**".
+
+        :param patterns: Form path patterns
+        """
+        self._root = _Node()
+        self.patterns = frozenset(patterns)
+        for pattern in self.patterns:
+            self._add(pattern)
+
+    def _add(self, pattern: str):
+        node = self._root
+        for segment in split_path(pattern):
+            if segment == "**":
+                if node.double_star is None:
+                    node.double_star = _Node()
+                node = node.double_star
+            elif segment == "*":
+                if node.star is None:
+                    node.star = _Node()
+                node = node.star
+            elif is_pattern(segment):
+                regex = translate(segment)
+                for compiled, child in node.globs:
+                    if compiled.pattern == regex:
+                        node = child
+                        break
+                else:
+                    child = _Node()
+                    node.globs.append((re.compile(regex), child))
+                    node = child
+            else:
+                node = node.children.setdefault(segment, _Node())
+        node.pattern = pattern
+
+    def match(self, path: str) -> Optional[str]:
+        """
+        Returns the most specific pattern matching a path, or None.
+        """
+        if not self.patterns:
+            return None
+        return self._match(self._root, split_path(path), 0)
+
+    def _match(self, node: _Node, segments: list, position: int):
+        if position == len(segments):
+            if node.pattern is not None:
+                return node.pattern
+        else:
+            segment = segments[position]
+            child = node.children.get(segment)
+            if child is not None:
+                pattern = self._match(child, segments, position + 1)
+                if pattern is not None:
+                    return pattern
+
+            for compiled, child in node.globs:
+                if compiled.match(segment):
+                    pattern = self._match(child, segments, position + 1)
+                    if pattern is not None:
+                        return pattern
+
+            if node.star is not None:
+                pattern = self._match(node.star, segments, position + 1)
+                if pattern is not None:
+                    return pattern
+
+        if node.double_star is not None:
+            # Consume as few segments as possible
+            for end in range(position, len(segments) + 1):
+                pattern = self._match(node.double_star, segments, end)
+                if pattern is not None:
+                    return pattern
+
+        return None
+
+    def __len__(self) -> int:
+        return len(self.patterns)
+
+    def __bool__(self) -> bool:
+        return bool(self.patterns)
+
+
+EMPTY_TRIE = PathTrie()
@@ -0,0 +1,7 @@
+from blinker import Namespace
+
+_signals = Namespace()
+
+# Sent with the name and duration of each timed phase of loading and
+# rendering forms. Only timed when there are receivers.
+form_timed = _signals.signal("form-timed")
@@ -0,0 +1,188 @@
+from heapq import heappush, heappushpop
+from json import dumps as json_dumps
+from threading import Lock
+
+from flask import Response
+
+
+class FormStats:
+    def __init__(self, slowest_files: int = 10):
+        """
+        Aggregates the timings reported by FormGenerator hooks.
+
+        Add it with FormGenerator.add_hook(stats).
+
+        :param slowest_files: Number of slowest files to keep from
+            load_forms
+        """
+        self.slowest_files = slowest_files
+        self.phases = {}
+        self.calls = {}
+        self.bytes_parsed = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self._slowest_files = []
+        self._lock = Lock()
+
+    def __call__(
+        self,
+        phase: str,
+        duration: float,
+        form_path: str = None,
+        file_path=None,
+        size: int = None,
+        **info,
+    ):
+        with self._lock:
+            count, total, slowest = self.phases.get(phase, (0, 0.0, 0.0))
+            self.phases[phase] = (
+                count + 1,
+                total + duration,
+                max(slowest, duration),
+            )
+
+            if phase == "load_form":
+                self.calls[form_path] = self.calls.get(form_path, 0) + 1
+            elif phase == "parse" and size is not None:
+                self.bytes_parsed += size
+            elif phase == "cache_hit":
+                self.cache_hits += 1
+            elif phase == "cache_miss":
+                self.cache_misses += 1
+            elif phase == "load_file" and self.slowest_files:
+                item = (duration, str(file_path))
+                if len(self._slowest_files) < self.slowest_files:
+                    heappush(self._slowest_files, item)
+                else:
+                    heappushpop(self._slowest_files, item)
+
+    def to_dict(self) -> dict:
+        """
+        Returns the aggregated stats.
+        """
+        with self._lock:
+            return {
+                "phases": {
+                    phase: {
+                        "count": count,
+                        "total_seconds": total,
+                        "max_seconds": slowest,
+                    }
+                    for phase, (count, total, slowest) in self.phases.items()
+                },
+                "calls": dict(self.calls),
+                "bytes_parsed": self.bytes_parsed,
+                "cache_hits": self.cache_hits,
+                "cache_misses": self.cache_misses,
+                "slowest_files": [
+                    {"file_path": file_path, "seconds": duration}
+                    for duration, file_path in sorted(
+                        self._slowest_files, reverse=True
+                    )
+                ],
+            }
+
+    def to_prometheus(self, prefix: str = "form_generator") -> str:
+        """
+        Returns the aggregated stats in the Prometheus text format.
+        """
+        stats = self.to_dict()
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} {kind}")
+            for labels, value in samples:
+                label_text = ",".join(
+                    f'{key}="{_escape_label(label)}"'
+                    for key, label in labels.items()
+                )
+                if label_text:
+                    label_text = "{" + label_text + "}"
+                lines.append(f"{prefix}_{name}{label_text} {value}")
+
+        phases = stats["phases"].items()
+        metric(
+            "phase_seconds_total",
+            "counter",
+            "Time spent in each phase of loading and rendering forms.",
+            [({"phase": p}, s["total_seconds"]) for p, s in phases],
+        )
+        metric(
+            "phase_calls_total",
+            "counter",
+            "Number of times each phase ran.",
+            [({"phase": p}, s["count"]) for p, s in phases],
+        )
+        metric(
+            "load_form_calls_total",
+            "counter",
+            "Number of load_form calls per form path.",
+            [({"path": p}, count) for p, count in stats["calls"].items()],
+        )
+        metric(
+            "bytes_parsed_total",
+            "counter",
+            "Bytes of form-data.json parsed.",
+            [({}, stats["bytes_parsed"])],
+        )
+        metric(
+            "cache_hits_total",
+            "counter",
+            "Forms returned from the render cache or prerendered fragments.",
+            [({}, stats["cache_hits"])],
+        )
+        metric(
+            "cache_misses_total",
+            "counter",
+            "Forms missing from the render cache.",
+            [({}, stats["cache_misses"])],
+        )
+        metric(
+            "slowest_file_seconds",
+            "gauge",
+            "Slowest form-data.json files to load.",
+            [
+                ({"file": f["file_path"]}, f["seconds"])
+                for f in stats["slowest_files"]
+            ],
+        )
+
+        return "\n".join(lines) + "\n"
+
+    def json_view(self) -> Response:
+        """
+        Flask view returning the stats as JSON.
+        """
+        return Response(
+            json_dumps(self.to_dict()), mimetype="application/json"
+        )
+
+    def prometheus_view(self) -> Response:
+        """
+        Flask view returning the stats in the Prometheus text format.
+        """
+        return Response(
+            self.to_prometheus(), mimetype="text/plain; version=0.0.4"
+        )
+
+    def reset(self):
+        """
+        Resets all stats.
+        """
+        with self._lock:
+            self.phases = {}
+            self.calls = {}
+            self.bytes_parsed = 0
+            self.cache_hits = 0
+            self.cache_misses = 0
+            self._slowest_files = []
+
+
+def _escape_label(value) -> str:
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace('"', '\\"')
+        .replace("\n", "\\n")
+    )
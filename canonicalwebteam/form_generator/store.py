@@ -0,0 +1,208 @@
+from collections import OrderedDict
+from sys import getsizeof
+from threading import Lock
+from time import perf_counter
+from zlib import compress, decompress
+
+from canonicalwebteam.form_generator.json_backend import (
+    dumps_compact,
+    STDLIB_BACKEND,
+)
+
+
+def _deep_size(value) -> int:
+    """
+    Estimates the memory used by a parsed JSON value. Object keys aren't
+    counted, as the JSON parser shares them within a document.
+    """
+    size = 0
+    stack = [value]
+    while stack:
+        item = stack.pop()
+        size += getsizeof(item)
+        if type(item) is dict:
+            stack.extend(item.values())
+        elif type(item) is list:
+            stack.extend(item)
+    return size
+
+
+class TieredFormStore:
+    def __init__(
+        self,
+        max_hot_entries: int = 256,
+        max_hot_bytes: int = None,
+        promote_after: int = 1,
+        compress_level: int = 6,
+    ):
+        """
+        Stores the fieldsets and formData of forms, keyed by content hash,
+        in two tiers.
+
+        Every form is kept as a compressed JSON blob (the cold tier). Forms
+        read at least promote_after times while cold are also kept parsed
+        (the hot tier), least recently used first out once the hot tier
+        is over its limits. Evicted forms stay in the cold tier.
+
+        :param max_hot_entries: Maximum number of parsed forms
+        :param max_hot_bytes: Maximum estimated memory of parsed forms, in
+            bytes (optional)
+        :param promote_after: Number of reads from the cold tier before a
+            form is promoted to the hot tier
+        :param compress_level: zlib compression level of cold forms
+        """
+        if promote_after < 1:
+            raise ValueError("promote_after must be at least 1")
+
+        self.max_hot_entries = max_hot_entries
+        self.max_hot_bytes = max_hot_bytes
+        self.promote_after = promote_after
+        self.compress_level = compress_level
+        self.dumps = dumps_compact
+        self.loads = STDLIB_BACKEND.loads
+        # Compressed blob, number of reads since it was last hot, serialized
+        # size and parsed size, once known, by key
+        self._cold = {}
+        # Parsed value and estimated size, by key
+        self._hot = OrderedDict()
+        self._lock = Lock()
+        self.hot_bytes = 0
+        self.cold_bytes = 0
+        self.raw_bytes = 0
+        self.hot_hits = 0
+        self.cold_hits = 0
+        self.misses = 0
+        self.promotions = 0
+        self.demotions = 0
+        self.decode_time = 0.0
+
+    def use_json_backend(self, json_backend):
+        """
+        Serializes and parses forms with a JSONBackend. Forms already
+        stored must be stored again.
+        """
+        self.dumps = json_backend.dumps or dumps_compact
+        self.loads = json_backend.loads
+
+    def __len__(self) -> int:
+        return len(self._cold)
+
+    def __contains__(self, key) -> bool:
+        return key in self._cold
+
+    def put(self, key, value):
+        """
+        Stores a JSON value in the cold tier, unless it's already stored.
+        """
+        if key in self._cold:
+            return
+
+        raw = self.dumps(value)
+        blob = compress(raw, self.compress_level)
+        with self._lock:
+            if key in self._cold:
+                return
+            self._cold[key] = [blob, 0, len(raw), None]
+            self.cold_bytes += len(blob)
+            self.raw_bytes += len(raw)
+
+    def get(self, key):
+        """
+        Returns a stored value, or None. Values read from the cold tier are
+        new objects, which shouldn't be modified once promoted.
+        """
+        with self._lock:
+            hot = self._hot.get(key)
+            if hot is not None:
+                self._hot.move_to_end(key)
+                self.hot_hits += 1
+                return hot[0]
+
+            cold = self._cold.get(key)
+            if cold is None:
+                self.misses += 1
+                return None
+            cold[1] += 1
+            promote = cold[1] >= self.promote_after
+            blob, size = cold[0], cold[3]
+
+        start = perf_counter()
+        value = self.loads(decompress(blob))
+        duration = perf_counter() - start
+        if promote and size is None:
+            size = cold[3] = _deep_size(value)
+
+        with self._lock:
+            self.cold_hits += 1
+            self.decode_time += duration
+            if promote and key in self._cold and key not in self._hot:
+                self._promote(key, value, size)
+        return value
+
+    def _promote(self, key, value, size: int):
+        if self.max_hot_bytes is not None and size > self.max_hot_bytes:
+            return
+
+        self._hot[key] = (value, size)
+        self.hot_bytes += size
+        self.promotions += 1
+        while len(self._hot) > self.max_hot_entries or (
+            self.max_hot_bytes is not None
+            and self.hot_bytes > self.max_hot_bytes
+        ):
+            evicted_key, (_, evicted_size) = self._hot.popitem(last=False)
+            self.hot_bytes -= evicted_size
+            self._cold[evicted_key][1] = 0
+            self.demotions += 1
+
+    def discard(self, key):
+        """
+        Removes a value from both tiers.
+        """
+        with self._lock:
+            hot = self._hot.pop(key, None)
+            if hot is not None:
+                self.hot_bytes -= hot[1]
+            cold = self._cold.pop(key, None)
+            if cold is not None:
+                self.cold_bytes -= len(cold[0])
+                self.raw_bytes -= cold[2]
+
+    def retain(self, keys):
+        """
+        Removes the values whose key isn't in keys.
+        """
+        keys = set(keys)
+        for key in [key for key in self._cold if key not in keys]:
+            self.discard(key)
+
+    def clear(self):
+        """
+        Drops all values. Counters are kept.
+        """
+        with self._lock:
+            self._hot.clear()
+            self._cold.clear()
+            self.hot_bytes = 0
+            self.cold_bytes = 0
+            self.raw_bytes = 0
+
+    def stats(self) -> dict:
+        """
+        Returns the size of each tier and the read counters. decode_ms is
+        the total time spent decoding cold forms.
+        """
+        with self._lock:
+            return {
+                "hot_entries": len(self._hot),
+                "hot_bytes": self.hot_bytes,
+                "cold_entries": len(self._cold),
+                "cold_bytes": self.cold_bytes,
+                "raw_bytes": self.raw_bytes,
+                "hot_hits": self.hot_hits,
+                "cold_hits": self.cold_hits,
+                "misses": self.misses,
+                "promotions": self.promotions,
+                "demotions": self.demotions,
+                "decode_ms": self.decode_time * 1000,
+            }
@@ -1,9 +1,19 @@
+import asyncio
+import json
+import os
+import tempfile
+import threading
 import unittest
 from unittest.mock import MagicMock, patch, mock_open
 from pathlib import Path
-from flask import Flask
+from flask import Flask, stream_template
 from canonicalwebteam.form_generator.app import FormGenerator
+from canonicalwebteam.form_generator.cache import CacheBackend, RenderCache
+from canonicalwebteam.form_generator.json_backend import JSONBackend
+from canonicalwebteam.form_generator.signals import form_timed
+from canonicalwebteam.form_generator.store import TieredFormStore
 from json import JSONDecodeError
+from werkzeug.exceptions import NotFound
 
 
 class TestFormGenerator(unittest.TestCase):
@@ -396,6 +406,1527 @@ class TestFormGenerator(unittest.TestCase):
             mock_abort.call_args[1]["description"],
         )
 
+    def _write_form_file(self, directory, form_data):
+        file_path = Path(directory) / "form-data.json"
+        file_path.write_text(json.dumps({"form": form_data}))
+        return file_path
+
+    def test_load_form_json_cached(self):
+        """
+        Test _load_form_json only parses an unchanged file once.
+        """
+        mock_loads = MagicMock(wraps=json.loads)
+        form_generator = FormGenerator(
+            self.app,
+            self.form_template_path,
+            json_backend=JSONBackend("json", mock_loads),
+        )
+
+        with tempfile.TemporaryDirectory() as directory:
+            file_path = self._write_form_file(directory, {"/test": {}})
+            first = form_generator._load_form_json(file_path)
+            second = form_generator._load_form_json(file_path)
+
+        self.assertIs(first, second)
+        mock_loads.assert_called_once()
+
+    def test_load_form_json_cache_invalidated_on_change(self):
+        """
+        Test _load_form_json re-parses a file when it changes on disk.
+        """
+        for cache_validation in ("stat", "hash"):
+            form_generator = FormGenerator(
+                self.app,
+                self.form_template_path,
+                cache_validation=cache_validation,
+            )
+
+            with tempfile.TemporaryDirectory() as directory:
+                file_path = self._write_form_file(directory, {"/old": {}})
+                form_generator._load_form_json(file_path)
+
+                self._write_form_file(directory, {"/updated": {}})
+                result = form_generator._load_form_json(file_path)
+
+            self.assertIn("/updated", result)
+
+    def test_load_form_json_cache_without_validation(self):
+        """
+        Test _load_form_json doesn't touch the disk once a file is cached
+        when cache_validation is None.
+        """
+        form_generator = FormGenerator(
+            self.app, self.form_template_path, cache_validation=None
+        )
+
+        with tempfile.TemporaryDirectory() as directory:
+            file_path = self._write_form_file(directory, {"/test": {}})
+            form_generator._load_form_json(file_path)
+
+            with patch(
+                "canonicalwebteam.form_generator.app.Path.stat"
+            ) as mock_stat, patch(
+                "canonicalwebteam.form_generator.app.open"
+            ) as mock_file_open:
+                result = form_generator._load_form_json(file_path)
+
+        self.assertIn("/test", result)
+        mock_stat.assert_not_called()
+        mock_file_open.assert_not_called()
+
+    def test_invalid_cache_validation(self):
+        """
+        Test FormGenerator rejects unknown cache_validation values.
+        """
+        with self.assertRaises(ValueError):
+            FormGenerator(
+                self.app, self.form_template_path, cache_validation="x"
+            )
+
+    @patch(
+        "canonicalwebteam.form_generator.app.render_template",
+        return_value="<form></form>",
+    )
+    def test_load_form_render_cache(self, mock_render_template):
+        """
+        Test load_form reuses rendered forms for the same arguments.
+        """
+        form_generator = FormGenerator(
+            self.app, self.form_template_path, render_cache=RenderCache()
+        )
+        form_generator._load_form_json = MagicMock(
+            return_value={"/test": {"fieldsets": [], "formData": {}}}
+        )
+        form_generator.form_metadata = {
+            "/test": {"file_path": "path/to/form.json", "template": "test"}
+        }
+
+        form_generator.load_form("/test", title="Title")
+        html = form_generator.load_form("/test", title="Title")
+        form_generator.load_form("/test", title="Other title")
+
+        self.assertEqual(html, "<form></form>")
+        self.assertEqual(mock_render_template.call_count, 2)
+        self.assertEqual(form_generator.render_cache.hits, 1)
+        self.assertEqual(form_generator.render_cache.misses, 2)
+
+    @patch(
+        "canonicalwebteam.form_generator.app.render_template",
+        return_value="<form></form>",
+    )
+    def test_warm(self, mock_render_template):
+        """
+        Test warm renders the default variant of every form path.
+        """
+        form_generator = FormGenerator(
+            self.app, self.form_template_path, render_cache=RenderCache()
+        )
+        form_generator._load_form_json = MagicMock(
+            return_value={"/test": {"fieldsets": [], "formData": {}}}
+        )
+        form_generator.form_metadata = {
+            "/test": {"file_path": "path/to/form.json", "template": "test"},
+            "/child": {
+                "file_path": "path/to/form.json",
+                "template": "test",
+                "is_child": True,
+                "parent_path": "/test",
+            },
+        }
+
+        self.assertEqual(form_generator.warm(max_workers=2), 2)
+        self.assertEqual(len(form_generator.render_cache), 2)
+
+        form_generator.load_form("/child")
+        self.assertEqual(mock_render_template.call_count, 2)
+
+    def test_warm_without_render_cache(self):
+        """
+        Test warm requires a render cache.
+        """
+        form_generator = FormGenerator(self.app, self.form_template_path)
+
+        with self.assertRaises(ValueError):
+            form_generator.warm()
+
+    def test_load_forms_builds_form_index(self):
+        """
+        Test load_forms compiles parent and child paths into the form index.
+        """
+        form_generator = FormGenerator(self.app, self.form_template_path)
+
+        with tempfile.TemporaryDirectory() as directory:
+            form_generator.templates_folder = Path(directory)
+            self._write_form_file(
+                directory,
+                {
+                    "/parent": {
+                        "templatePath": "parent.html",
+                        "isModal": True,
+                        "modalId": "modal",
+                        "fieldsets": [{"fields": []}],
+                        "formData": {"title": "Parent Form"},
+                        "childrenPaths": ["/child/index"],
+                    }
+                },
+            )
+            form_generator.load_forms()
+
+        parent = form_generator.form_index["/parent"]
+        child = form_generator.form_index["/child"]
+
+        self.assertEqual(parent.template, "parent")
+        self.assertTrue(parent.is_modal)
+        self.assertEqual(parent.modal_id, "modal")
+        self.assertFalse(parent.is_child)
+        self.assertEqual(child.parent_path, "/parent")
+        self.assertTrue(child.is_child)
+        self.assertIs(child.fieldsets, parent.fieldsets)
+        self.assertIs(child.form_data, parent.form_data)
+
+        with self.assertRaises(TypeError):
+            parent.form_data["title"] = "Changed"
+
+        # form_metadata is a view of the form index, not a second copy
+        self.assertEqual(form_generator._forms.metadata, {})
+        self.assertEqual(
+            sorted(form_generator.form_metadata), ["/child", "/parent"]
+        )
+        self.assertEqual(
+            form_generator.form_metadata["/child"],
+            {
+                "file_path": child.file_path,
+                "template": "parent",
+                "is_child": True,
+                "parent_path": "/parent",
+            },
+        )
+        with self.assertRaises(TypeError):
+            form_generator.form_metadata["/other"] = {}
+
+    @patch("canonicalwebteam.form_generator.app.render_template")
+    def test_load_form_uses_form_index(self, mock_render_template):
+        """
+        Test load_form renders from the form index without loading the JSON
+        file when cache_validation is None.
+        """
+        form_generator = FormGenerator(
+            self.app, self.form_template_path, cache_validation=None
+        )
+        form_generator._load_form_json = MagicMock()
+        form_generator._index_forms(
+            Path("path/to/form-data.json"),
+            {
+                "/parent": {
+                    "templatePath": "parent.html",
+                    "fieldsets": [],
+                    "formData": {"title": "Parent Form"},
+                    "childrenPaths": ["/child"],
+                }
+            },
+        )
+
+        form_generator.load_form("/child", product="Product")
+
+        form_generator._load_form_json.assert_not_called()
+        kwargs = mock_render_template.call_args[1]
+        self.assertEqual(
+            kwargs["formData"], {"title": "Parent Form", "product": "Product"}
+        )
+        self.assertEqual(kwargs["path"], "/child")
+
+    @patch("canonicalwebteam.form_generator.app.render_template")
+    def test_load_form_recompiles_changed_file(self, mock_render_template):
+        """
+        Test load_form picks up changes to an indexed form-data.json file.
+        """
+        form_generator = FormGenerator(self.app, self.form_template_path)
+
+        with tempfile.TemporaryDirectory() as directory:
+            form_generator.templates_folder = Path(directory)
+            form = {"templatePath": "test.html", "fieldsets": []}
+            self._write_form_file(
+                directory, {"/test": {**form, "formData": {"title": "Old"}}}
+            )
+            form_generator.load_forms()
+
+            self._write_form_file(
+                directory,
+                {"/test": {**form, "formData": {"title": "Updated title"}}},
+            )
+            form_generator.load_form("/test")
+
+        kwargs = mock_render_template.call_args[1]
+        self.assertEqual(kwargs["formData"], {"title": "Updated title"})
+
+    def _write_form_tree(self, directory, folders):
+        for folder in folders:
+            (Path(directory) / folder).mkdir(parents=True)
+            self._write_form_file(
+                Path(directory) / folder,
+                {f"/{folder}": {"templatePath": f"{folder}/index.html"}},
+            )
+
+    def test_load_forms_drops_deleted_files(self):
+        """
+        Test a full load_forms forgets the forms of form-data.json files
+        deleted since the previous load, with or without a manifest.
+        """
+        for use_manifest in (False, True):
+            form_generator = FormGenerator(self.app, self.form_template_path)
+
+            with tempfile.TemporaryDirectory() as directory:
+                form_generator.templates_folder = Path(directory)
+                manifest = (
+                    Path(directory, "manifest.json") if use_manifest else None
+                )
+                self._write_form_tree(directory, ["a", "b"])
+                form_generator.load_forms(manifest=manifest)
+
+                Path(directory, "b", "form-data.json").unlink()
+                form_generator.load_forms(manifest=manifest)
+
+                self.assertEqual(sorted(form_generator.form_index), ["/a"])
+                self.assertEqual(
+                    sorted(form_generator._forms.file_paths),
+                    [str(Path(directory, "a", "form-data.json"))],
+                )
+
+    def test_load_forms_include_exclude(self):
+        """
+        Test load_forms skips excluded directories and paths not included.
+        """
+        form_generator = FormGenerator(self.app, self.form_template_path)
+
+        with tempfile.TemporaryDirectory() as directory:
+            form_generator.templates_folder = Path(directory)
+            self._write_form_tree(
+                directory,
+                [
+                    "data/contact",
+                    "data/legacy",
+                    "cloud",
+                    ".hidden",
+                    "node_modules/package",
+                ],
+            )
+
+            form_generator.load_forms(
+                include=["data/*"],
+                exclude=FormGenerator.DEFAULT_EXCLUDE + ("data/legacy",),
+            )
+
+        self.assertEqual(list(form_generator.form_metadata), ["/data/contact"])
+
+    def test_load_forms_workers(self):
+        """
+        Test load_forms produces the same metadata with worker pools.
+        """
+        folders = [f"section-{i}" for i in range(8)]
+        results = []
+
+        for workers, executor in [
+            (None, "thread"),
+            (4, "thread"),
+            (2, "process"),
+        ]:
+            form_generator = FormGenerator(self.app, self.form_template_path)
+
+            with tempfile.TemporaryDirectory() as directory:
+                form_generator.templates_folder = Path(directory)
+                self._write_form_tree(directory, folders)
+                form_generator.load_forms(workers=workers, executor=executor)
+
+            results.append(list(form_generator.form_index))
+
+        self.assertEqual(results[0], [f"/{folder}" for folder in folders])
+        self.assertEqual(results[1], results[0])
+        self.assertEqual(results[2], results[0])
+
+    def test_load_forms_invalid_executor(self):
+        """
+        Test load_forms rejects unknown executor values.
+        """
+        form_generator = FormGenerator(self.app, self.form_template_path)
+
+        with self.assertRaises(ValueError):
+            form_generator.load_forms(workers=2, executor="fibers")
+
+    def test_load_forms_manifest(self):
+        """
+        Test load_forms writes a manifest and loads forms back from it
+        without parsing unchanged files.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            templates = Path(directory) / "templates"
+            manifest = Path(directory) / "forms-manifest.json"
+            self._write_form_tree(templates, ["data", "cloud", "removed"])
+
+            mock_loads = MagicMock(wraps=json.loads)
+            form_generator = FormGenerator(
+                self.app,
+                self.form_template_path,
+                json_backend=JSONBackend("json", mock_loads),
+            )
+            form_generator.templates_folder = templates
+            form_generator.load_forms(manifest=manifest)
+            self.assertTrue(manifest.exists())
+            # Each file is parsed once, and the manifest is written from it
+            self.assertEqual(mock_loads.call_count, 3)
+
+            self._write_form_file(
+                templates / "data",
+                {"/data/updated": {"templatePath": "data/index.html"}},
+            )
+            (templates / "removed" / "form-data.json").unlink()
+
+            mock_loads = MagicMock(wraps=json.loads)
+            form_generator = FormGenerator(
+                self.app,
+                self.form_template_path,
+                json_backend=JSONBackend("json", mock_loads),
+            )
+            form_generator.templates_folder = templates
+            form_generator.load_forms(manifest=manifest)
+
+            self.assertEqual(
+                sorted(form_generator.form_metadata),
+                ["/cloud", "/data/updated"],
+            )
+            # Only the manifest and the changed file
+            self.assertEqual(mock_loads.call_count, 2)
+
+            with open(manifest) as manifest_file:
+                sources = json.load(manifest_file)["sources"]
+            self.assertEqual(
+                sorted(sources),
+                ["cloud/form-data.json", "data/form-data.json"],
+            )
+            self.assertIn(
+                "/data/updated", sources["data/form-data.json"]["data"]["form"]
+            )
+
+            # The updated manifest is used as it is
+            mock_loads.reset_mock()
+            form_generator.load_forms(manifest=manifest)
+            self.assertEqual(mock_loads.call_count, 1)
+
+    @patch("canonicalwebteam.form_generator.app.gc_freeze")
+    def test_preload(self, mock_gc_freeze):
+        """
+        Test preload loads and warms the forms, then freezes the GC.
+        """
+        form_generator = FormGenerator(self.app, self.form_template_path)
+        form_generator.load_forms = MagicMock()
+        form_generator.warm = MagicMock()
+
+        form_generator.preload(warm=True, workers=4)
+
+        form_generator.load_forms.assert_called_once_with(workers=4)
+        form_generator.warm.assert_called_once()
+        mock_gc_freeze.assert_called_once()
+
+    def test_reload_and_remove_file(self):
+        """
+        Test reload_file and remove_file update only the paths of one file.
+        """
+        form_generator = FormGenerator(
+            self.app, self.form_template_path, cache_validation=None
+        )
+
+        with tempfile.TemporaryDirectory() as directory:
+            form_generator.templates_folder = Path(directory)
+            self._write_form_tree(directory, ["data", "cloud"])
+            form_generator.load_forms()
+            snapshot = form_generator._forms
+
+            file_path = self._write_form_file(
+                Path(directory) / "data",
+                {
+                    "/data/new": {
+                        "templatePath": "data/index.html",
+                        "childrenPaths": ["/data/new/child"],
+                    }
+                },
+            )
+            form_generator.reload_file(file_path)
+
+        self.assertEqual(
+            sorted(form_generator.form_index),
+            ["/cloud", "/data/new", "/data/new/child"],
+        )
+        # The previous snapshot is left untouched for current readers
+        self.assertEqual(sorted(snapshot.index), ["/cloud", "/data"])
+
+        form_generator.remove_file(file_path)
+        self.assertEqual(sorted(form_generator.form_metadata), ["/cloud"])
+        self.assertEqual(sorted(form_generator.form_index), ["/cloud"])
+
+    @patch(
+        "canonicalwebteam.form_generator.app.render_template",
+        new=lambda *args, **kwargs: "<form></form>",
+    )
+    def test_load_form_removed_child_path(self):
+        """
+        Test a child path removed from a changed file isn't rendered or
+        indexed again from the previous version of the file.
+        """
+        form_generator = FormGenerator(self.app, self.form_template_path)
+
+        with tempfile.TemporaryDirectory() as directory:
+            form_generator.templates_folder = Path(directory)
+            form = {
+                "templatePath": "data/index.html",
+                "fieldsets": [],
+                "childrenPaths": ["/data/mysql", "/data/postgresql"],
+            }
+            file_path = self._write_form_file(directory, {"/data": form})
+            form_generator.load_forms()
+            self.assertEqual(
+                form_generator.load_form("/data/mysql"), "<form></form>"
+            )
+
+            form["childrenPaths"] = ["/data/postgresql"]
+            self._write_form_file(directory, {"/data": form})
+            os.utime(file_path, ns=(1, 1))
+
+            for _ in range(2):
+                with self.assertRaises(NotFound):
+                    form_generator.load_form("/data/mysql")
+                self.assertNotIn("/data/mysql", form_generator.form_index)
+                self.assertNotIn("/data/mysql", form_generator.form_metadata)
+            self.assertEqual(
+                form_generator.load_form("/data/postgresql"), "<form></form>"
+            )
+
+    @patch(
+        "canonicalwebteam.form_generator.app.render_template",
+        new=lambda *args, **kwargs: "<form></form>",
+    )
+    def test_reload_file_concurrent_readers(self):
+        """
+        Stress test readers never see parent and child entries from
+        different versions of a file while it's being reloaded.
+        """
+        form_generator = FormGenerator(
+            self.app, self.form_template_path, cache_validation=None
+        )
+        errors = []
+        done = threading.Event()
+
+        def write_version(directory, version):
+            children = ["/child"]
+            if version % 2:
+                children.append("/child-extra")
+            temp_path = Path(directory) / "form-data.json.tmp"
+            temp_path.write_text(
+                json.dumps(
+                    {
+                        "form": {
+                            "/parent": {
+                                "templatePath": "parent.html",
+                                "fieldsets": [],
+                                "formData": {"title": f"v{version}"},
+                                "childrenPaths": children,
+                            }
+                        }
+                    }
+                )
+            )
+            os.replace(temp_path, Path(directory) / "form-data.json")
+
+        def read():
+            while not done.is_set():
+                try:
+                    index = form_generator.form_index
+                    title = index["/parent"].form_data["title"]
+                    for path in ("/child", "/child-extra"):
+                        entry = index.get(path)
+                        if entry is not None:
+                            self.assertEqual(entry.form_data["title"], title)
+                    if "/child-extra" in index:
+                        self.assertEqual(int(title[1:]) % 2, 1)
+                    form_generator.load_form("/child", title="Title")
+                except Exception as e:
+                    errors.append(e)
+                    return
+
+        with tempfile.TemporaryDirectory() as directory:
+            form_generator.templates_folder = Path(directory)
+            write_version(directory, 0)
+            form_generator.load_forms()
+
+            readers = [threading.Thread(target=read) for _ in range(4)]
+            for reader in readers:
+                reader.start()
+
+            for version in range(1, 100):
+                write_version(directory, version)
+                form_generator.reload_file(Path(directory) / "form-data.json")
+
+            done.set()
+            for reader in readers:
+                reader.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(
+            form_generator.form_index["/child"].form_data["title"], "v99"
+        )
+
+    def test_load_form_async(self):
+        """
+        Test the async load_form is registered and renders forms in an async
+        Jinja environment.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            app = Flask(__name__, template_folder=directory)
+            app.jinja_options = {"enable_async": True}
+            Path(directory, "form.html").write_text(
+                "<form>{{ formData.title }} {{ path }}</form>"
+            )
+            Path(directory, "page.html").write_text(
+                "{{ load_form('/child', title='Async') | safe }}"
+            )
+            self._write_form_file(
+                directory,
+                {
+                    "/parent": {
+                        "templatePath": "parent.html",
+                        "fieldsets": [],
+                        "childrenPaths": ["/child"],
+                    }
+                },
+            )
+
+            form_generator = FormGenerator(app, "form.html")
+            form_generator.templates_folder = Path(directory)
+            form_generator.load_forms()
+
+            self.assertEqual(
+                app.jinja_env.globals["load_form"],
+                form_generator.load_form_async,
+            )
+
+            with app.app_context():
+                html = asyncio.run(
+                    app.jinja_env.get_template("page.html").render_async()
+                )
+
+        self.assertEqual(html, "<form>Async /child</form>")
+
+    def test_async_render_cache_off_event_loop(self):
+        """
+        Test the async variants read and write shared render caches outside
+        the event loop thread.
+        """
+        threads = []
+
+        class ThreadCache(CacheBackend):
+            def __init__(self):
+                self.fragments = {}
+
+            def get(self, key):
+                threads.append(threading.get_ident())
+                return self.fragments.get(key)
+
+            def set(self, key, value):
+                threads.append(threading.get_ident())
+                self.fragments[key] = value
+
+            def clear(self):
+                self.fragments.clear()
+
+        with tempfile.TemporaryDirectory() as directory:
+            app = Flask(__name__, template_folder=directory)
+            app.jinja_options = {"enable_async": True}
+            Path(directory, "form.html").write_text(
+                "<form>{{ formData.title }}</form>"
+            )
+            self._write_form_file(
+                directory,
+                {"/aws": {"templatePath": "aws.html", "fieldsets": []}},
+            )
+            form_generator = FormGenerator(
+                app, "form.html", render_cache=ThreadCache()
+            )
+            form_generator.templates_folder = Path(directory)
+            form_generator.load_forms()
+
+            async def render():
+                loop_thread = threading.get_ident()
+                html = [
+                    await form_generator.load_form_async("/aws", title="A"),
+                    await form_generator.load_form_async("/aws", title="A"),
+                    *await form_generator.load_forms_batch_async(
+                        [{"form_path": "/aws", "title": "B"}, "/aws"]
+                    ),
+                ]
+                return loop_thread, html
+
+            with app.app_context():
+                loop_thread, html = asyncio.run(render())
+
+        self.assertEqual(
+            html,
+            [
+                "<form>A</form>",
+                "<form>A</form>",
+                "<form>B</form>",
+                "<form></form>",
+            ],
+        )
+        self.assertEqual(len(threads), 7)
+        self.assertNotIn(loop_thread, threads)
+
+    def test_prerender_command(self):
+        """
+        Test 'flask forms prerender' writes every form path and a manifest,
+        and load_form serves them unless parameters are overridden.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            app = Flask(__name__, template_folder=directory)
+            Path(directory, "form.html").write_text(
+                "<form>{{ formData.title }} {{ path }}</form>"
+            )
+            self._write_form_file(
+                directory,
+                {
+                    "/parent": {
+                        "templatePath": "parent.html",
+                        "fieldsets": [],
+                        "formData": {"title": "Parent"},
+                        "childrenPaths": ["/parent/child/index"],
+                    }
+                },
+            )
+            form_generator = FormGenerator(
+                app, "form.html", cache_validation=None
+            )
+            form_generator.templates_folder = Path(directory)
+            output = Path(directory) / "fragments"
+
+            result = app.test_cli_runner().invoke(
+                args=["forms", "prerender", "--output", str(output)]
+            )
+
+            self.assertEqual(result.exit_code, 0, result.output)
+            self.assertIn("Rendered 2 forms", result.output)
+            self.assertEqual(
+                (output / "parent" / "child.html").read_text(),
+                "<form>Parent /parent/child</form>",
+            )
+            with open(output / "manifest.json") as manifest_file:
+                manifest = json.load(manifest_file)
+            self.assertEqual(
+                sorted(manifest["forms"]), ["/parent", "/parent/child"]
+            )
+
+            self.assertEqual(form_generator.load_prerendered(output), 2)
+
+        with patch(
+            "canonicalwebteam.form_generator.app.render_template",
+            return_value="<form>Live</form>",
+        ) as mock_render_template:
+            self.assertEqual(
+                form_generator.load_form("/parent"), "<form>Parent None</form>"
+            )
+            mock_render_template.assert_not_called()
+
+            self.assertEqual(
+                form_generator.load_form("/parent", title="Other"),
+                "<form>Live</form>",
+            )
+
+    @patch(
+        "canonicalwebteam.form_generator.app.render_template",
+        return_value="<form></form>",
+    )
+    def test_hooks(self, mock_render_template):
+        """
+        Test hooks and form_timed receivers get the timed phases.
+        """
+        form_generator = FormGenerator(
+            self.app, self.form_template_path, render_cache=RenderCache()
+        )
+        phases = []
+        signalled = []
+
+        form_generator.add_hook(
+            lambda phase, duration, **info: phases.append((phase, info))
+        )
+
+        def receiver(sender, phase, duration, **info):
+            signalled.append(phase)
+
+        with tempfile.TemporaryDirectory() as directory:
+            form_generator.templates_folder = Path(directory)
+            file_path = self._write_form_file(
+                directory,
+                {"/test": {"templatePath": "test.html", "fieldsets": []}},
+            )
+            size = file_path.stat().st_size
+
+            with form_timed.connected_to(receiver, sender=form_generator):
+                form_generator.load_forms()
+                form_generator.load_form("/test")
+                form_generator.load_form("/test")
+
+        self.assertEqual(
+            [phase for phase, _ in phases],
+            [
+                "parse",
+                "load_file",
+                "load_json",
+                "lookup",
+                "cache_miss",
+                "merge",
+                "render",
+                "load_form",
+                "load_json",
+                "lookup",
+                "cache_hit",
+                "load_form",
+            ],
+        )
+        self.assertEqual(phases[0][1]["file_path"], file_path)
+        self.assertEqual(phases[0][1]["size"], size)
+        self.assertEqual(phases[-1][1], {"form_path": "/test"})
+        self.assertEqual(signalled, [phase for phase, _ in phases])
+
+    def test_hooks_not_timed_by_default(self):
+        """
+        Test phases aren't timed without hooks or signal receivers.
+        """
+        form_generator = FormGenerator(self.app, self.form_template_path)
+        hook = MagicMock()
+
+        self.assertFalse(form_generator._is_timed())
+        form_generator.add_hook(hook)
+        self.assertTrue(form_generator._is_timed())
+        form_generator.remove_hook(hook)
+        self.assertFalse(form_generator._is_timed())
+
+    def test_fieldsets_template(self):
+        """
+        Test the fieldsets template is rendered once per form and reused
+        with different overrides and child paths.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            app = Flask(__name__, template_folder=directory)
+            Path(directory, "form.html").write_text(
+                "<form>{{ formData.title }}{{ fieldsets_html }}</form>"
+            )
+            Path(directory, "fieldsets.html").write_text(
+                "{% for fieldset in fieldsets %}"
+                "<fieldset>{{ fieldset.title }}</fieldset>"
+                "{% endfor %}"
+            )
+            self._write_form_file(
+                directory,
+                {
+                    "/data": {
+                        "templatePath": "data.html",
+                        "fieldsets": [{"title": "About you"}],
+                        "childrenPaths": ["/data/mysql"],
+                    }
+                },
+            )
+
+            form_generator = FormGenerator(
+                app,
+                "form.html",
+                cache_validation=None,
+                fieldsets_template_path="fieldsets.html",
+            )
+            form_generator.templates_folder = Path(directory)
+            form_generator.load_forms()
+            phases = []
+            form_generator.add_hook(
+                lambda phase, duration, **info: phases.append(phase)
+            )
+
+            with app.app_context():
+                postgresql = form_generator.load_form(
+                    "/data", title="PostgreSQL"
+                )
+                mysql = form_generator.load_form("/data/mysql", title="MySQL")
+
+        self.assertEqual(
+            postgresql, "<form>PostgreSQL<fieldset>About you</fieldset></form>"
+        )
+        self.assertEqual(
+            mysql, "<form>MySQL<fieldset>About you</fieldset></form>"
+        )
+        self.assertEqual(phases.count("render_fieldsets"), 1)
+        self.assertEqual(phases.count("render"), 2)
+
+    def test_fieldsets_template_auto_reload(self):
+        """
+        Test rendered fieldsets aren't reused once the fieldsets template
+        changes, when templates auto-reload.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            app = Flask(__name__, template_folder=directory)
+            app.jinja_env.auto_reload = True
+            Path(directory, "form.html").write_text(
+                "<form>{{ fieldsets_html }}</form>"
+            )
+            fieldsets_path = Path(directory, "fieldsets.html")
+            fieldsets_path.write_text("FS-v1")
+            self._write_form_file(
+                directory,
+                {
+                    "/aws": {
+                        "templatePath": "aws.html",
+                        "fieldsets": [],
+                        "childrenPaths": ["/aws/contact"],
+                    }
+                },
+            )
+
+            form_generator = FormGenerator(
+                app,
+                "form.html",
+                render_cache=RenderCache(),
+                fieldsets_template_path="fieldsets.html",
+                context_processors=[],
+            )
+            form_generator.templates_folder = Path(directory)
+            form_generator.load_forms()
+
+            with app.app_context():
+                self.assertEqual(
+                    form_generator.load_form("/aws"), "<form>FS-v1</form>"
+                )
+                fieldsets_path.write_text("FS-v2")
+                os.utime(fieldsets_path, (1, 1))
+                for form_path in ("/aws", "/aws/contact"):
+                    self.assertEqual(
+                        form_generator.load_form(form_path),
+                        "<form>FS-v2</form>",
+                    )
+
+    def test_load_forms_batch(self):
+        """
+        Test load_forms_batch returns the same forms as load_form, in order,
+        checking each form-data.json file once.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            app = Flask(__name__, template_folder=directory)
+            Path(directory, "form.html").write_text(
+                "<form>{{ formData.title }} {{ isModal }}</form>"
+            )
+            Path(directory, "page.html").write_text(
+                "{% for form in load_forms_batch(forms) %}{{ form | safe }}"
+                "{% endfor %}"
+            )
+            for folder, title, children in (
+                ("data", "Data", ["/data/mysql"]),
+                ("cloud", "Cloud", []),
+            ):
+                Path(directory, folder).mkdir()
+                self._write_form_file(
+                    Path(directory, folder),
+                    {
+                        f"/{folder}": {
+                            "templatePath": f"{folder}/index.html",
+                            "fieldsets": [],
+                            "formData": {"title": title},
+                            "isModal": False,
+                            "childrenPaths": children,
+                        }
+                    },
+                )
+            forms = [
+                "/data",
+                {"form_path": "/cloud", "isModal": True},
+                {"form_path": "/data/mysql", "title": "MySQL"},
+                "/cloud",
+            ]
+
+            form_generator = FormGenerator(app, "form.html")
+            form_generator.templates_folder = Path(directory)
+            form_generator.load_forms()
+            self.assertIn("load_forms_batch", app.jinja_env.globals)
+
+            with app.app_context():
+                expected = [
+                    form_generator.load_form("/data"),
+                    form_generator.load_form("/cloud", isModal=True),
+                    form_generator.load_form("/data/mysql", title="MySQL"),
+                    form_generator.load_form("/cloud"),
+                ]
+                with patch.object(
+                    form_generator,
+                    "_load_form_json",
+                    wraps=form_generator._load_form_json,
+                ) as mock_load_form_json:
+                    batch = form_generator.load_forms_batch(forms)
+                    # One check of each form-data.json file
+                    self.assertEqual(mock_load_form_json.call_count, 2)
+                    page = app.jinja_env.get_template("page.html").render(
+                        forms=forms
+                    )
+
+            with self.assertRaises(TypeError):
+                form_generator.load_forms_batch([{"path": "/data"}])
+
+        self.assertEqual(batch, expected)
+        self.assertEqual(
+            expected,
+            [
+                "<form>Data False</form>",
+                "<form>Cloud True</form>",
+                "<form>MySQL False</form>",
+                "<form>Cloud False</form>",
+            ],
+        )
+        self.assertEqual(page, "".join(expected))
+
+    def test_load_forms_interns_fieldsets(self):
+        """
+        Test identical fieldsets in different files share one immutable
+        object when interning is enabled.
+        """
+        fieldsets = [{"id": "contact", "fields": [{"id": "email"}]}]
+
+        with tempfile.TemporaryDirectory() as directory:
+            for folder in ("data", "cloud"):
+                Path(directory, folder).mkdir()
+                self._write_form_file(
+                    Path(directory, folder),
+                    {
+                        f"/{folder}": {
+                            "templatePath": f"{folder}/index.html",
+                            "fieldsets": fieldsets,
+                        }
+                    },
+                )
+
+            form_generator = FormGenerator(
+                self.app, self.form_template_path, intern_fieldsets=True
+            )
+            form_generator.templates_folder = Path(directory)
+            form_generator.load_forms()
+
+            # Interning is opt-in
+            not_interned = FormGenerator(self.app, self.form_template_path)
+            not_interned.templates_folder = Path(directory)
+            not_interned.load_forms()
+
+        data = form_generator.form_index["/data"]
+        cloud = form_generator.form_index["/cloud"]
+        self.assertIs(data.fieldsets, cloud.fieldsets)
+        self.assertEqual(data.fieldsets[0]["fields"][0]["id"], "email")
+        self.assertEqual(
+            form_generator.interner.stats(),
+            {
+                "total": 8,
+                "unique": 4,
+                "bytes_saved": form_generator.interner.bytes_saved,
+            },
+        )
+        self.assertGreater(form_generator.interner.bytes_saved, 0)
+
+        self.assertIsNone(not_interned.interner)
+        self.assertEqual(not_interned.form_index["/data"].fieldsets, fieldsets)
+        self.assertIsInstance(not_interned.form_index["/data"].fieldsets, list)
+
+    def test_interner_drops_replaced_fieldsets(self):
+        """
+        Test editing and removing form-data.json files drops the interned
+        fieldsets no form uses anymore, and keeps the shared ones.
+        """
+        shared = [{"id": "consent", "fields": [{"id": "agree"}]}]
+
+        with tempfile.TemporaryDirectory() as directory:
+            form_generator = FormGenerator(
+                self.app, self.form_template_path, intern_fieldsets=True
+            )
+            form_generator.templates_folder = Path(directory)
+            file_paths = {}
+            for folder in ("data", "cloud"):
+                Path(directory, folder).mkdir()
+                file_paths[folder] = self._write_form_file(
+                    Path(directory, folder),
+                    {
+                        f"/{folder}": {
+                            "templatePath": f"{folder}/index.html",
+                            "fieldsets": shared,
+                        }
+                    },
+                )
+            form_generator.load_forms()
+            unique = len(form_generator.interner)
+
+            for version in range(20):
+                self._write_form_file(
+                    Path(directory, "data"),
+                    {
+                        "/data": {
+                            "templatePath": "data/index.html",
+                            "fieldsets": shared + [{"id": f"v{version}"}],
+                        }
+                    },
+                )
+                form_generator.reload_file(file_paths["data"])
+
+            # The shared fieldsets, and the array and object of the latest
+            # version
+            self.assertEqual(len(form_generator.interner), unique + 2)
+            self.assertIs(
+                form_generator.form_index["/data"].fieldsets[0],
+                form_generator.form_index["/cloud"].fieldsets[0],
+            )
+
+            form_generator.remove_file(file_paths["data"])
+            self.assertEqual(len(form_generator.interner), unique)
+            form_generator.remove_file(file_paths["cloud"])
+            self.assertEqual(len(form_generator.interner), 0)
+
+    def test_pattern_children_paths(self):
+        """
+        Test childrenPaths patterns load their parent form, after exact
+        paths and more specific patterns, and are removed with their file.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            file_path = self._write_form_file(
+                directory,
+                {
+                    "/data": {
+                        "templatePath": "data/index.html",
+                        "formData": {"title": "Data"},
+                        "childrenPaths": ["/data/*", "/cloud/**/contact"],
+                    },
+                    "/data/special": {
+                        "templatePath": "data/special.html",
+                        "formData": {"title": "Special"},
+                        "childrenPaths": ["/data/special/*"],
+                    },
+                },
+            )
+            form_generator = FormGenerator(self.app, self.form_template_path)
+            form_generator.templates_folder = Path(directory)
+            form_generator.load_forms()
+
+            def parent_path(form_path):
+                entry = form_generator._get_form_entry(form_path)
+                return entry.parent_path or entry.path
+
+            self.assertEqual(parent_path("/data/mongodb"), "/data")
+            self.assertEqual(parent_path("/data/special"), "/data/special")
+            self.assertEqual(
+                parent_path("/data/special/kafka"), "/data/special"
+            )
+            self.assertEqual(parent_path("/cloud/contact"), "/data")
+            self.assertEqual(parent_path("/cloud/a/b/contact"), "/data")
+            self.assertNotIn("/data/mongodb", form_generator.form_index)
+            self.assertNotIn("/data/*", form_generator._form_paths())
+
+            with patch(
+                "canonicalwebteam.form_generator.app.abort",
+                side_effect=Exception("404"),
+            ):
+                with self.assertRaises(Exception):
+                    form_generator._get_form_entry("/data/a/b")
+
+                Path(file_path).unlink()
+                form_generator.remove_file(Path(file_path))
+                with self.assertRaises(Exception):
+                    form_generator._get_form_entry("/data/mongodb")
+
+    def _compiled_form_generator(self, directory: str, **kwargs):
+        app = Flask(__name__, template_folder=directory)
+
+        @app.context_processor
+        def allowed():
+            return {"site": "ubuntu.com"}
+
+        @app.context_processor
+        def not_allowed():
+            return {"user": "someone"}
+
+        Path(directory, "form.html").write_text(
+            "<form>{{ formData.title }} {{ site }} {{ user }}</form>"
+        )
+        self._write_form_file(
+            directory,
+            {
+                "/aws": {
+                    "templatePath": "aws.html",
+                    "formData": {"title": "AWS"},
+                }
+            },
+        )
+        form_generator = FormGenerator(
+            app, "form.html", context_processors=["allowed"], **kwargs
+        )
+        form_generator.templates_folder = Path(directory)
+        form_generator.load_forms()
+        return app, form_generator
+
+    def test_context_processors_allow_list(self):
+        """
+        Test forms are rendered from the compiled template, without
+        render_template, with only the allowed context processors.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            app, form_generator = self._compiled_form_generator(directory)
+
+            with patch(
+                "canonicalwebteam.form_generator.app.render_template",
+                side_effect=AssertionError("render_template called"),
+            ), app.test_request_context("/"):
+                html = form_generator.load_form("/aws")
+                (batch_html,) = form_generator.load_forms_batch(["/aws"])
+
+        self.assertEqual(html, "<form>AWS ubuntu.com </form>")
+        self.assertEqual(batch_html, html)
+
+    def test_compiled_template_auto_reload(self):
+        """
+        Test the compiled template is only reloaded when it changes if the
+        Jinja environment auto-reloads templates.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            app, form_generator = self._compiled_form_generator(directory)
+            form_generator.compile_templates()
+            template_path = Path(directory, "form.html")
+
+            def update_template(source):
+                template_path.write_text(source)
+                mtime = template_path.stat().st_mtime + 10
+                os.utime(template_path, (mtime, mtime))
+
+            with app.test_request_context("/"):
+                app.jinja_env.auto_reload = False
+                update_template("<form>changed</form>")
+                self.assertIn("AWS", form_generator.load_form("/aws"))
+
+                app.jinja_env.auto_reload = True
+                self.assertEqual(
+                    form_generator.load_form("/aws"), "<form>changed</form>"
+                )
+
+    def test_stream_form(self):
+        """
+        Test forms are streamed in chunks from stream_form, including from
+        pages rendered with stream_template, and cached once streamed.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            app = Flask(__name__, template_folder=directory)
+            Path(directory, "form.html").write_text(
+                "<form>{% for fieldset in fieldsets %}"
+                "<fieldset>{{ fieldset.id }}</fieldset>{% endfor %}</form>"
+            )
+            Path(directory, "page.html").write_text(
+                "<head></head>{% for chunk in stream_form('/aws') %}"
+                "{{ chunk | safe }}{% endfor %}"
+            )
+            self._write_form_file(
+                directory,
+                {
+                    "/aws": {
+                        "templatePath": "aws.html",
+                        "fieldsets": [{"id": i} for i in range(3)],
+                    }
+                },
+            )
+            render_cache = RenderCache()
+            form_generator = FormGenerator(
+                app, "form.html", render_cache=render_cache
+            )
+            form_generator.templates_folder = Path(directory)
+            form_generator.load_forms()
+
+            @app.route("/page")
+            def page():
+                return stream_template("page.html")
+
+            with app.test_request_context("/"), patch(
+                "canonicalwebteam.form_generator.app.STREAM_CHUNK_SIZE", 20
+            ):
+                chunks = list(form_generator.stream_form("/aws", formId=1))
+                html = form_generator.load_form("/aws", formId=1)
+                self.assertEqual(
+                    list(form_generator.stream_form("/aws", formId=1)),
+                    [html],
+                )
+
+                with patch(
+                    "canonicalwebteam.form_generator.app.abort",
+                    side_effect=Exception("404"),
+                ):
+                    with self.assertRaisesRegex(Exception, "404"):
+                        form_generator.stream_form("/unknown")
+
+            with patch(
+                "canonicalwebteam.form_generator.app.STREAM_CHUNK_SIZE", 1
+            ):
+                response = app.test_client().get("/page")
+                page_chunks = list(response.response)
+
+        self.assertGreater(len(chunks), 3)
+        self.assertTrue(all(len(chunk) >= 20 for chunk in chunks[:-1]))
+        self.assertEqual("".join(chunks), html)
+        self.assertEqual(render_cache.stats()["hits"], 2)
+        self.assertTrue(response.is_streamed)
+        self.assertGreater(len(page_chunks), 3)
+        self.assertEqual(page_chunks[0], b"<head></head>")
+        self.assertEqual(
+            b"".join(page_chunks), b"<head></head>" + html.encode()
+        )
+
+    def test_load_forms_lazy(self):
+        """
+        Test lazy loading only parses the form-data.json files of the
+        directories matching a path, and remembers missing paths.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            for folder, form_path in (
+                ("data", "/data"),
+                ("data/kafka", "/data/kafka"),
+                ("cloud", "/cloud"),
+            ):
+                Path(directory, folder).mkdir()
+                self._write_form_file(
+                    Path(directory, folder),
+                    {
+                        form_path: {
+                            "templatePath": f"{folder}/index.html",
+                            "childrenPaths": [f"{form_path}/contact"],
+                        }
+                    },
+                )
+            form_generator = FormGenerator(self.app, self.form_template_path)
+            form_generator.templates_folder = Path(directory)
+            form_generator.MAX_MISSING_PATHS = 2
+            form_generator.load_forms(lazy=True)
+            self.assertEqual(form_generator.form_index, {})
+
+            def loaded_files():
+                return sorted(
+                    Path(file_path).parent.relative_to(directory).as_posix()
+                    for file_path in form_generator._forms.file_paths
+                )
+
+            entry = form_generator._get_form_entry("/data/contact")
+            self.assertEqual(entry.parent_path, "/data")
+            self.assertEqual(loaded_files(), ["data"])
+
+            entry = form_generator._get_form_entry("/data/kafka/contact")
+            self.assertEqual(entry.parent_path, "/data/kafka")
+            self.assertEqual(loaded_files(), ["data", "data/kafka"])
+
+            with patch(
+                "canonicalwebteam.form_generator.app.abort",
+                side_effect=Exception("404"),
+            ), patch.object(
+                form_generator,
+                "_candidate_files",
+                wraps=form_generator._candidate_files,
+            ) as mock_candidate_files:
+                for form_path in (
+                    "/data/unknown",
+                    "/data/unknown",
+                    "/a",
+                    "/b",
+                ):
+                    with self.assertRaises(Exception):
+                        form_generator._get_form_entry(form_path)
+                with self.assertRaises(Exception):
+                    form_generator._get_form_entry("/../cloud")
+
+            self.assertEqual(mock_candidate_files.call_count, 4)
+            self.assertEqual(
+                list(form_generator._missing_paths), ["/b", "/../cloud"]
+            )
+            self.assertEqual(loaded_files(), ["data", "data/kafka"])
+
+    @patch(
+        "canonicalwebteam.form_generator.app.render_template",
+        new=lambda template, **context: context["formData"]["title"],
+    )
+    def test_load_forms_lazy_patterns(self):
+        """
+        Test lazy loading finds exact paths hidden by a loaded pattern, and
+        only scans for the paths a pattern matches once.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            for folder, form_path, title, children in (
+                ("data", "/data", "Data", ["/data/*"]),
+                ("data/special", "/data/special", "Special", []),
+            ):
+                Path(directory, folder).mkdir()
+                self._write_form_file(
+                    Path(directory, folder),
+                    {
+                        form_path: {
+                            "templatePath": f"{folder}/index.html",
+                            "formData": {"title": title},
+                            "childrenPaths": children,
+                        }
+                    },
+                )
+            form_generator = FormGenerator(self.app, self.form_template_path)
+            form_generator.templates_folder = Path(directory)
+            form_generator.load_forms(lazy=True)
+
+            self.assertEqual(form_generator.load_form("/data"), "Data")
+            self.assertEqual(form_generator.load_form("/data/other"), "Data")
+            with patch.object(
+                form_generator,
+                "_candidate_files",
+                wraps=form_generator._candidate_files,
+            ) as mock_candidate_files:
+                for _ in range(2):
+                    self.assertEqual(
+                        form_generator.load_form("/data/special"), "Special"
+                    )
+                    self.assertEqual(
+                        form_generator.load_form("/data/other"), "Data"
+                    )
+            # /data/other was already known to only match the pattern
+            self.assertEqual(mock_candidate_files.call_count, 1)
+
+    def test_form_store(self):
+        """
+        Test forms are kept in the form store rather than in the index or
+        the parsed files cache, and changes to their file are picked up.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            file_path = self._write_form_file(
+                directory,
+                {
+                    "/aws": {
+                        "templatePath": "aws.html",
+                        "fieldsets": [{"id": "about-you"}],
+                        "formData": {"title": "AWS"},
+                        "childrenPaths": ["/aws/contact"],
+                    }
+                },
+            )
+            form_store = TieredFormStore()
+            form_generator = FormGenerator(
+                self.app, self.form_template_path, form_store=form_store
+            )
+            form_generator.templates_folder = Path(directory)
+            form_generator.load_forms()
+
+            self.assertIsNone(form_generator.interner)
+            self.assertIsNone(form_generator.form_index["/aws"].fieldsets)
+            self.assertEqual(
+                [data for _, data in form_generator._form_json_cache.values()],
+                [None],
+            )
+
+            entry = form_generator._get_form_entry("/aws/contact")
+            self.assertEqual(entry.parent_path, "/aws")
+            self.assertEqual(entry.fieldsets, [{"id": "about-you"}])
+            self.assertEqual(entry.form_data["title"], "AWS")
+            self.assertEqual(len(form_store), 1)
+            previous_entry = form_generator.form_index["/aws/contact"]
+
+            def write_version(version):
+                with open(file_path, "w") as form_json:
+                    json.dump(
+                        {
+                            "form": {
+                                "/aws": {
+                                    "templatePath": "aws.html",
+                                    "fieldsets": [{"id": "changed"}],
+                                    "formData": {"title": f"v{version}"},
+                                }
+                            }
+                        },
+                        form_json,
+                    )
+                os.utime(file_path, ns=(version, version))
+
+            write_version(1)
+            form_generator.load_forms()
+            self.assertEqual(len(form_store), 1)
+            # Readers of the previous snapshot compile it from the file
+            entry = form_generator._load_stored_form(previous_entry)
+            self.assertEqual(entry.fieldsets, [{"id": "changed"}])
+
+            # Forms no longer used are dropped whenever forms are published
+            for version in range(2, 7):
+                write_version(version)
+                entry = form_generator._get_form_entry("/aws")
+                self.assertEqual(entry.form_data["title"], f"v{version}")
+                self.assertEqual(len(form_store), 1)
+            self.assertNotIn("/aws/contact", form_generator.form_index)
+
+            form_generator.reload_file(Path(file_path))
+            self.assertEqual(len(form_store), 1)
+
+    def test_conditional_requests(self):
+        """
+        Test the content hashes of rendered forms are folded into the
+        response ETag, and If-None-Match is answered with a 304 until a
+        form changes.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            app = Flask(__name__, template_folder=directory)
+            Path(directory, "form.html").write_text(
+                "<form>{{ formData.title }}</form>"
+            )
+            file_path = self._write_form_file(
+                directory,
+                {
+                    "/aws": {
+                        "templatePath": "aws.html",
+                        "fieldsets": [],
+                        "formData": {"title": "AWS"},
+                        "childrenPaths": ["/aws/contact"],
+                    }
+                },
+            )
+
+            form_generator = FormGenerator(
+                app, "form.html", conditional_requests=True
+            )
+            form_generator.templates_folder = Path(directory)
+            form_generator.load_forms()
+
+            app.add_url_rule(
+                "/aws", "aws", lambda: form_generator.load_form("/aws/contact")
+            )
+            app.add_url_rule("/plain", "plain", lambda: "No forms")
+            client = app.test_client()
+
+            response = client.get("/aws")
+            etag = response.get_etag()[0]
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.text, "<form>AWS</form>")
+            self.assertEqual(
+                form_generator.form_index["/aws/contact"].content_hash,
+                form_generator.form_index["/aws"].content_hash,
+            )
+
+            response = client.get("/aws", headers={"If-None-Match": etag})
+            self.assertEqual(response.status_code, 304)
+            self.assertIsNone(client.get("/plain").get_etag()[0])
+
+            # The same page, with a different form
+            self._write_form_file(
+                directory,
+                {
+                    "/aws": {
+                        "templatePath": "aws.html",
+                        "fieldsets": [{"title": "About you"}],
+                        "formData": {"title": "AWS"},
+                        "childrenPaths": ["/aws/contact"],
+                    }
+                },
+            )
+            form_generator.reload_file(file_path)
+
+            response = client.get("/aws", headers={"If-None-Match": etag})
+            self.assertEqual(response.status_code, 200)
+            self.assertNotEqual(response.get_etag()[0], etag)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,139 @@
+import gzip
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+from flask import Flask, render_template_string
+from canonicalwebteam.form_generator.app import FormGenerator
+from canonicalwebteam.form_generator.blueprint import (
+    brotli_compress,
+    build_definition,
+    IMMUTABLE_CACHE_CONTROL,
+)
+
+
+class TestFormsBlueprint(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        templates = Path(self.directory.name)
+        (templates / "form-data.json").write_text(
+            json.dumps(
+                {
+                    "form": {
+                        "/aws": {
+                            "templatePath": "aws/index.html",
+                            "isModal": True,
+                            "modalId": "aws-modal",
+                            "fieldsets": [{"title": "About you"}],
+                            "formData": {"title": "AWS"},
+                            "childrenPaths": ["/aws/contact"],
+                        }
+                    }
+                }
+            )
+        )
+
+        self.app = Flask(__name__)
+        self.form_generator = FormGenerator(
+            self.app, "form.html", definitions_url_prefix="/_forms"
+        )
+        self.form_generator.templates_folder = templates
+        self.form_generator.load_forms()
+        self.client = self.app.test_client()
+        self.content_hash = self.form_generator.form_index["/aws"].content_hash
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_definition(self):
+        """
+        Test definitions are served gzipped from content-addressed URLs
+        with immutable cache headers.
+        """
+        url = f"/_forms/{self.content_hash}.json"
+        response = self.client.get(
+            url, headers={"Accept-Encoding": "gzip, deflate"}
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers["Content-Encoding"], "gzip")
+        self.assertEqual(
+            response.headers["Cache-Control"], IMMUTABLE_CACHE_CONTROL
+        )
+        self.assertIn("Accept-Encoding", response.headers["Vary"])
+        self.assertEqual(
+            json.loads(gzip.decompress(response.data)),
+            {
+                "fieldsets": [{"title": "About you"}],
+                "formData": {"title": "AWS"},
+                "isModal": True,
+                "modalId": "aws-modal",
+            },
+        )
+
+        identity = self.client.get(url)
+        self.assertNotIn("Content-Encoding", identity.headers)
+        self.assertEqual(identity.json["formData"], {"title": "AWS"})
+
+        not_modified = self.client.get(
+            url,
+            headers={
+                "Accept-Encoding": "gzip",
+                "If-None-Match": response.headers["ETag"],
+            },
+        )
+        self.assertEqual(not_modified.status_code, 304)
+
+        self.assertEqual(
+            self.client.get("/_forms/unknown.json").status_code, 404
+        )
+
+    @unittest.skipIf(brotli_compress is None, "brotli isn't installed")
+    def test_definition_brotli(self):
+        """
+        Test brotli is preferred when the client accepts it.
+        """
+        response = self.client.get(
+            f"/_forms/{self.content_hash}.json",
+            headers={"Accept-Encoding": "gzip, br"},
+        )
+        self.assertEqual(response.headers["Content-Encoding"], "br")
+
+    def test_definition_serialized_once(self):
+        """
+        Test a definition is only serialized and compressed on first use.
+        """
+        with patch(
+            "canonicalwebteam.form_generator.app.build_definition",
+            wraps=build_definition,
+        ) as mock_build_definition:
+            for _ in range(2):
+                self.client.get(f"/_forms/{self.content_hash}.json")
+
+        mock_build_definition.assert_called_once()
+
+    def test_form_path_redirect(self):
+        """
+        Test form paths and childrenPaths redirect to the same
+        content-addressed URL, which templates can also get.
+        """
+        parent = self.client.get("/_forms/path/aws")
+        child = self.client.get("/_forms/path/aws/contact")
+
+        self.assertEqual(parent.status_code, 302)
+        self.assertEqual(parent.location, child.location)
+        self.assertEqual(parent.location, f"/_forms/{self.content_hash}.json")
+        self.assertEqual(
+            self.client.get("/_forms/path/unknown").status_code, 404
+        )
+
+        with self.app.test_request_context("/"):
+            url = render_template_string(
+                "{{ form_definition_url('/aws/contact') }}"
+            )
+        self.assertEqual(url, parent.location)
+
+
+if __name__ == "__main__":
+    unittest.main()
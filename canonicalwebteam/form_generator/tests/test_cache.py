@@ -0,0 +1,319 @@
+import socketserver
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from sys import getsizeof
+from unittest.mock import MagicMock, patch
+from flask import Flask
+from canonicalwebteam.form_generator.app import FormGenerator
+from canonicalwebteam.form_generator.cache import (
+    CacheBackend,
+    DiskRenderCache,
+    Redis,
+    RedisRenderCache,
+    RenderCache,
+)
+
+
+class RESPHandler(socketserver.StreamRequestHandler):
+    """
+    Answers the Redis commands used by RedisRenderCache, from a dict shared
+    by every connection.
+    """
+
+    def read_command(self) -> list:
+        line = self.rfile.readline()
+        if not line:
+            return None
+        arguments = []
+        for _ in range(int(line[1:])):
+            length = int(self.rfile.readline()[1:])
+            arguments.append(self.rfile.read(length + 2)[:-2])
+        return arguments
+
+    def write_bulk(self, value: bytes):
+        if value is None:
+            self.wfile.write(b"_\r\n" if self.resp3 else b"$-1\r\n")
+        else:
+            self.wfile.write(b"$%d\r\n%s\r\n" % (len(value), value))
+
+    def handle(self):
+        data = self.server.data
+        self.resp3 = False
+        while True:
+            command = self.read_command()
+            if command is None:
+                return
+            name = command[0].upper()
+            if name == b"GET":
+                self.write_bulk(data.get(command[1]))
+            elif name == b"SET":
+                data[command[1]] = command[2]
+                self.wfile.write(b"+OK\r\n")
+            elif name == b"DEL":
+                deleted = sum(
+                    data.pop(key, None) is not None for key in command[1:]
+                )
+                self.wfile.write(b":%d\r\n" % deleted)
+            elif name == b"HELLO":
+                # Apart from this map and nulls, RESP2 replies are valid RESP3
+                self.resp3 = command[1:2] == [b"3"]
+                self.wfile.write(b"%%1\r\n$5\r\nproto\r\n:%s\r\n" % command[1])
+            elif name == b"SCAN":
+                prefix = command[command.index(b"MATCH") + 1].rstrip(b"*")
+                keys = [key for key in data if key.startswith(prefix)]
+                self.wfile.write(b"*2\r\n$1\r\n0\r\n*%d\r\n" % len(keys))
+                for key in keys:
+                    self.write_bulk(key)
+            else:
+                self.wfile.write(b"-ERR unknown command\r\n")
+
+
+class TestRenderCache(unittest.TestCase):
+    def test_get_and_set(self):
+        """
+        Test cached values are returned and hits and misses are counted.
+        """
+        cache = RenderCache()
+
+        self.assertIsNone(cache.get("key"))
+        cache.set("key", "<form></form>")
+
+        self.assertEqual(cache.get("key"), "<form></form>")
+        self.assertEqual(cache.hits, 1)
+        self.assertEqual(cache.misses, 1)
+
+    def test_max_entries_evicts_least_recently_used(self):
+        """
+        Test the least recently used entry is evicted first.
+        """
+        cache = RenderCache(max_entries=2)
+        cache.set("a", "a")
+        cache.set("b", "b")
+        cache.get("a")
+        cache.set("c", "c")
+
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), "a")
+        self.assertEqual(cache.get("c"), "c")
+
+    def test_max_bytes(self):
+        """
+        Test entries are evicted to keep the cache under max_bytes.
+        """
+        value = "x" * 100
+        cache = RenderCache(max_bytes=getsizeof(value) * 2)
+        cache.set("a", value)
+        cache.set("b", value)
+        cache.set("c", value)
+
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get("a"))
+        self.assertLessEqual(cache.size, cache.max_bytes)
+
+        cache.set("big", "x" * 1000)
+        self.assertIsNone(cache.get("big"))
+
+    def test_clear(self):
+        """
+        Test clear drops entries but keeps the counters.
+        """
+        cache = RenderCache()
+        cache.set("a", "a")
+        cache.get("a")
+        cache.clear()
+
+        self.assertEqual(
+            cache.stats(), {"entries": 0, "bytes": 0, "hits": 1, "misses": 0}
+        )
+
+
+class TestSharedRenderCaches(unittest.TestCase):
+    def render_twice(self, render_cache) -> MagicMock:
+        """
+        Renders a form with two FormGenerator instances, as two workers
+        would, then again after its form-data.json changed.
+
+        :return: The mocked render_template of the form template
+        """
+        render = MagicMock(return_value="<form></form>")
+
+        def worker():
+            form_generator = FormGenerator(
+                Flask(__name__), "form.html", render_cache=render_cache
+            )
+            form_generator.templates_folder = Path(self.directory.name)
+            form_generator.load_forms()
+            form_generator._template_context = MagicMock(return_value={})
+            return form_generator
+
+        file_path = Path(self.directory.name) / "form-data.json"
+        file_path.write_text('{"form": {"/aws": {"templatePath": "a.html"}}}')
+        first, second = worker(), worker()
+        with patch(
+            "canonicalwebteam.form_generator.app.render_template", render
+        ):
+            first.load_form("/aws")
+            second.load_form("/aws")
+            self.assertEqual(render.call_count, 1)
+
+            file_path.write_text(
+                '{"form": {"/aws": {"templatePath": "b.html"}}}'
+            )
+            second.reload_file(file_path)
+            second.load_form("/aws")
+
+        return render
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_disk_render_cache(self):
+        """
+        Test workers share fragments through the disk cache, namespaced by
+        form content hash.
+        """
+        with tempfile.TemporaryDirectory() as cache_directory:
+            cache = DiskRenderCache(cache_directory, max_entries=10)
+            render = self.render_twice(cache)
+
+            self.assertEqual(render.call_count, 2)
+            self.assertEqual(
+                cache.stats(), {"entries": 2, "hits": 1, "misses": 2}
+            )
+            self.assertEqual(len(list(Path(cache_directory).iterdir())), 2)
+
+            cache.clear()
+            self.assertEqual(cache.stats()["entries"], 0)
+
+    def test_disk_render_cache_max_entries(self):
+        """
+        Test the least recently written fragments are removed.
+        """
+        with tempfile.TemporaryDirectory() as cache_directory:
+            cache = DiskRenderCache(cache_directory, max_entries=2)
+            for i in range(5):
+                cache.set((f"hash-{i}", "template", "/aws"), str(i))
+
+            self.assertEqual(cache.stats()["entries"], 2)
+            self.assertEqual(cache.get(("hash-4", "template", "/aws")), "4")
+            # Namespaces of previous form versions are removed with them
+            self.assertEqual(len(list(Path(cache_directory).iterdir())), 2)
+
+    def test_shared_caches_are_bounded(self):
+        """
+        Test shared caches reclaim old fragments by default.
+        """
+        with tempfile.TemporaryDirectory() as cache_directory:
+            self.assertIsNotNone(DiskRenderCache(cache_directory).max_entries)
+        self.assertIsNotNone(RedisRenderCache(MagicMock()).ttl)
+
+    def test_cache_backend_is_abstract(self):
+        """
+        Test backends must implement get, set and clear.
+        """
+
+        class GetOnly(CacheBackend):
+            def get(self, key):
+                return None
+
+        with self.assertRaises(TypeError):
+            GetOnly()
+
+        class DictCache(GetOnly):
+            def set(self, key, value):
+                pass
+
+            def clear(self):
+                pass
+
+        self.assertEqual(DictCache().stats(), {})
+
+    def test_template_hash_includes_partials(self):
+        """
+        Test the template hash of shared keys changes with the templates
+        the form template includes or imports, and with cache_version.
+        """
+        templates = Path(self.directory.name)
+        (templates / "form.html").write_text(
+            '{% import "macros.html" as macros %}'
+            '<form>{% include "_fields.html" %}</form>'
+        )
+        (templates / "macros.html").write_text(
+            "{% macro field() %}{% endmacro %}"
+        )
+        (templates / "_fields.html").write_text("<input>")
+
+        def template_hash(**kwargs):
+            app = Flask(__name__, template_folder=str(templates))
+            return FormGenerator(app, "form.html", **kwargs).template_hash()
+
+        first = template_hash()
+        self.assertEqual(template_hash(), first)
+
+        (templates / "_fields.html").write_text("<input required>")
+        second = template_hash()
+        self.assertNotEqual(second, first)
+
+        (templates / "macros.html").write_text(
+            "{% macro field() %}-{% endmacro %}"
+        )
+        self.assertNotEqual(template_hash(), second)
+
+        self.assertNotEqual(
+            template_hash(cache_version="2"), template_hash(cache_version="3")
+        )
+
+    @unittest.skipIf(Redis is None, "redis isn't installed")
+    def test_redis_render_cache(self):
+        """
+        Test workers share fragments through a Redis-compatible server.
+        """
+        server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), RESPHandler)
+        server.daemon_threads = True
+        server.data = {b"other:key": b"kept"}
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            host, port = server.server_address
+            cache = RedisRenderCache.from_url(
+                f"redis://{host}:{port}/0", prefix="forms:"
+            )
+            render = self.render_twice(cache)
+
+            self.assertEqual(render.call_count, 2)
+            self.assertEqual(
+                cache.stats(), {"hits": 1, "misses": 2, "errors": 0}
+            )
+            keys = sorted(key for key in server.data if key != b"other:key")
+            self.assertEqual(len(keys), 2)
+            # Namespaced by the content hash of each version of the form
+            self.assertNotEqual(keys[0].split(b":")[1], keys[1].split(b":")[1])
+
+            cache.clear()
+            self.assertEqual(server.data, {b"other:key": b"kept"})
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def test_redis_render_cache_errors(self):
+        """
+        Test server errors are counted as misses, without failing.
+        """
+        client = MagicMock()
+        client.get.side_effect = ConnectionError
+        client.set.side_effect = ConnectionError
+        cache = RedisRenderCache(client)
+
+        self.assertIsNone(cache.get(("hash", "template", "/aws")))
+        cache.set(("hash", "template", "/aws"), "<form></form>")
+        self.assertEqual(cache.stats(), {"hits": 0, "misses": 1, "errors": 2})
+
+
+if __name__ == "__main__":
+    unittest.main()
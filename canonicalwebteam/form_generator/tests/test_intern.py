@@ -0,0 +1,89 @@
+import json
+import pickle
+import unittest
+from canonicalwebteam.form_generator.intern import FormInterner, FrozenDict
+
+FIELDSETS = """[
+    {
+        "id": "about-you",
+        "fields": [
+            {"id": "country", "options": [{"value": 1}, {"value": true}]},
+            {"id": "consent", "required": true, "options": []}
+        ]
+    }
+]"""
+
+
+class TestFormInterner(unittest.TestCase):
+    def test_intern_shares_identical_subtrees(self):
+        """
+        Test identical subtrees are shared, and counted in the stats.
+        """
+        interner = FormInterner()
+        first = interner.intern(json.loads(FIELDSETS))
+        second = interner.intern(json.loads(FIELDSETS))
+
+        self.assertIs(first, second)
+        self.assertEqual(json.loads(json.dumps(first)), json.loads(FIELDSETS))
+        stats = interner.stats()
+        self.assertEqual(stats["total"], 2 * stats["unique"])
+        self.assertGreater(stats["bytes_saved"], 0)
+
+    def test_intern_keeps_types_apart(self):
+        """
+        Test values that compare equal but have different types, like 1 and
+        true, aren't shared.
+        """
+        interner = FormInterner()
+        options = interner.intern([{"value": 1}, {"value": True}])
+
+        self.assertIsNot(options[0], options[1])
+        self.assertIs(options[1]["value"], True)
+
+    def test_interned_values_are_immutable(self):
+        """
+        Test interned objects and arrays can't be modified, but can be
+        pickled.
+        """
+        interner = FormInterner()
+        fieldsets = interner.intern(json.loads(FIELDSETS))
+
+        self.assertIsInstance(fieldsets, tuple)
+        self.assertIsInstance(fieldsets[0], FrozenDict)
+        with self.assertRaises(TypeError):
+            fieldsets[0]["id"] = "changed"
+        with self.assertRaises(TypeError):
+            fieldsets[0].update(id="changed")
+        self.assertEqual(pickle.loads(pickle.dumps(fieldsets)), fieldsets)
+
+    def test_intern_interned_value(self):
+        """
+        Test interning an interned value again, e.g. after clear(), returns
+        it as it is.
+        """
+        interner = FormInterner()
+        fieldsets = interner.intern(json.loads(FIELDSETS))
+        interner.clear()
+
+        self.assertIs(interner.intern(fieldsets), fieldsets)
+        self.assertEqual(interner.stats()["bytes_saved"], 0)
+
+    def test_rebuild_keeps_values_in_use(self):
+        """
+        Test rebuild drops the nodes of values no longer in use, and keeps
+        the values passed to it and their subtrees as they are.
+        """
+        interner = FormInterner()
+        fieldsets = interner.intern(json.loads(FIELDSETS))
+        interner.intern([{"id": "replaced"}])
+        unique = len(interner)
+
+        interner.rebuild([fieldsets])
+
+        self.assertEqual(len(interner), unique - 2)
+        self.assertIs(interner.intern(json.loads(FIELDSETS)), fieldsets)
+        self.assertEqual(interner.stats()["total"], 2 * (unique - 2))
+
+
+if __name__ == "__main__":
+    unittest.main()
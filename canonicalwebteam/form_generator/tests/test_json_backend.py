@@ -0,0 +1,116 @@
+import tempfile
+import unittest
+from json import JSONDecodeError
+from pathlib import Path
+from unittest.mock import patch
+from flask import Flask
+from werkzeug.exceptions import HTTPException
+from canonicalwebteam.form_generator.app import FormGenerator
+from canonicalwebteam.form_generator.json_backend import (
+    get_json_backend,
+    JSONBackend,
+    ORJSON_BACKEND,
+    STDLIB_BACKEND,
+)
+
+
+class TestJSONBackend(unittest.TestCase):
+    def test_get_json_backend(self):
+        """
+        Test backends are returned by name, and the json module is the
+        default.
+        """
+        backend = JSONBackend("custom", lambda raw: {})
+
+        self.assertIs(get_json_backend("json"), STDLIB_BACKEND)
+        self.assertIs(get_json_backend(backend), backend)
+        self.assertIs(get_json_backend(), STDLIB_BACKEND)
+        with self.assertRaises(ValueError):
+            get_json_backend("yaml")
+
+    def test_orjson_not_installed(self):
+        """
+        Test requesting orjson fails when it isn't installed.
+        """
+        with patch(
+            "canonicalwebteam.form_generator.json_backend.ORJSON_BACKEND",
+            None,
+        ):
+            self.assertIs(get_json_backend(), STDLIB_BACKEND)
+            with self.assertRaises(RuntimeError):
+                get_json_backend("orjson")
+
+    def test_backends_parse_and_report_errors_alike(self):
+        """
+        Test every available backend parses form-data.json files the same
+        way and invalid JSON is reported as a 400 error.
+        """
+        backends = ["json"] + (["orjson"] if ORJSON_BACKEND else [])
+
+        with tempfile.TemporaryDirectory() as directory:
+            valid = Path(directory, "valid.json")
+            valid.write_text(
+                '{"form": {"/aws": {"formData": {"title": "AWS \\u2603"}}}}'
+            )
+            invalid = Path(directory, "invalid.json")
+            invalid.write_text('{"form": {"/aws": ')
+
+            for backend in backends:
+                form_generator = FormGenerator(
+                    Flask(__name__), "form.html", json_backend=backend
+                )
+                self.assertEqual(
+                    form_generator._load_form_json(valid),
+                    {"/aws": {"formData": {"title": "AWS ☃"}}},
+                )
+                with self.assertRaises(HTTPException) as context:
+                    form_generator._load_form_json(invalid)
+                self.assertEqual(context.exception.code, 400)
+
+    @unittest.skipIf(ORJSON_BACKEND is None, "orjson isn't installed")
+    def test_orjson_differs_on_non_standard_values(self):
+        """
+        Test NaN and Infinity, accepted by the default json module, are
+        invalid JSON with orjson, and integers wider than 64 bits lose
+        precision.
+        """
+        for raw in (b"NaN", b"Infinity"):
+            self.assertIsInstance(STDLIB_BACKEND.loads(raw), float)
+            with self.assertRaises(JSONDecodeError):
+                ORJSON_BACKEND.loads(raw)
+
+        self.assertEqual(
+            STDLIB_BACKEND.loads(b"18446744073709551617"), 2**64 + 1
+        )
+        self.assertNotEqual(
+            ORJSON_BACKEND.loads(b"18446744073709551617"), 2**64 + 1
+        )
+
+    def test_content_hash_is_the_same_with_every_backend(self):
+        """
+        Test content hashes are computed over canonical JSON, so workers
+        using different backends agree on them.
+        """
+        backends = ["json"] + (["orjson"] if ORJSON_BACKEND else [])
+        form = {
+            "formData": {"title": "AWS \u2603", "formId": 1},
+            "fieldsets": [{"title": "About you", "fields": []}],
+        }
+        reordered = {
+            "fieldsets": form["fieldsets"],
+            "formData": {"formId": 1, "title": "AWS \u2603"},
+        }
+
+        hashes = {
+            FormGenerator(
+                Flask(__name__), "form.html", json_backend=backend
+            )._hash_form(value)
+            for backend in backends
+            for value in (form, reordered)
+        }
+
+        self.assertEqual(len(hashes), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
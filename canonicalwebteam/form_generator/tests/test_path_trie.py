@@ -0,0 +1,51 @@
+import unittest
+from canonicalwebteam.form_generator.path_trie import is_pattern, PathTrie
+
+
+class TestPathTrie(unittest.TestCase):
+    def test_is_pattern(self):
+        """
+        Test paths with glob characters are patterns.
+        """
+        self.assertTrue(is_pattern("/data/*"))
+        self.assertTrue(is_pattern("/data/product-?"))
+        self.assertFalse(is_pattern("/data/mongodb"))
+
+    def test_match(self):
+        """
+        Test "*" matches one segment, "**" any number of segments and other
+        glob characters match within a segment.
+        """
+        trie = PathTrie(["/data/*", "/cloud/**/contact", "/kafka-*/docs"])
+
+        self.assertEqual(trie.match("/data/mongodb"), "/data/*")
+        self.assertEqual(trie.match("/data/mongodb/"), "/data/*")
+        self.assertIsNone(trie.match("/data"))
+        self.assertIsNone(trie.match("/data/mongodb/contact"))
+        self.assertEqual(trie.match("/cloud/contact"), "/cloud/**/contact")
+        self.assertEqual(
+            trie.match("/cloud/a/b/c/contact"), "/cloud/**/contact"
+        )
+        self.assertIsNone(trie.match("/cloud/a/b"))
+        self.assertEqual(trie.match("/kafka-managed/docs"), "/kafka-*/docs")
+        self.assertIsNone(PathTrie().match("/data"))
+
+    def test_most_specific_match(self):
+        """
+        Test literal segments take precedence over segment globs, "*" and
+        then "**".
+        """
+        trie = PathTrie(
+            ["/**", "/data/**", "/data/*", "/data/mongo*", "/data/mongodb"]
+        )
+
+        self.assertEqual(trie.match("/data/mongodb"), "/data/mongodb")
+        self.assertEqual(trie.match("/data/mongo-ops"), "/data/mongo*")
+        self.assertEqual(trie.match("/data/kafka"), "/data/*")
+        self.assertEqual(trie.match("/data/kafka/docs"), "/data/**")
+        self.assertEqual(trie.match("/data"), "/data/**")
+        self.assertEqual(trie.match("/cloud"), "/**")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+import unittest
+from flask import Flask
+from canonicalwebteam.form_generator.stats import FormStats
+
+
+class TestFormStats(unittest.TestCase):
+    def setUp(self):
+        self.stats = FormStats(slowest_files=2)
+        self.stats("load_form", 0.002, form_path="/aws")
+        self.stats("load_form", 0.001, form_path="/aws")
+        self.stats("render", 0.001, form_path="/aws")
+        self.stats("cache_hit", 0.0, form_path="/aws")
+        self.stats("cache_miss", 0.0, form_path="/aws")
+        self.stats("parse", 0.01, file_path="a.json", size=100)
+        for duration, file_path in [(0.3, "a"), (0.1, "b"), (0.2, "c")]:
+            self.stats("load_file", duration, file_path=file_path)
+
+    def test_to_dict(self):
+        """
+        Test hook calls are aggregated.
+        """
+        stats = self.stats.to_dict()
+
+        self.assertEqual(stats["calls"], {"/aws": 2})
+        self.assertEqual(stats["phases"]["load_form"]["count"], 2)
+        self.assertAlmostEqual(
+            stats["phases"]["load_form"]["total_seconds"], 0.003
+        )
+        self.assertEqual(stats["phases"]["load_form"]["max_seconds"], 0.002)
+        self.assertEqual(stats["bytes_parsed"], 100)
+        self.assertEqual(stats["cache_hits"], 1)
+        self.assertEqual(stats["cache_misses"], 1)
+        self.assertEqual(
+            stats["slowest_files"],
+            [
+                {"file_path": "a", "seconds": 0.3},
+                {"file_path": "c", "seconds": 0.2},
+            ],
+        )
+
+    def test_to_prometheus(self):
+        """
+        Test stats are exported in the Prometheus text format.
+        """
+        self.stats("load_form", 0.001, form_path='/quote"path')
+        text = self.stats.to_prometheus()
+
+        self.assertIn(
+            "# TYPE form_generator_phase_seconds_total counter", text
+        )
+        self.assertIn(
+            'form_generator_load_form_calls_total{path="/aws"} 2', text
+        )
+        self.assertIn(
+            'form_generator_load_form_calls_total{path="/quote\\"path"} 1',
+            text,
+        )
+        self.assertIn("form_generator_bytes_parsed_total 100", text)
+        self.assertIn(
+            'form_generator_slowest_file_seconds{file="a"} 0.3', text
+        )
+
+    def test_views(self):
+        """
+        Test the JSON and Prometheus views.
+        """
+        app = Flask(__name__)
+        app.add_url_rule("/stats.json", view_func=self.stats.json_view)
+        app.add_url_rule("/metrics", view_func=self.stats.prometheus_view)
+        client = app.test_client()
+
+        self.assertEqual(
+            client.get("/stats.json").get_json()["calls"], {"/aws": 2}
+        )
+        self.assertTrue(
+            client.get("/metrics").content_type.startswith("text/plain")
+        )
+
+    def test_reset(self):
+        """
+        Test reset clears the stats.
+        """
+        self.stats.reset()
+
+        self.assertEqual(self.stats.to_dict()["calls"], {})
+        self.assertEqual(self.stats.to_dict()["slowest_files"], [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+import unittest
+from canonicalwebteam.form_generator.store import TieredFormStore
+
+FORM = {
+    "fieldsets": [{"id": "about-you", "fields": [{"id": "email"}]}],
+    "formData": {"title": "AWS"},
+}
+
+
+class TestTieredFormStore(unittest.TestCase):
+    def test_cold_forms_are_promoted(self):
+        """
+        Test forms are stored compressed, and kept parsed once they have
+        been read promote_after times.
+        """
+        store = TieredFormStore(promote_after=2)
+        store.put("a", FORM)
+
+        first = store.get("a")
+        second = store.get("a")
+        third = store.get("a")
+
+        self.assertEqual(first, FORM)
+        self.assertIsNot(first, second)
+        self.assertIs(second, third)
+        self.assertIsNone(store.get("unknown"))
+        stats = store.stats()
+        self.assertEqual(stats["hot_entries"], 1)
+        self.assertEqual(stats["cold_entries"], 1)
+        self.assertEqual(stats["cold_hits"], 2)
+        self.assertEqual(stats["hot_hits"], 1)
+        self.assertEqual(stats["misses"], 1)
+        self.assertEqual(stats["promotions"], 1)
+        self.assertGreater(stats["hot_bytes"], 0)
+        self.assertGreater(stats["cold_bytes"], 0)
+
+    def test_hot_tier_limits(self):
+        """
+        Test the least recently used forms are demoted once the hot tier is
+        over its limits, and stay in the cold tier.
+        """
+        store = TieredFormStore(max_hot_entries=2)
+        for key in "abc":
+            store.put(key, FORM)
+        store.get("a")
+        store.get("b")
+        store.get("a")
+        store.get("c")
+
+        self.assertEqual(list(store._hot), ["a", "c"])
+        self.assertEqual(store.stats()["demotions"], 1)
+        self.assertEqual(store.get("b"), FORM)
+
+        store = TieredFormStore(max_hot_bytes=1)
+        store.put("a", FORM)
+        store.get("a")
+        self.assertEqual(store.stats()["hot_entries"], 0)
+
+    def test_retain(self):
+        """
+        Test forms no longer used are removed from both tiers.
+        """
+        store = TieredFormStore()
+        store.put("a", FORM)
+        store.put("b", {"fieldsets": [], "formData": {}})
+        store.get("a")
+        store.retain(["b"])
+
+        self.assertNotIn("a", store)
+        self.assertEqual(len(store), 1)
+        stats = store.stats()
+        self.assertEqual(stats["hot_entries"], 0)
+        self.assertEqual(stats["hot_bytes"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,150 @@
+import json
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+from flask import Flask
+from canonicalwebteam.form_generator.app import FormGenerator
+from canonicalwebteam.form_generator.json_backend import JSONBackend
+from canonicalwebteam.form_generator.watcher import FormWatcher, INotify
+
+
+def write_form_file(folder, form_data):
+    folder.mkdir(parents=True, exist_ok=True)
+    file_path = folder / "form-data.json"
+    file_path.write_text(json.dumps({"form": form_data}))
+    return file_path
+
+
+class TestFormWatcher(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.templates = Path(self.directory.name)
+        write_form_file(
+            self.templates / "data",
+            {
+                "/data": {
+                    "templatePath": "data/index.html",
+                    "childrenPaths": ["/data/mysql", "/data/postgresql"],
+                }
+            },
+        )
+        write_form_file(
+            self.templates / "cloud",
+            {"/cloud": {"templatePath": "cloud/index.html"}},
+        )
+
+        self.form_generator = FormGenerator(Flask(__name__), "form.html")
+        self.form_generator.templates_folder = self.templates
+        self.form_generator.load_forms()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_poll_changed_file(self):
+        """
+        Test poll re-parses only the changed file and drops the paths it no
+        longer defines.
+        """
+        watcher = FormWatcher(self.form_generator, use_inotify=False)
+        watcher._signatures = watcher._scan()
+
+        file_path = write_form_file(
+            self.templates / "data",
+            {
+                "/data": {
+                    "templatePath": "data/index.html",
+                    "childrenPaths": ["/data/mysql"],
+                    "formData": {"title": "Updated"},
+                }
+            },
+        )
+
+        mock_loads = MagicMock(wraps=json.loads)
+        with patch.object(
+            self.form_generator,
+            "json_backend",
+            JSONBackend("json", mock_loads),
+        ):
+            changed = watcher.poll()
+
+        self.assertEqual(changed, {file_path})
+        mock_loads.assert_called_once()
+        self.assertEqual(
+            sorted(self.form_generator.form_metadata),
+            ["/cloud", "/data", "/data/mysql"],
+        )
+        self.assertEqual(
+            sorted(self.form_generator.form_index),
+            ["/cloud", "/data", "/data/mysql"],
+        )
+        self.assertEqual(
+            self.form_generator.form_index["/data/mysql"].form_data,
+            {"title": "Updated"},
+        )
+
+    def test_poll_added_and_deleted_files(self):
+        """
+        Test poll indexes new files and removes the paths of deleted ones.
+        """
+        watcher = FormWatcher(self.form_generator, use_inotify=False)
+        watcher._signatures = watcher._scan()
+
+        (self.templates / "data" / "form-data.json").unlink()
+        write_form_file(
+            self.templates / "ai",
+            {"/ai": {"templatePath": "ai/index.html"}},
+        )
+        watcher.poll()
+
+        self.assertEqual(
+            sorted(self.form_generator.form_metadata), ["/ai", "/cloud"]
+        )
+        self.assertEqual(
+            sorted(self.form_generator.form_index), ["/ai", "/cloud"]
+        )
+
+    def test_poll_invalid_file_keeps_previous_forms(self):
+        """
+        Test an invalid file is logged and its previous forms kept.
+        """
+        watcher = FormWatcher(self.form_generator, use_inotify=False)
+        watcher._signatures = watcher._scan()
+
+        (self.templates / "cloud" / "form-data.json").write_text("{invalid")
+        with self.assertLogs(self.form_generator.app.logger, "ERROR"):
+            watcher.poll()
+
+        self.assertIn("/cloud", self.form_generator.form_index)
+
+    @unittest.skipIf(INotify is None, "inotify_simple is not installed")
+    def test_inotify(self):
+        """
+        Test the inotify watcher picks up changes in the background.
+        """
+        watcher = FormWatcher(
+            self.form_generator, interval=0.05, use_inotify=True
+        )
+        watcher.start()
+        try:
+            write_form_file(
+                self.templates / "ai" / "new",
+                {"/ai": {"templatePath": "ai/index.html"}},
+            )
+            (self.templates / "cloud" / "form-data.json").unlink()
+
+            deadline = time.monotonic() + 5
+            expected = ["/ai", "/data", "/data/mysql", "/data/postgresql"]
+            while time.monotonic() < deadline:
+                if sorted(self.form_generator.form_index) == expected:
+                    break
+                time.sleep(0.05)
+        finally:
+            watcher.stop()
+
+        self.assertEqual(sorted(self.form_generator.form_index), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,217 @@
+from os import walk
+from pathlib import Path
+from threading import Event, Thread
+
+from werkzeug.exceptions import HTTPException
+
+from canonicalwebteam.form_generator.app import _stat_signature
+
+try:
+    from inotify_simple import INotify, flags as inotify_flags
+except ImportError:
+    INotify = None
+
+
+class FormWatcher:
+    def __init__(
+        self,
+        form_generator,
+        include: list = None,
+        exclude: list = None,
+        interval: float = 1.0,
+        use_inotify: bool = None,
+    ):
+        """
+        Watches the 'templates' dir and re-indexes only the form-data.json
+        files that are added, changed or deleted.
+
+        :param form_generator: FormGenerator instance whose forms are loaded
+        :param include: Glob patterns passed to load_forms (optional)
+        :param exclude: Glob patterns passed to load_forms (optional)
+        :param interval: Seconds between polls, or between checks for
+            stop() when using inotify
+        :param use_inotify: Use inotify (requires inotify_simple). Defaults
+            to True when inotify_simple is installed
+        """
+        if use_inotify is None:
+            use_inotify = INotify is not None
+        elif use_inotify and INotify is None:
+            raise RuntimeError("inotify_simple is required to use inotify")
+
+        self.form_generator = form_generator
+        self.include = include
+        self.exclude = exclude
+        self.interval = interval
+        self.use_inotify = use_inotify
+        self._signatures = {}
+        self._stop = Event()
+        self._thread = None
+        self._inotify = None
+        self._watches = {}
+
+    def start(self):
+        """
+        Starts watching in a background thread.
+        """
+        self._signatures = self._scan()
+        if self.use_inotify:
+            self._inotify = INotify()
+            self._watch_tree(self.form_generator.templates_folder)
+
+        self._stop.clear()
+        self._thread = Thread(
+            target=self._run, name="form-watcher", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stops watching.
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+            self._watches = {}
+
+    def poll(self) -> set:
+        """
+        Compares the form-data.json files against the last scan and applies
+        the changes.
+
+        :return: Paths of the added, changed and deleted files
+        """
+        signatures = self._scan()
+        changed = {
+            file_path
+            for file_path, signature in signatures.items()
+            if self._signatures.get(file_path) != signature
+        }
+        changed.update(set(self._signatures) - set(signatures))
+        self._signatures = signatures
+
+        self._apply(changed)
+        return changed
+
+    def _run(self):
+        while not self._stop.is_set():
+            if self._inotify is not None:
+                self._apply(self._read_events())
+            else:
+                self.poll()
+                self._stop.wait(self.interval)
+
+    def _scan(self) -> dict:
+        """
+        Returns the stat signature of every watched form-data.json file.
+        """
+        form_generator = self.form_generator
+        signatures = {}
+        for file_path in form_generator._find_form_files(
+            self.include, self.exclude
+        ):
+            signature = _stat_signature(file_path)
+            if signature is not None:
+                signatures[file_path] = signature
+        return signatures
+
+    def _apply(self, file_paths: set):
+        """
+        Re-indexes changed files and removes deleted ones, in path order.
+        """
+        form_generator = self.form_generator
+        for file_path in sorted(file_paths):
+            try:
+                if file_path.exists():
+                    form_generator.reload_file(file_path)
+                else:
+                    form_generator.remove_file(file_path)
+            except HTTPException as e:
+                # Keep serving the previous version of the forms
+                form_generator.app.logger.error(
+                    f"Unable to reload forms from {file_path}: "
+                    f"{e.description}"
+                )
+
+    def _is_included(self, file_path: Path) -> bool:
+        templates_folder = self.form_generator.templates_folder
+        relative_path = file_path.relative_to(templates_folder).as_posix()
+        matches = self.form_generator._matches
+        if self.include and not matches(self.include, relative_path):
+            return False
+        return not matches(self.exclude or (), relative_path)
+
+    def _watch_tree(self, folder: Path) -> set:
+        """
+        Adds inotify watches to a directory and its subdirectories.
+
+        :return: The form-data.json files found in them
+        """
+        templates_folder = self.form_generator.templates_folder
+        mask = (
+            inotify_flags.CLOSE_WRITE
+            | inotify_flags.CREATE
+            | inotify_flags.DELETE
+            | inotify_flags.MOVED_FROM
+            | inotify_flags.MOVED_TO
+        )
+        file_paths = set()
+
+        for root, dirs, files in walk(folder):
+            root_path = Path(root)
+            relative_root = root_path.relative_to(templates_folder)
+            dirs[:] = [
+                name
+                for name in dirs
+                if not self.form_generator._matches(
+                    self.exclude or (),
+                    name,
+                    (relative_root / name).as_posix(),
+                )
+            ]
+            self._watches[self._inotify.add_watch(root_path, mask)] = root_path
+            if "form-data.json" in files:
+                file_path = root_path / "form-data.json"
+                if self._is_included(file_path):
+                    file_paths.add(file_path)
+
+        return file_paths
+
+    def _read_events(self) -> set:
+        """
+        Waits for inotify events and returns the affected form-data.json
+        files.
+        """
+        changed = set()
+        for event in self._inotify.read(timeout=int(self.interval * 1000)):
+            folder = self._watches.get(event.wd)
+            if folder is None or not event.name:
+                continue
+
+            path = folder / event.name
+            if event.mask & inotify_flags.ISDIR:
+                if event.mask & (
+                    inotify_flags.CREATE | inotify_flags.MOVED_TO
+                ):
+                    changed.update(self._watch_tree(path))
+                elif event.mask & (
+                    inotify_flags.DELETE | inotify_flags.MOVED_FROM
+                ):
+                    # Files moved out with their directory
+                    changed.update(
+                        Path(key)
+                        for key in self.form_generator._forms.file_paths
+                        if Path(key).is_relative_to(path)
+                    )
+            elif (
+                event.name == "form-data.json"
+                and not event.mask & inotify_flags.CREATE
+                and self._is_included(path)
+            ):
+                # New files are picked up by the CLOSE_WRITE after CREATE
+                changed.add(path)
+
+        return changed
@@ -12,8 +12,14 @@ setup(
         "Python script to generate HTML forms and attach them"
         "as a Flask view func."
     ),
-    packages=find_packages(),
+    packages=find_packages(exclude=["benchmarks", "benchmarks.*"]),
     long_description=open("README.md").read(),
     long_description_content_type="text/markdown",
-    install_requires=["Flask"],
+    install_requires=["Flask>=2.3"],
+    extras_require={
+        "watch": ["inotify_simple"],
+        "orjson": ["orjson"],
+        "brotli": ["brotli"],
+        "redis": ["redis"],
+    },
 )